@@ -0,0 +1,153 @@
+"""
+Messages per second through the receive-side dispatch path.
+
+A stream of packed frames is generated, one datagram per packet, as a
+swarm on one udpin port would send it. Each vehicle's autopilot sends a
+mix of messages in roughly the proportions ArduPilot streams them. A
+companion computer on each vehicle sends messages that are published but
+belong to no Vehicle. The stream is pushed through what
+Connection._message_loop does with each packet:
+
+    parse      pymavlink parsing of the datagram (link.mav.parse_buffer)
+    route      Connection._vehicle_for, which registers vehicles on
+               their first HEARTBEAT
+    decode     Connection.update_telemetry into that vehicle's store
+    publish    MessageBus.publish to the flight recorder (ANY handler),
+               the PARAM_VALUE handler and a STATUSTEXT subscription
+
+Each stage is timed on its own over the whole stream, and then the full
+loop is timed end to end.
+
+    python -m benchmarks.decode_throughput [--vehicles 20] [--rounds 100] [--no-record]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+os.environ.setdefault('MAVLINK20', '1')
+from pymavlink import mavutil
+from src.connection import Connection
+
+_m = mavutil.mavlink
+
+# (message, copies per round) — about what a 10 Hz stream set sends per second
+AUTOPILOT_MIX = (
+    (_m.MAVLink_heartbeat_message(2, 3, 217, 4, 4, 3), 1),
+    (_m.MAVLink_attitude_message(1000, 0.1, -0.05, 1.2, 0.0, 0.0, 0.0), 10),
+    (_m.MAVLink_global_position_int_message(1000, 417907170, 447580536, 584000, 50000, 120, -30, 5, 9000), 10),
+    (_m.MAVLink_vfr_hud_message(12.0, 11.5, 90, 45, 50.0, 0.3), 10),
+    (_m.MAVLink_gps_raw_int_message(1000, 3, 417907170, 447580536, 584000, 80, 120, 1200, 9000, 14), 5),
+    (_m.MAVLink_sys_status_message(0, 0, 0, 250, 12400, 1530, 80, 0, 0, 0, 0, 0, 0), 2),
+    (_m.MAVLink_nav_controller_output_message(0.0, 0.0, 90, 92, 120, 0.5, 0.0, 0.3), 5),
+    (_m.MAVLink_mission_current_message(3), 2),
+    (_m.MAVLink_statustext_message(6, b'Reached waypoint #3'), 1),
+)
+COMPANION_MIX = (
+    (_m.MAVLink_heartbeat_message(_m.MAV_TYPE_ONBOARD_CONTROLLER, _m.MAV_AUTOPILOT_INVALID, 0, 0, 4, 3), 1),
+    (_m.MAVLink_system_time_message(1700000000000000, 1000), 1),
+)
+
+
+def stream(vehicles, rounds):
+    """Packed datagrams from every sender, interleaved round by round."""
+    senders = []
+    for sysid in range(1, vehicles + 1):
+        for compid, mix in ((_m.MAV_COMP_ID_AUTOPILOT1, AUTOPILOT_MIX),
+                            (_m.MAV_COMP_ID_ONBOARD_COMPUTER, COMPANION_MIX)):
+            mav = _m.MAVLink(None, srcSystem=sysid, srcComponent=compid)
+            senders.append((mav, [msg for msg, copies in mix for _ in range(copies)]))
+    return [bytes(msg.pack(mav)) for _ in range(rounds) for mav, msgs in senders for msg in msgs]
+
+
+def connection(record, log_dir):
+    conn = Connection(record=record)
+    if conn.recorder is not None:
+        conn.recorder.start(os.path.join(log_dir, f"bench-{time.monotonic_ns()}.tlog"))
+    conn._bus.subscribe('STATUSTEXT')  # a console following STATUSTEXT
+    return conn
+
+
+def close(conn):
+    if conn.recorder is not None:
+        conn.recorder.stop()
+
+
+def timed(fn, items):
+    started = time.perf_counter()
+    out = [fn(item) for item in items]
+    return out, len(items) / (time.perf_counter() - started)
+
+
+def run_stages(conn, datagrams):
+    """Rates (msg/s) of each stage, run one after the other over the stream."""
+    parser = _m.MAVLink(None)
+    batches, parse_rate = timed(parser.parse_buffer, datagrams)
+    msgs = [msg for batch in batches for msg in batch or ()]
+    parse_rate *= len(msgs) / len(datagrams)   # per message, not per datagram
+    vehicles, route_rate = timed(conn._vehicle_for, msgs)
+    routed = [(msg, vehicle) for msg, vehicle in zip(msgs, vehicles) if vehicle is not None]
+    _, decode_rate = timed(lambda mv: conn.update_telemetry(*mv), routed)
+    _, publish_rate = timed(conn._bus.publish, msgs)
+    return len(msgs), {
+        'parse': parse_rate,
+        'route': route_rate,
+        # per message of the stream, like the others: companion messages skip it
+        'decode': decode_rate * len(msgs) / len(routed),
+        'publish': publish_rate,
+    }
+
+
+def run_loop(conn, datagrams):
+    """Rate (msg/s) of the whole per-packet path, as in Connection._message_loop."""
+    parse = _m.MAVLink(None).parse_buffer
+    vehicle_for = conn._vehicle_for
+    update = conn.update_telemetry
+    publish = conn._bus.publish
+    n = 0
+    started = time.perf_counter()
+    for datagram in datagrams:
+        for msg in parse(datagram) or ():
+            vehicle = vehicle_for(msg)
+            if vehicle is not None:
+                if msg.get_type() == 'HEARTBEAT':
+                    vehicle.last_heartbeat = conn.last_heartbeat = time.monotonic()
+                update(msg, vehicle)
+            publish(msg)
+            n += 1
+    return n / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--vehicles', type=int, default=20)
+    parser.add_argument('--rounds', type=int, default=100)
+    parser.add_argument('--no-record', dest='record', action='store_false',
+                        help="leave the flight recorder out of the publish stage")
+    args = parser.parse_args()
+
+    datagrams = stream(args.vehicles, args.rounds)
+    with tempfile.TemporaryDirectory() as log_dir:
+        conn = connection(args.record, log_dir)
+        run_loop(conn, datagrams[:20000])  # warm up
+        close(conn)
+
+        conn = connection(args.record, log_dir)
+        count, rates = run_stages(conn, datagrams)
+        close(conn)
+        print(f"{count:,} messages from {args.vehicles} vehicles × "
+              f"{len(AUTOPILOT_MIX) + len(COMPANION_MIX)} message types, 2 components each")
+        for stage, rate in rates.items():
+            print(f"  {stage:8s} {rate:12,.0f} msg/s  {1e6 / rate:6.2f} µs/msg")
+
+        conn = connection(args.record, log_dir)
+        rate = run_loop(conn, datagrams)
+        print(f"  {'total':8s} {rate:12,.0f} msg/s  {1e6 / rate:6.2f} µs/msg"
+              f"  ({len(conn.vehicles)} vehicles registered)")
+        close(conn)
+        if conn.recorder is not None:
+            print(f"  recorder dropped {conn.recorder.dropped:,} packets")
+
+
+if __name__ == '__main__':
+    main()
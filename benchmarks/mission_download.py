@@ -0,0 +1,119 @@
+"""
+Windowed vs one-at-a-time mission download over a simulated lossy link.
+
+A fake vehicle on a local UDP socket answers MISSION_REQUEST_LIST and
+MISSION_REQUEST_INT like an autopilot, but delays every reply by `latency`
+and drops a fraction `loss` of the MISSION_ITEM_INT replies. The same
+mission is downloaded with window=1 (the old serial behaviour) and with
+the default window, and both are timed.
+
+    python -m benchmarks.mission_download [--items 100] [--loss 0.1] [--latency 0.05]
+"""
+import argparse
+import contextlib
+import heapq
+import io
+import os
+import random
+import socket
+import threading
+import time
+
+os.environ.setdefault('MAVLINK20', '1')  # mission_type only exists on the wire in MAVLink 2
+from pymavlink import mavutil
+from src.connection import Connection
+
+
+class LossyVehicle(threading.Thread):
+    """A mission-serving fake autopilot behind a slow, lossy link."""
+
+    def __init__(self, gcs_port, items, latency, loss, seed=1):
+        super().__init__(daemon=True)
+        self.gcs = ('127.0.0.1', gcs_port)
+        self.items = items
+        self.latency = latency
+        self.loss = loss
+        self.random = random.Random(seed)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.settimeout(0.01)
+        self.mav = mavutil.mavlink.MAVLink(None, srcSystem=1, srcComponent=1)
+        self.parser = mavutil.mavlink.MAVLink(None)
+        self.parser.robust_parsing = True
+        self._outbox = []   # (due, order, packet)
+        self._order = 0
+        self.stopped = threading.Event()
+
+    def _send(self, msg, lossy=False):
+        if lossy and self.random.random() < self.loss:
+            return
+        packet = msg.pack(self.mav)
+        self.mav.seq = (self.mav.seq + 1) % 256
+        self._order += 1
+        heapq.heappush(self._outbox, (time.monotonic() + self.latency, self._order, packet))
+
+    def _handle(self, msg):
+        kind = msg.get_type()
+        if kind == 'MISSION_REQUEST_LIST':
+            self._send(mavutil.mavlink.MAVLink_mission_count_message(
+                255, 0, self.items, msg.mission_type))
+        elif kind == 'MISSION_REQUEST_INT':
+            self._send(mavutil.mavlink.MAVLink_mission_item_int_message(
+                255, 0, msg.seq, mavutil.mavlink.MAV_FRAME_GLOBAL_RELATIVE_ALT,
+                mavutil.mavlink.MAV_CMD_NAV_WAYPOINT, 0, 1, 0, 0, 0, 0,
+                int(41.79e7) + msg.seq, int(44.75e7), 50.0, msg.mission_type), lossy=True)
+
+    def run(self):
+        next_heartbeat = 0.0
+        while not self.stopped.is_set():
+            now = time.monotonic()
+            if now >= next_heartbeat:
+                self.sock.sendto(mavutil.mavlink.MAVLink_heartbeat_message(
+                    2, 3, 0, 0, 0, 3).pack(self.mav), self.gcs)
+                next_heartbeat = now + 1.0
+            while self._outbox and self._outbox[0][0] <= now:
+                self.sock.sendto(heapq.heappop(self._outbox)[2], self.gcs)
+            try:
+                data = self.sock.recv(2048)
+            except socket.timeout:
+                continue
+            for msg in self.parser.parse_buffer(data) or ():
+                self._handle(msg)
+
+
+def timed_download(port, items, latency, loss, window):
+    vehicle = LossyVehicle(port, items, latency, loss)
+    conn = Connection(record=False)
+    vehicle.start()
+    try:
+        conn.connect_sitl(f'udpin:127.0.0.1:{port}', heartbeat_timeout=5)
+        started = time.monotonic()
+        with contextlib.redirect_stdout(io.StringIO()):  # per-item progress lines
+            got = conn._download_items(mavutil.mavlink.MAV_MISSION_TYPE_MISSION,
+                                       window=window, item_timeout=4 * latency + 0.1)
+        elapsed = time.monotonic() - started
+    finally:
+        vehicle.stopped.set()
+        conn.disconnect_sitl()
+    assert len(got) == items and all(got)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--items', type=int, default=100)
+    parser.add_argument('--loss', type=float, default=0.1)
+    parser.add_argument('--latency', type=float, default=0.05, help="one-way delay (s)")
+    parser.add_argument('--window', type=int, default=8)
+    parser.add_argument('--port', type=int, default=14590)
+    args = parser.parse_args()
+
+    print(f"{args.items} items, {args.loss:.0%} item loss, {args.latency * 1000:.0f} ms latency")
+    serial = timed_download(args.port, args.items, args.latency, args.loss, 1)
+    print(f"  window=1:  {serial:6.2f} s  ({args.items / serial:6.1f} items/s)")
+    windowed = timed_download(args.port + 1, args.items, args.latency, args.loss, args.window)
+    print(f"  window={args.window}:  {windowed:6.2f} s  ({args.items / windowed:6.1f} items/s)")
+    print(f"  speedup: {serial / windowed:.1f}×")
+
+
+if __name__ == '__main__':
+    main()
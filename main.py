@@ -1,5 +1,7 @@
 # main.py
+import os
 import sys
+from PySide6.QtCore import Qt
 from PySide6.QtWidgets import QApplication, QMainWindow, QTabWidget
 from src.widget_classes.video import VideoFeedTab
 from src.widget_classes.mission_planning import MissionPlanningTab
@@ -41,6 +43,12 @@ class GCSMainWindow(QMainWindow):
 
 
 if __name__ == "__main__":
+    # the OpenGL video surface and Qt WebEngine (map) need shared GL contexts
+    QApplication.setAttribute(Qt.AA_ShareOpenGLContexts)
+    # GCS_SOFTWARE_GL=1: render with Mesa's llvmpipe (headless / no GPU)
+    if os.environ.get("GCS_SOFTWARE_GL"):
+        os.environ.setdefault("LIBGL_ALWAYS_SOFTWARE", "1")
+        QApplication.setAttribute(Qt.AA_UseSoftwareOpenGL)
     app = QApplication(sys.argv)
     
     with open("palette.qss", "r") as f:
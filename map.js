@@ -6,9 +6,14 @@ window.onload = function () {
 
     // ─── Create map and base layer ────────────────────────────────────────
     const map = L.map('map').setView([41.79071700571516, 44.7580536055492], 13);
-    L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png').addTo(map);
+    let tileLayer = L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png').addTo(map);
     window.map = map;
 
+    window.setTileSource = url => {
+        map.removeLayer(tileLayer);
+        tileLayer = L.tileLayer(url, { maxZoom: 19 }).addTo(map);
+    };
+
     // ─── Drone marker (unchanged) ─────────────────────────────────────────
     const svgDroneIcon = L.icon({
         iconUrl: 'media/drone.svg',
@@ -21,17 +26,43 @@ window.onload = function () {
         if (droneMarker) droneMarker.setLatLng([lat, lon]);
     };
 
-    // ─── Global state ─────────────────────────────────────────────────────
-    window.waypoints        = [];  // {lat, lng, alt}
-    window.waypointMarkers  = [];
-    window.polyline         = L.polyline([], { color: 'blue' }).addTo(map);
-
-    window.geofencePoints   = [];  // [lat, lng]
-    window.geofenceMarkers  = [];
-    window.geofencePolyline = L.polygon([], { color: 'red' }).addTo(map);
+    // ─── Other vehicles on the link ───────────────────────────────────────
+    // One faded marker per vehicle that isn't selected, labelled with its
+    // system id; clicking one selects it.
+    const vehicleMarkers = {};   // "sysid:compid" → marker
+    window.setVehicles = positions => {
+        for (const key of Object.keys(vehicleMarkers)) {
+            if (!(key in positions)) {
+                map.removeLayer(vehicleMarkers[key]);
+                delete vehicleMarkers[key];
+            }
+        }
+        for (const [key, [lat, lon]] of Object.entries(positions)) {
+            let marker = vehicleMarkers[key];
+            if (!marker) {
+                marker = L.marker([lat, lon], { icon: svgDroneIcon, opacity: 0.55 })
+                    .bindTooltip(key.split(':')[0], { permanent: true, direction: 'right' })
+                    .on('click', () => window.bridge && window.bridge.vehicleClicked(key))
+                    .addTo(map);
+                vehicleMarkers[key] = marker;
+            } else {
+                marker.setLatLng([lat, lon]);
+            }
+        }
+    };
 
-    window.rallyPoints      = [];  // [lat, lng]
-    window.rallyMarkers     = [];
+    // ─── Edit notifications to Python ─────────────────────────────────────
+    // Every user edit is reported to the Python mission model as a delta.
+    // Bulk loads that came *from* Python (setWaypoints etc.) are not echoed.
+    let notifyPython = true;
+    function notify(method, ...args) {
+        if (notifyPython && window.bridge) window.bridge[method](...args);
+    }
+    function withoutNotify(fn) {
+        const previous = notifyPython;
+        notifyPython = false;
+        try { fn(); } finally { notifyPython = previous; }
+    }
 
     // ─── Icon helper ──────────────────────────────────────────────────────
     function numberedIcon(number, color) {
@@ -62,67 +93,195 @@ window.onload = function () {
         });
     }
 
-    // ─── Refresh the mission polyline ──────────────────────────────────────
-    function refreshPolyline() {
-        const pts = window.waypoints.map(w => [w.lat, w.lng]);
-        window.polyline.setLatLngs(pts);
-    }
+    // ─── Point layers ──────────────────────────────────────────────────────
+    // Waypoints, geofence vertices and rally points are each a PointLayer.
+    //
+    // Every point is drawn as a dot on one shared canvas renderer, which
+    // stays fast with thousands of points. Numbered, draggable DOM markers
+    // are only created for the points inside the current view, and only
+    // while there are at most MAX_DOM_MARKERS of them; zoomed out over a big
+    // survey grid you see just the dots (click one to edit it).
+    //
+    // Click handlers are bound once on the layer's groups, and the one drag
+    // handler is shared by all markers; both resolve the point's *current*
+    // index when they fire, so deleting a point never re-binds anything. Markers are kept per
+    // point object; after a delete only the visible markers whose number
+    // changed get a new icon. A path edit changes one vertex of the
+    // existing latlng array and redraws once; bulk loads set it in one go.
+    const MAX_DOM_MARKERS = 150;
+    const canvas = L.canvas({ padding: 0.5 });
+
+    class PointLayer {
+        constructor(kind, color, path, openEditor) {
+            this.kind = kind;
+            this.color = color;
+            this.path = path;              // L.polyline / L.polygon, or null
+            this.points = [];              // {lat, lng, alt}
+            this.markers = new Map();      // point → numbered L.marker
+            this.dots = L.featureGroup().addTo(map);
+            this.markerGroup = L.featureGroup().addTo(map);
+
+            if (path) path.addTo(map);
+            const open = e => openEditor(this.points.indexOf(e.layer.point));
+            this.dots.on('click', open);
+            this.markerGroup.on('click', open);
+            // Leaflet fires dragend on the marker only (it doesn't reach the
+            // group), so each marker gets this one shared handler
+            this.onDragEnd = e => {
+                const marker = e.target;
+                const p = marker.getLatLng();
+                const idx = this.points.indexOf(marker.point);
+                map.closePopup();
+                if (idx >= 0) this.move(idx, p.lat, p.lng, marker.point.alt);
+            };
+        }
 
-    // ─── Refresh the geofence polygon ─────────────────────────────────────
-    function refreshGeofence() {
-        if (window.geofencePoints.length > 2) {
-            // polygon closes automatically
-            window.geofencePolyline.setLatLngs(window.geofencePoints);
-        } else {
-            // less than 3 points draws a polyline
-            window.geofencePolyline.setLatLngs(window.geofencePoints);
+        _append(lat, lng, alt) {
+            const point = { lat, lng, alt };
+            this.points.push(point);
+            const dot = L.circleMarker([lat, lng], {
+                renderer: canvas, radius: 5, color: 'white', weight: 1,
+                fillColor: this.color, fillOpacity: 1,
+                bubblingMouseEvents: false  // a click edits, it doesn't add a point
+            });
+            dot.point = point;
+            point.dot = dot;
+            this.dots.addLayer(dot);
+            return point;
         }
-    }
 
-    // ─── Waypoint functions ────────────────────────────────────────────────
-    window.addWaypoint = (lat, lng, alt = 15) => {
-        const idx = window.waypoints.length;
-        window.waypoints.push({ lat, lng, alt });
-
-        const marker = L.marker([lat, lng], {
-            icon: numberedIcon(idx + 1, 'blue'),
-            draggable: true
-        }).addTo(map);
-
-        // Drag to update coords
-        marker.on('dragend', e => {
-            const p = e.target.getLatLng();
-            window.waypoints[idx].lat = p.lat;
-            window.waypoints[idx].lng = p.lng;
-            map.closePopup();
-            refreshPolyline();
-        });
+        // the path's own vertex array (a polygon keeps it as its first ring)
+        _vertices() {
+            const latlngs = this.path.getLatLngs();
+            return this.path instanceof L.Polygon ? latlngs[0] : latlngs;
+        }
+
+        add(lat, lng, alt = 0) {
+            this._append(lat, lng, alt);
+            if (this.path) this.path.addLatLng([lat, lng]);
+            this.syncMarkers();
+            notify('pointAdded', this.kind, this.points.length - 1, lat, lng, alt);
+        }
 
-        // Click to open editor
-        marker.on('click', () => openWaypointEditor(idx));
+        move(idx, lat, lng, alt = 0) {
+            const point = this.points[idx];
+            Object.assign(point, { lat, lng, alt });
+            point.dot.setLatLng([lat, lng]);
+            const marker = this.markers.get(point);
+            if (marker) marker.setLatLng([lat, lng]);
+            if (this.path) {
+                const vertices = this._vertices();
+                vertices[idx] = L.latLng(lat, lng);
+                this.path.setLatLngs(vertices);  // same LatLngs, bounds refreshed
+            }
+            notify('pointMoved', this.kind, idx, lat, lng, alt);
+        }
 
-        window.waypointMarkers.push(marker);
-        refreshPolyline();
-    };
+        remove(idx) {
+            const [point] = this.points.splice(idx, 1);
+            this.dots.removeLayer(point.dot);
+            if (this.path) {
+                const vertices = this._vertices();
+                vertices.splice(idx, 1);
+                this.path.setLatLngs(vertices);
+            }
+            this.syncMarkers();
+            notify('pointRemoved', this.kind, idx);
+        }
 
-    window.clearWaypoints = () => {
-        window.waypointMarkers.forEach(m => map.removeLayer(m));
-        window.waypointMarkers = [];
-        window.waypoints = [];
-        window.polyline.setLatLngs([]);
-    };
+        clear() {
+            this.points = [];
+            this.dots.clearLayers();
+            this.markerGroup.clearLayers();
+            this.markers.clear();
+            if (this.path) this.path.setLatLngs([]);
+            notify('pointsCleared', this.kind);
+        }
 
-    window.getWaypoints = () =>
-        window.waypoints.map(w => [w.lat, w.lng, w.alt]);
+        // replace everything in one batch: one path update, one marker pass
+        set(rows) {
+            withoutNotify(() => this.clear());
+            rows.forEach(([lat, lng, alt = 0]) => this._append(lat, lng, alt));
+            if (this.path) this.path.setLatLngs(this.points.map(p => [p.lat, p.lng]));
+            this.syncMarkers();
+        }
 
-    window.setWaypoints = arr => {
-        window.clearWaypoints();
-        arr.forEach(([lat, lng, alt]) => window.addWaypoint(lat, lng, alt));
-    };
+        rows(withAlt) {
+            return this.points.map(p => withAlt ? [p.lat, p.lng, p.alt] : [p.lat, p.lng]);
+        }
+
+        // create / renumber / drop DOM markers for what is currently in view
+        syncMarkers() {
+            const view = map.getBounds().pad(0.2);
+            const visible = [];
+            for (let i = 0; i < this.points.length; i++) {
+                const p = this.points[i];
+                if (view.contains([p.lat, p.lng])) {
+                    visible.push(i);
+                    if (visible.length > MAX_DOM_MARKERS) break;
+                }
+            }
+            const wanted = new Map();
+            if (visible.length <= MAX_DOM_MARKERS) {
+                for (const i of visible) {
+                    const point = this.points[i];
+                    let marker = this.markers.get(point);
+                    if (!marker) {
+                        marker = L.marker([point.lat, point.lng], {
+                            icon: numberedIcon(i + 1, this.color),
+                            draggable: true
+                        });
+                        marker.point = point;
+                        marker.number = i + 1;
+                        marker.on('dragend', this.onDragEnd);
+                        this.markerGroup.addLayer(marker);
+                    } else if (marker.number !== i + 1) {
+                        marker.setIcon(numberedIcon(i + 1, this.color));
+                        marker.number = i + 1;
+                    }
+                    wanted.set(point, marker);
+                }
+            }
+            for (const [point, marker] of this.markers) {
+                if (!wanted.has(point)) this.markerGroup.removeLayer(marker);
+            }
+            this.markers = wanted;
+        }
+    }
+
+    window.waypointLayer = new PointLayer(
+        'waypoint', 'blue', L.polyline([], { color: 'blue', renderer: canvas }),
+        idx => openWaypointEditor(idx));
+    window.geofenceLayer = new PointLayer(
+        'fence', 'red', L.polygon([], { color: 'red', renderer: canvas }),
+        idx => openGeofenceEditor(idx));
+    window.rallyLayer = new PointLayer(
+        'rally', 'green', null,
+        idx => openRallyEditor(idx));
+
+    map.on('moveend', () => {
+        waypointLayer.syncMarkers();
+        geofenceLayer.syncMarkers();
+        rallyLayer.syncMarkers();
+        reportView();
+    });
+
+    // the visible area, for "download this area" in the Config tab
+    function reportView() {
+        if (!window.bridge) return;
+        const b = map.getBounds();
+        window.bridge.viewChanged(b.getSouth(), b.getWest(), b.getNorth(), b.getEast(), map.getZoom());
+    }
+
+    // ─── Waypoint functions ────────────────────────────────────────────────
+    window.addWaypoint = (lat, lng, alt = 15) => waypointLayer.add(lat, lng, alt);
+    window.clearWaypoints = () => waypointLayer.clear();
+    window.getWaypoints = () => waypointLayer.rows(true);
+    window.setWaypoints = arr => withoutNotify(() => waypointLayer.set(arr));
 
     // ─── Waypoint Editor ─────────────────────────────────────────────────────
     window.openWaypointEditor = idx => {
-        const wp = window.waypoints[idx];
+        const wp = waypointLayer.points[idx];
         const html = `
         <div style="
             background: #1a1d21;
@@ -227,7 +386,7 @@ window.onload = function () {
         autoClose:    false,
         offset:       [0, -30]
         })
-        .setLatLng(window.waypointMarkers[idx].getLatLng())
+        .setLatLng([wp.lat, wp.lng])
         .setContent(html)
         .openOn(map);
     };
@@ -236,76 +395,25 @@ window.onload = function () {
         const lat = parseFloat(document.getElementById(`wp-lat-${idx}`).value);
         const lng = parseFloat(document.getElementById(`wp-lng-${idx}`).value);
         const alt = parseFloat(document.getElementById(`wp-alt-${idx}`).value) || 0;
-        window.waypoints[idx] = { lat, lng, alt };
-        window.waypointMarkers[idx].setLatLng([lat, lng]);
         map.closePopup();
-        refreshPolyline();
+        waypointLayer.move(idx, lat, lng, alt);
     };
 
     window.deleteWaypoint = idx => {
-        map.removeLayer(window.waypointMarkers[idx]);
-        window.waypointMarkers.splice(idx, 1);
-        window.waypoints.splice(idx, 1);
-        // Renumber & rebind
-        window.waypointMarkers.forEach((m, i) => {
-            m.setIcon(numberedIcon(i + 1, 'blue'));
-            m.off('click').off('dragend');
-            m.on('click', () => openWaypointEditor(i));
-            m.on('dragend', e => {
-                const p = e.target.getLatLng();
-                window.waypoints[i].lat = p.lat;
-                window.waypoints[i].lng = p.lng;
-                map.closePopup();
-                refreshPolyline();
-            });
-        });
         map.closePopup();
-        refreshPolyline();
+        waypointLayer.remove(idx);
     };
 
     // ─── Geofence functions ────────────────────────────────────────────────
-    window.addGeofencePoint = (lat, lng) => {
-        const idx = window.geofencePoints.length;
-        window.geofencePoints.push([lat, lng]);
-
-        const marker = L.marker([lat, lng], {
-            icon: numberedIcon(idx + 1, 'red'),
-            draggable: true
-        }).addTo(map);
-
-        // Drag to update and redraw
-        marker.on('dragend', e => {
-            const p = e.target.getLatLng();
-            window.geofencePoints[idx] = [p.lat, p.lng];
-            map.closePopup();
-            refreshGeofence();
-        });
-
-        // Click to delete/edit
-        marker.on('click', () => openGeofenceEditor(idx));
-
-        window.geofenceMarkers.push(marker);
-        refreshGeofence();
-    };
-
-    window.clearGeofence = () => {
-        window.geofenceMarkers.forEach(m => map.removeLayer(m));
-        window.geofenceMarkers = [];
-        window.geofencePoints = [];
-        window.geofencePolyline.setLatLngs([]);
-    };
-
-    window.getGeofence = () => window.geofencePoints;
-
-    window.setGeofence = arr => {
-        window.clearGeofence();
-        arr.forEach(([lat, lng]) => window.addGeofencePoint(lat, lng));
-    };
+    window.addGeofencePoint = (lat, lng) => geofenceLayer.add(lat, lng);
+    window.clearGeofence = () => geofenceLayer.clear();
+    window.getGeofence = () => geofenceLayer.rows(false);
+    window.setGeofence = arr => withoutNotify(() => geofenceLayer.set(arr));
 
 
     // ─── Geofence Editor ───────────────────────────────────────────────────
     window.openGeofenceEditor = idx => {
-        const [lat, lng] = window.geofencePoints[idx];
+        const { lat, lng } = geofenceLayer.points[idx];
         const html = `
         <div style="
             background: #1a1d21;
@@ -392,7 +500,7 @@ window.onload = function () {
         autoClose:    false,
         offset:       [0, -30]
         })
-        .setLatLng(window.geofenceMarkers[idx].getLatLng())
+        .setLatLng([lat, lng])
         .setContent(html)
         .openOn(map);
     };
@@ -401,69 +509,24 @@ window.onload = function () {
     window.saveGeofencePoint = idx => {
         const lat = parseFloat(document.getElementById(`gf-lat-${idx}`).value);
         const lng = parseFloat(document.getElementById(`gf-lng-${idx}`).value);
-        window.geofencePoints[idx] = [lat, lng];
-        window.geofenceMarkers[idx].setLatLng([lat, lng]);
         map.closePopup();
-        refreshGeofence();
+        geofenceLayer.move(idx, lat, lng);
     };
 
     window.deleteGeofencePoint = idx => {
-        map.removeLayer(window.geofenceMarkers[idx]);
-        window.geofenceMarkers.splice(idx, 1);
-        window.geofencePoints.splice(idx, 1);
-        // Renumber & rebind
-        window.geofenceMarkers.forEach((m, i) => {
-            m.setIcon(numberedIcon(i + 1, 'red'));
-            m.off('click').off('dragend');
-            m.on('click', () => openGeofenceEditor(i));
-            m.on('dragend', e => {
-                const p = e.target.getLatLng();
-                window.geofencePoints[i] = [p.lat, p.lng];
-                map.closePopup();
-                refreshGeofence();
-            });
-        });
         map.closePopup();
-        refreshGeofence();
+        geofenceLayer.remove(idx);
     };
 
     // ─── Rally‐point functions ──────────────────────────────────────────────
-    window.addRallyPoint = (lat, lng) => {
-        const idx = window.rallyPoints.length;
-        window.rallyPoints.push([lat, lng]);
-
-        const marker = L.marker([lat, lng], {
-            icon: numberedIcon(idx + 1, 'green'),
-            draggable: true
-        }).addTo(map);
-
-        marker.on('dragend', e => {
-            const p = e.target.getLatLng();
-            window.rallyPoints[idx] = [p.lat, p.lng];
-            map.closePopup();
-        });
-
-        marker.on('click', () => openRallyEditor(idx));
-
-        window.rallyMarkers.push(marker);
-    };
-
-    window.clearRallyPoints = () => {
-        window.rallyMarkers.forEach(m => map.removeLayer(m));
-        window.rallyMarkers = [];
-        window.rallyPoints = [];
-    };
-
-    window.getRallyPoints = () => window.rallyPoints;
-
-    window.setRally = arr => {
-        window.clearRallyPoints();
-        arr.forEach(([lat, lng]) => window.addRallyPoint(lat, lng));
-    };
+    window.addRallyPoint = (lat, lng) => rallyLayer.add(lat, lng);
+    window.clearRallyPoints = () => rallyLayer.clear();
+    window.getRallyPoints = () => rallyLayer.rows(false);
+    window.setRally = arr => withoutNotify(() => rallyLayer.set(arr));
 
     // ─── Rally Editor ──────────────────────────────────────────────────────
     window.openRallyEditor = idx => {
-        const [lat, lng] = window.rallyPoints[idx];
+        const { lat, lng } = rallyLayer.points[idx];
         const html = `
         <div style="
             background: #1a1d21;
@@ -550,7 +613,7 @@ window.onload = function () {
         autoClose:    false,
         offset:       [0, -30]
         })
-        .setLatLng(window.rallyMarkers[idx].getLatLng())
+        .setLatLng([lat, lng])
         .setContent(html)
         .openOn(map);
     };
@@ -558,26 +621,13 @@ window.onload = function () {
     window.saveRallyPoint = idx => {
         const lat = parseFloat(document.getElementById(`ry-lat-${idx}`).value);
         const lng = parseFloat(document.getElementById(`ry-lng-${idx}`).value);
-        window.rallyPoints[idx] = [lat, lng];
-        window.rallyMarkers[idx].setLatLng([lat, lng]);
         map.closePopup();
+        rallyLayer.move(idx, lat, lng);
     };
 
     window.deleteRallyPoint = idx => {
-        map.removeLayer(window.rallyMarkers[idx]);
-        window.rallyMarkers.splice(idx, 1);
-        window.rallyPoints.splice(idx, 1);
-        window.rallyMarkers.forEach((m, i) => {
-            m.setIcon(numberedIcon(i + 1, 'green'));
-            m.off('click').off('dragend');
-            m.on('click', () => openRallyEditor(i));
-            m.on('dragend', e => {
-                const p = e.target.getLatLng();
-                window.rallyPoints[i] = [p.lat, p.lng];
-                map.closePopup();
-            });
-        });
         map.closePopup();
+        rallyLayer.remove(idx);
     };
 
     // ─── Map click: choose which list to add to ───────────────────────────
@@ -587,5 +637,36 @@ window.onload = function () {
         else                                window.addWaypoint(e.latlng.lat, e.latlng.lng);
     });
 
+    // ─── Python bridge (QWebChannel) ──────────────────────────────────────
+    // Python pushes structured updates through signals instead of evaluating
+    // script strings; telemetry arrives as batches of changed fields only.
+    const telemetry = {};
+    if (typeof QWebChannel !== 'undefined' && window.qt && qt.webChannelTransport) {
+        new QWebChannel(qt.webChannelTransport, channel => {
+            const bridge = channel.objects.bridge;
+            window.bridge = bridge;
+
+            bridge.telemetryChanged.connect(delta => {
+                Object.assign(telemetry, delta);
+                if ('lat' in delta || 'lon' in delta) {
+                    window.updateDroneMarker(telemetry.lat, telemetry.lon);
+                }
+            });
+            bridge.missionLoaded.connect((wps, fence, rally) => {
+                window.setWaypoints(wps);
+                window.setGeofence(fence);
+                window.setRally(rally);
+            });
+            bridge.tileSourceChanged.connect(url => window.setTileSource(url));
+            bridge.vehiclesChanged.connect(positions => window.setVehicles(positions));
+
+            bridge.mapReady();
+            reportView();
+            console.log("Python bridge connected.");
+        });
+    } else {
+        console.log("QWebChannel not available; running without the Python bridge.");
+    }
+
     console.log("Map and all JS interfaces initialized.");
 };
@@ -1,121 +1,457 @@
-import threading, queue, time
+import threading, time, math
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED
+from concurrent.futures import wait as wait_futures
 from pymavlink import mavutil
-from src.utils.connection_utils import get_waypoint_command_type
+from src.utils.connection_utils import get_waypoint_command_type, decode_param_id
+from src.utils.message_bus import MessageBus
+from src.utils.correlator import Correlator
+from src.vehicle import Vehicle, is_vehicle_heartbeat
+from src.telemetry_decoders import DECODERS
+from src.flight_recorder import FlightRecorder
+from src.replay import ReplayLink
+from src.link_io import LinkMux
+
+
+class TransferCancelled(RuntimeError):
+    """Raised when a mission transfer is aborted through its cancel Event."""
+
 
 class Connection:
-    def __init__(self):
-        self.telemetry = {}
-        # this is where all incoming messages land:
-        self._msg_queue = queue.Queue()
+    def __init__(self, record=True):
+        # every vehicle heard on the link, by (sysid, compid): each has its own
+        # telemetry store + history and parameter table (src/vehicle.py).
+        # One reader thread demultiplexes them all; commands and the
+        # telemetry / params / target_* properties follow the selected one.
+        self.vehicles = {}
+        self.vehicle = Vehicle(0, 0)   # placeholder until a vehicle is heard
+        self._vehicles_lock = threading.Lock()
+        # message type → decoder(telemetry, msg), see src/telemetry_decoders.py
+        self.decoders = dict(DECODERS)
+        # incoming messages are dispatched per type to whoever subscribed;
+        # types nobody asked for are dropped right after update_telemetry
+        self._bus = MessageBus()
+        # replies to our own requests are matched by (type, identifying fields)
+        self._correlator = Correlator(self._bus)
+        # each vehicle's parameter table is kept current from every
+        # PARAM_VALUE it sends (bulk download, reads, set echoes)
+        self._bus.add_handler('PARAM_VALUE', self._on_param_value)
+        # every received packet goes to a .tlog while connected (record=False
+        # turns that off)
+        self.recorder = FlightRecorder() if record else None
+        if self.recorder is not None:
+            self._bus.add_handler(MessageBus.ANY, self.recorder.record)
         self.master = None
-    
-    def connect_sitl(self, uri='udp:127.0.0.1:14550'):
-        """Open a MAVLink connection to SITL at `uri` and wait for heartbeat."""
+        self.last_heartbeat = None   # time.monotonic() of the last HEARTBEAT from any vehicle
+        self._listener_thread = None
+        self._stop_listener = False
+
+    # ─── vehicles ─────────────────────────────────────────────────────────
+
+    @property
+    def telemetry(self):
+        return self.vehicle.telemetry
+
+    @property
+    def history(self):
+        return self.vehicle.history
+
+    @property
+    def params(self):
+        return self.vehicle.params
+
+    @property
+    def target_system(self):
+        return self.vehicle.sysid
+
+    @property
+    def target_component(self):
+        return self.vehicle.compid
+
+    @property
+    def mav(self):
+        """MAVLink sender for the selected vehicle."""
+        return self.vehicle.mav or self.master.mav
+
+    def vehicle_list(self):
+        """Every vehicle heard so far, ordered by (sysid, compid)."""
+        with self._vehicles_lock:
+            return [self.vehicles[key] for key in sorted(self.vehicles)]
+
+    def select_vehicle(self, key):
+        """
+        Point commands, telemetry and params at the vehicle `key` =
+        (sysid, compid). Other vehicles keep being decoded.
+        """
+        with self._vehicles_lock:
+            vehicle = self.vehicles.get(tuple(key))
+        if vehicle is None:
+            raise KeyError(f"No vehicle {key}")
+        self.vehicle = vehicle
+
+    def _vehicle_for(self, msg):
+        """
+        The Vehicle `msg` came from, registering a new one on its first
+        autopilot HEARTBEAT (and selecting it if nothing is selected yet).
+        None for senders that aren't vehicles (other GCSs, cameras…).
+        """
+        key = (msg.get_srcSystem(), msg.get_srcComponent())
+        vehicle = self.vehicles.get(key)
+        if vehicle is None:
+            if msg.get_type() != 'HEARTBEAT' or not is_vehicle_heartbeat(msg):
+                return None
+            vehicle = Vehicle(*key)
+            with self._vehicles_lock:
+                self.vehicles[key] = vehicle
+            if not self.vehicle.sysid:
+                self.vehicle = vehicle
+        return vehicle
+
+    def connect_sitl(self, uri='udp:127.0.0.1:14550', heartbeat_timeout=None):
+        """
+        Open a MAVLink connection to SITL at `uri` and wait for heartbeat.
+        With `heartbeat_timeout` set, gives up after that many seconds and
+        raises TimeoutError instead of blocking forever. A path to a .tlog
+        file replays that recording instead (see ReplayLink).
+
+        Several links may be given separated by ';', with forwarding outputs
+        to another GCS prefixed "out:" (see src/link_io.py), e.g.
+        "udpin:0.0.0.0:14550; /dev/ttyUSB0,57600; out:udpout:10.0.0.2:14550".
+        They are all serviced by the one reader thread.
+        """
         if self.master is not None:
             return  # already connected
-        self.master = mavutil.mavlink_connection(uri)
-        self.master.wait_heartbeat()  # block until we see the heartbeat
+        if uri.lower().endswith('.tlog'):
+            master = ReplayLink(uri)
+        else:
+            master = LinkMux.from_spec(uri)
+        heartbeat = master.wait_heartbeat(timeout=heartbeat_timeout)
+        if heartbeat is None:
+            master.close()
+            raise TimeoutError(f"No heartbeat from {uri}")
+        # vehicles kept over a reconnect get a sender on the new socket
+        # once they are heard from again
+        for vehicle in self.vehicles.values():
+            vehicle.mav = vehicle.address = None
+        self._vehicle_for(heartbeat)
+        self.master = master
+        self.last_heartbeat = time.monotonic()
+        if self.recorder is not None and not self.is_replay:
+            self.recorder.start()  # no-op if a reconnect continues the same log
         # start your background listener (fill self.telemetry, etc.)
+        self._stop_listener = False
         self._listener_thread = threading.Thread(target=self._message_loop, daemon=True)
         self._listener_thread.start()
 
-    def disconnect_sitl(self):
-        """Tear down the MAVLink connection cleanly."""
-        if self.master is None:
-            return
-        # Example: set a flag so that the listener thread will exit
-        self._stop_listener = True
-        if self._listener_thread is not None:
-            self._listener_thread.join(timeout=1.0)
-        try:
-            self.master.close()
-        except Exception as e:
-            print("Error closing MAVLink connection:", e)
-            pass
-        self.master = None
-        self.telemetry = {}
+    def disconnect_sitl(self, keep_telemetry=False):
+        """
+        Tear down the MAVLink connection cleanly. `keep_telemetry` leaves the
+        last known telemetry in place (used when the link is re-established).
+        """
+        if self.master is not None:
+            # set a flag so that the listener thread will exit
+            self._stop_listener = True
+            interrupt = getattr(self.master, 'interrupt', None)
+            if interrupt is not None:
+                interrupt()  # wake the reader now rather than at its read timeout
+            if self._listener_thread is not None:
+                self._listener_thread.join(timeout=1.0)
+            try:
+                self.master.close()
+            except Exception as e:
+                print("Error closing MAVLink connection:", e)
+            self.master = None
+        self.last_heartbeat = None
+        # a full disconnect clears the vehicles and closes the log even if
+        # the supervisor already dropped the link (keeping telemetry) while
+        # reconnecting
+        if not keep_telemetry:
+            with self._vehicles_lock:
+                self.vehicles.clear()
+            self.vehicle = Vehicle(0, 0)
+            if self.recorder is not None:
+                self.recorder.stop()
+
+    @property
+    def is_replay(self):
+        """True while the link is a recorded log being played back."""
+        return getattr(self.master, 'is_replay', False)
+
+    def heartbeat_age(self):
+        """
+        Seconds since any vehicle on the link sent a HEARTBEAT, or None if
+        not connected. This is the link's liveness: one vehicle of a swarm
+        going quiet shows up in its own Vehicle.heartbeat_age() instead.
+        """
+        if self.last_heartbeat is None:
+            return None
+        return time.monotonic() - self.last_heartbeat
 
     def _message_loop(self):
-        """ Continuously read from the MAVLink socket and enqueue messages. """
-        self._stop_listener = False
-        while not getattr(self, '_stop_listener', False):
-            msg = self.master.recv_match(blocking=True, timeout=1)
+        """ Continuously read from the MAVLink socket and dispatch messages. """
+        master = self.master
+        # per-vehicle senders only on a single link: with redundant inputs
+        # everything sent has to go out on all of them through LinkMux.write
+        bind_vehicles = len(getattr(master, 'inputs', (master,))) == 1
+        while not self._stop_listener:
+            try:
+                msg = master.recv_match(blocking=True, timeout=1)
+            except Exception as e:
+                if not self._stop_listener:
+                    print("MAVLink read failed:", e)
+                    time.sleep(0.1)
+                continue
             if not msg:
                 continue
-            # immediately update telemetry
-            self.update_telemetry(msg)
-            # then hand it off to anyone waiting
-            self._msg_queue.put(msg)
+            vehicle = self._vehicle_for(msg)
+            if vehicle is not None:
+                # a udpin link sends to every address it has heard from, so
+                # with several vehicles on the port each one gets a sender
+                # bound to the address its own packets come from
+                if bind_vehicles:
+                    # LinkMux: where on its udpin link the packet came from
+                    address = getattr(master, 'last_address', None)
+                    if address is not None and vehicle.address != address:
+                        vehicle.address = address
+                        vehicle.bind(master.last_link)
+                if msg.get_type() == 'HEARTBEAT':
+                    vehicle.last_heartbeat = self.last_heartbeat = time.monotonic()
+                # immediately update that vehicle's telemetry
+                self.update_telemetry(msg, vehicle)
+            # then hand it off to anyone subscribed to this type
+            self._bus.publish(msg)
 
-    def _wait_for(self, expected_type, condition=lambda m: True, timeout=None):
+    def _expect(self, expected_type, condition=None, maxlen=64):
         """
-        Pull messages off the shared queue until you get the one you want.
-        Everything else has already updated telemetry in the reader.
+        Subscribe to a reply (`expected_type` may also be a tuple of types).
+        Call this *before* sending the request so the answer can't slip past
+        while nobody is listening; use it as a context manager so the
+        subscription is released afterwards. Only messages from the selected
+        vehicle are delivered.
         """
-        while True:
-            try:
-                msg = self._msg_queue.get(timeout=timeout)
-            except queue.Empty:
-                raise TimeoutError(f"Timed out waiting for {expected_type}")
-            if msg.get_type() == expected_type and condition(msg):
-                return msg
-            # otherwise just drop it (telemetry is already updated)
+        target = self.target_system
+        if condition is None:
+            match = lambda m: m.get_srcSystem() == target
+        else:
+            match = lambda m: m.get_srcSystem() == target and condition(m)
+        return self._bus.subscribe(expected_type, match, maxlen)
 
-    def set_param(self, param_id, value,
-                  param_type=mavutil.mavlink.MAV_PARAM_TYPE_UINT16,
-                  timeout=5):
+    def set_param(self, param_id, value, param_type=None, timeout=5):
         """
         Set a vehicle parameter and wait for it to echo back.
-        Handles msg.param_id as either bytes or str.
-        Returns the new param_value.
+        `param_type` defaults to the type from the parameter table (REAL32 if
+        the parameter hasn't been seen yet). Returns the new param_value.
         """
-        # send the PARAM_SET
-        self.master.mav.param_set_send(
-            self.master.target_system,
-            self.master.target_component,
+        reply = self._send_param_set(param_id, value, param_type)
+        msg = self._correlator.wait(reply, timeout, param_id)
+        print(f"✓ {param_id} set to {msg.param_value}")
+        return msg.param_value
+
+    def _send_param_set(self, param_id, value, param_type=None):
+        """Send one PARAM_SET; returns the Future for its PARAM_VALUE echo."""
+        if param_type is None:
+            param_type = self.params.param_type(param_id, mavutil.mavlink.MAV_PARAM_TYPE_REAL32)
+        # register for the PARAM_VALUE echo before sending
+        reply = self._correlator.expect('PARAM_VALUE', param_id=param_id,
+                                        srcSystem=self.target_system)
+        self.mav.param_set_send(
+            self.target_system,
+            self.target_component,
             param_id.encode('ascii'),
             float(value),
             param_type
         )
-        # wait for the PARAM_VALUE ack
-        deadline = time.time() + timeout
-        while True:
-            if time.time() > deadline:
-                raise TimeoutError(f"Timed out waiting for {param_id}")
-            msg = self._wait_for('PARAM_VALUE', timeout=timeout)
-            # unify the incoming param_id
-            raw = msg.param_id
-            if isinstance(raw, (bytes, bytearray)):
-                name = raw.decode('ascii').rstrip('\x00')
-            else:
-                name = raw.rstrip('\x00')
-            if name == param_id:
-                print(f"✓ {name} set to {msg.param_value}")
-                return msg.param_value
+        return reply
+
+    def set_params(self, values, window=8, timeout=2.0, retries=3, progress=None):
+        """
+        Write many parameters at once (e.g. from load_param_file()).
+
+        Up to `window` PARAM_SETs are in flight; each echo is checked against
+        the requested value and only parameters that timed out or came back
+        different are re-sent, at most `retries` times. Once the whole
+        parameter table is known (sync_params), names missing from it are
+        reported as unknown without being sent. Returns {name: {'ok': bool, 'value': echoed value, 'error': str}}.
+        `progress(done, total)` is called as results come in.
+        """
+        queue = deque(values.items())
+        total = len(queue)
+        results = {}
+        in_flight = {}   # name → [future, sent at, retries so far, requested value]
+        started = time.monotonic()
+        # a few values seen from single reads don't make a table to check against
+        known = self.params if self.params.is_complete() else None
+
+        def finish(name, ok, value=None, error=""):
+            results[name] = {'ok': ok, 'value': value, 'error': error}
+            if progress is not None:
+                progress(len(results), total)
+
+        while queue or in_flight:
+            while queue and len(in_flight) < window:
+                name, value = queue.popleft()
+                if known is not None and name not in known:
+                    finish(name, False, error="unknown parameter")
+                    continue
+                in_flight[name] = [self._send_param_set(name, value), time.monotonic(), 0, value]
+            if not in_flight:
+                continue
+
+            oldest = min(sent for _, sent, _, _ in in_flight.values())
+            wait_futures([f for f, _, _, _ in in_flight.values()],
+                         timeout=max(0.0, oldest + timeout - time.monotonic()),
+                         return_when=FIRST_COMPLETED)
+
+            now = time.monotonic()
+            for name, entry in list(in_flight.items()):
+                fut, sent, tries, value = entry
+                if fut.done():
+                    echo = fut.result().param_value
+                    if math.isclose(echo, value, rel_tol=1e-6, abs_tol=1e-6):
+                        del in_flight[name]
+                        finish(name, True, echo)
+                        continue
+                    error = f"vehicle reports {echo:g}"
+                elif now - sent >= timeout:
+                    error = "no echo"
+                else:
+                    continue
+                # mismatch or timeout: retry this one only
+                fut.cancel()
+                if tries >= retries:
+                    del in_flight[name]
+                    finish(name, False, None if error == "no echo" else echo, error)
+                else:
+                    entry[:] = [self._send_param_set(name, value), now, tries + 1, value]
+
+        ok = sum(r['ok'] for r in results.values())
+        print(f"✓ Wrote {ok}/{total} parameters in {time.monotonic() - started:.2f}s")
+        for name, r in sorted(results.items()):
+            if not r['ok']:
+                print(f"  ✗ {name}: {r['error']}")
+        return results
 
     def get_param(self, param_id, timeout=5):
         """
         Request a vehicle parameter and return the PARAM_VALUE message.
         """
-        self.master.mav.param_request_read_send(
-            self.master.target_system,
-            self.master.target_component,
+        reply = self._correlator.expect('PARAM_VALUE', param_id=param_id,
+                                        srcSystem=self.target_system)
+        self.mav.param_request_read_send(
+            self.target_system,
+            self.target_component,
             param_id.encode('ascii'),
             -1
         )
-        deadline = time.time() + timeout
-        while True:
-            if time.time() > deadline:
-                raise TimeoutError(f"Timed out waiting for {param_id}")
-            msg = self._wait_for('PARAM_VALUE', timeout=timeout)
-            raw = msg.param_id
-            if isinstance(raw, (bytes, bytearray)):
-                name = raw.decode('ascii').rstrip('\x00')
-            else:
-                name = raw.rstrip('\x00')
-            if name == param_id:
-                return msg
+        return self._correlator.wait(reply, timeout, param_id)
     
+    def _on_param_value(self, msg):
+        vehicle = self.vehicles.get((msg.get_srcSystem(), msg.get_srcComponent()))
+        if vehicle is None:
+            return
+        vehicle.params.update(
+            decode_param_id(msg.param_id),
+            msg.param_value,
+            msg.param_type,
+            msg.param_index,
+            msg.param_count
+        )
+
+    def param_cache_key(self, timeout=2):
+        """
+        Identify this vehicle + firmware for the on-disk param cache, from
+        AUTOPILOT_VERSION (board uid, flight software version) and sysid.
+        """
+        reply = self._correlator.expect('AUTOPILOT_VERSION', srcSystem=self.target_system)
+        self.mav.command_long_send(
+            self.target_system,
+            self.target_component,
+            mavutil.mavlink.MAV_CMD_REQUEST_MESSAGE,
+            0,
+            mavutil.mavlink.MAVLINK_MSG_ID_AUTOPILOT_VERSION,
+            0, 0, 0, 0, 0, 0
+        )
+        key = f"sys{self.target_system}"
+        try:
+            ver = self._correlator.wait(reply, timeout, "AUTOPILOT_VERSION")
+        except TimeoutError:
+            return key + "_fwunknown"
+        if ver.uid:
+            key += f"_{ver.uid:016x}"
+        return key + f"_fw{ver.flight_sw_version:08x}"
+
+    def sync_params(self, progress=None, quiet=1.0, retries=3):
+        """
+        Fill self.params with the vehicle's whole parameter table.
+
+        The per-vehicle cache is loaded first so lookups work straight away;
+        then PARAM_REQUEST_LIST is sent and any indices still missing once the
+        stream goes `quiet` are re-requested one by one (up to `retries`
+        rounds). The refreshed table is saved back to the cache.
+        Returns the diff against the cached table (changed / added / removed).
+        `progress(received, total)` is called as values arrive.
+        """
+        key = self.param_cache_key()
+        before = self.params.snapshot() if self.params.load(key) else {}
+        print(f"→ Syncing parameters for {key} ({len(before)} cached)")
+
+        seen_idx, seen_names, count = set(), set(), None
+        with self._expect('PARAM_VALUE', maxlen=16384) as sub:
+            self.mav.param_request_list_send(
+                self.target_system,
+                self.target_component
+            )
+            for attempt in range(retries + 1):
+                # drain the stream until it goes quiet or we have everything
+                while count is None or len(seen_idx) < count:
+                    try:
+                        msg = sub.get(timeout=quiet)
+                    except TimeoutError:
+                        break
+                    count = msg.param_count
+                    seen_names.add(decode_param_id(msg.param_id))
+                    if 0 <= msg.param_index < count:
+                        seen_idx.add(msg.param_index)
+                    if progress is not None:
+                        progress(len(seen_idx), count)
+
+                if count is None:
+                    # not a single reply yet: ask for the list again
+                    self.mav.param_request_list_send(
+                        self.target_system,
+                        self.target_component
+                    )
+                    continue
+                missing = [i for i in range(count) if i not in seen_idx]
+                if not missing:
+                    break
+                if attempt < retries:
+                    print(f"  ↻ re-requesting {len(missing)} missing parameters")
+                    for i in missing:
+                        self.mav.param_request_read_send(
+                            self.target_system,
+                            self.target_component,
+                            b'',
+                            i
+                        )
+            else:
+                if count is None:
+                    raise TimeoutError("Timed out waiting for PARAM_VALUE")
+
+        missing = [] if count is None else [i for i in range(count) if i not in seen_idx]
+        if missing:
+            raise TimeoutError(f"{len(missing)} of {count} parameters never arrived")
+
+        self.params.retain(seen_names)
+        try:
+            self.params.save(key)
+        except OSError as e:
+            print("⚠️ Failed to save param cache:", e)
+        diff = self.params.diff(before)
+        print(f"✓ {count} parameters synced: {len(diff['changed'])} changed, "
+              f"{len(diff['added'])} added, {len(diff['removed'])} removed")
+        return diff
+
         # ——— RC override helper —————————————————————————————————————
     def override_rc(self, channel: int, pwm: int):
         """
@@ -127,63 +463,144 @@ class Connection:
         # prepare 8 channels, override only the one we want
         chans = [0]*8
         chans[channel-1] = pwm
-        self.master.mav.rc_channels_override_send(
-            self.master.target_system,
-            self.master.target_component,
+        self.mav.rc_channels_override_send(
+            self.target_system,
+            self.target_component,
             *chans
         )
 
-    def _send_items(self, items, mission_type):
+    def _send_items(self, items, mission_type, timeout=1.5, max_backoff=6.0, max_retries=10,
+                    progress=None, cancel=None):
+        """
+        Upload `items` as an event-driven state machine: serve whatever seq the
+        vehicle asks for (MISSION_REQUEST or MISSION_REQUEST_INT, duplicates
+        and out-of-order included) until it sends MISSION_ACK.
+
+        If the vehicle goes quiet for `timeout` seconds we retransmit the last
+        thing we sent (the MISSION_COUNT, or the last item), doubling the wait
+        up to `max_backoff`; after `max_retries` retransmissions in total the
+        upload fails. Returns a dict of transfer stats.
+
+        `progress(sent, total)` is called after every newly served seq, from
+        the calling thread. Setting the `cancel` Event aborts the transfer on
+        the vehicle side (MISSION_ACK with MAV_MISSION_OPERATION_CANCELLED)
+        and raises TransferCancelled; if it is already set, MISSION_COUNT is
+        never sent.
+        """
         count = len(items)
-        # tell vehicle how many items we will send
-        print(f"\n→ Sending {count} items of mission_type={mission_type}")
-        self.master.mav.mission_count_send(
-            self.master.target_system,
-            self.master.target_component,
+        if cancel is not None and cancel.is_set():
+            # cancelled before this list started (e.g. between mission and
+            # fence): don't open a transaction on the vehicle at all
+            raise TransferCancelled(f"Upload of mission_type={mission_type} cancelled before it started")
+        started = time.monotonic()
+        served = set()
+        duplicates = retries = 0
+        wait = timeout
+        resend = lambda: self._send_count(count, mission_type)
+
+        # subscribe before MISSION_COUNT goes out so the first request can't be missed
+        with self._expect(('MISSION_REQUEST', 'MISSION_REQUEST_INT', 'MISSION_ACK'),
+                          lambda m: m.mission_type == mission_type, maxlen=256) as sub:
+            # tell vehicle how many items we will send
+            print(f"\n→ Sending {count} items of mission_type={mission_type}")
+            resend()
+            deadline = time.monotonic() + wait
+            while True:
+                if cancel is not None and cancel.is_set():
+                    self._cancel_transfer(mission_type)
+                    raise TransferCancelled(
+                        f"Upload of mission_type={mission_type} cancelled "
+                        f"after {len(served)}/{count} items")
+                try:
+                    # wake up periodically so a cancel request is seen promptly
+                    msg = sub.get(timeout=min(max(0.0, deadline - time.monotonic()), 0.1))
+                except TimeoutError:
+                    if time.monotonic() < deadline:
+                        continue
+                    if retries >= max_retries:
+                        raise TimeoutError(
+                            f"Upload of mission_type={mission_type} stalled after "
+                            f"{len(served)}/{count} items and {retries} retries")
+                    retries += 1
+                    wait = min(wait * 2, max_backoff)
+                    print(f"  ↻ no response, retransmitting (retry {retries}/{max_retries})")
+                    resend()
+                    deadline = time.monotonic() + wait
+                    continue
+                wait = timeout
+                deadline = time.monotonic() + wait
+
+                if msg.get_type() == 'MISSION_ACK':
+                    if msg.type != mavutil.mavlink.MAV_MISSION_ACCEPTED:
+                        raise RuntimeError(f"Upload failed, ACK type={msg.type}")
+                    break
+
+                # MISSION_REQUEST / MISSION_REQUEST_INT: serve that seq
+                seq = msg.seq
+                if seq >= count:
+                    print(f"  ⚠ vehicle asked for seq={seq} of {count}, ignoring")
+                    continue
+                if seq in served:
+                    duplicates += 1
+                served.add(seq)
+                self._send_item(items[seq], mission_type)
+                resend = lambda itm=items[seq]: self._send_item(itm, mission_type)
+                print(f"    ▶ sent item seq={seq}")
+                if progress is not None:
+                    progress(len(served), count)
+
+        elapsed = time.monotonic() - started
+        stats = {
+            'items': count,
+            'seconds': elapsed,
+            'items_per_sec': count / elapsed if elapsed > 0 else 0.0,
+            'retries': retries,
+            'duplicates': duplicates,
+        }
+        print(f"✓ Upload of mission_type={mission_type} done: {count} items in "
+              f"{elapsed:.2f}s ({stats['items_per_sec']:.1f} items/s, "
+              f"{retries} retries, {duplicates} duplicate requests)\n")
+        return stats
+
+    def _cancel_transfer(self, mission_type):
+        """Tell the vehicle we're abandoning the current mission transfer."""
+        self.mav.mission_ack_send(
+            self.target_system,
+            self.target_component,
+            mavutil.mavlink.MAV_MISSION_OPERATION_CANCELLED,
+            mission_type
+        )
+
+    def _send_count(self, count, mission_type):
+        self.mav.mission_count_send(
+            self.target_system,
+            self.target_component,
             count,
             mission_type
         )
-        l = len(items)
-        # for each item wait for MISSION_REQUEST, then send it
-        for i, itm in enumerate(items):
-            print(f"  ● waiting for request seq={i}…")
-            # wait for the matching request
-            req = self._wait_for(
-                'MISSION_REQUEST',
-                condition=lambda m: m.seq == i and m.mission_type == mission_type
-            )
-            # send it
-            self.master.mav.mission_item_int_send(
-                self.master.target_system,
-                self.master.target_component,
-                itm['seq'],
-                itm['frame'],
-                itm['command'],
-                itm['current'],
-                itm['autocontinue'],
-                itm['param1'],
-                itm['param2'],
-                itm['param3'],
-                itm['param4'],
-                int(itm['x'] * 1e7),
-                int(itm['y'] * 1e7),
-                itm['z'],
-                mission_type
-            )
-            print(f"    ▶ sent item seq={i}")
-        # finally wait for ACK
-        print("  ● waiting for MISSION_ACK…")
-        ack = self._wait_for(
-            'MISSION_ACK',
-            condition=lambda m: m.mission_type == mission_type
+
+    def _send_item(self, itm, mission_type):
+        self.mav.mission_item_int_send(
+            self.target_system,
+            self.target_component,
+            itm['seq'],
+            itm['frame'],
+            itm['command'],
+            itm['current'],
+            itm['autocontinue'],
+            itm['param1'],
+            itm['param2'],
+            itm['param3'],
+            itm['param4'],
+            int(itm['x'] * 1e7),
+            int(itm['y'] * 1e7),
+            itm['z'],
+            mission_type
         )
-        if ack.type != mavutil.mavlink.MAV_MISSION_ACCEPTED:
-            raise RuntimeError(f"Upload failed, ACK type={ack.type}")
-        print(f"✓ Upload of mission_type={mission_type} done.\n")
 
-    def upload_mission(self, waypoints):
-        home_lat = self.telemetry.get('lat')
-        home_lon = self.telemetry.get('lon')
+    def upload_mission(self, waypoints, **kwargs):
+        tel = self.telemetry.snapshot()  # lat and lon from the same fix
+        home_lat, home_lon = tel.lat, tel.lon
         if home_lat is None or home_lon is None:
             raise RuntimeError("No home position known yet!")
         print(f"Home position: lat={home_lat:.6f}, lon={home_lon:.6f}")
@@ -217,10 +634,11 @@ class Connection:
                 'y': lon,
                 'z': z
             })
-        self._send_items(items, mavutil.mavlink.MAV_MISSION_TYPE_MISSION)
+        stats = self._send_items(items, mavutil.mavlink.MAV_MISSION_TYPE_MISSION, **kwargs)
         self.telemetry['total_mission_points'] = len(waypoints)
+        return stats
 
-    def upload_fence(self, fence_points):
+    def upload_fence(self, fence_points, **kwargs):
         items = []
         total = len(fence_points)
         for i, pt in enumerate(fence_points):
@@ -241,9 +659,9 @@ class Connection:
                 'z': pt.get('alt', 0)
             })
         print(f"Uploading {len(items)} geofence vertices…")
-        self._send_items(items, mavutil.mavlink.MAV_MISSION_TYPE_FENCE)
+        return self._send_items(items, mavutil.mavlink.MAV_MISSION_TYPE_FENCE, **kwargs)
 
-    def upload_rally(self, rally_points):
+    def upload_rally(self, rally_points, **kwargs):
         items = []
         for i, pt in enumerate(rally_points):
             items.append({
@@ -262,104 +680,148 @@ class Connection:
                 'z': pt.get('alt', 0)
             })
         print(f"Uploading {len(items)} rally points…")
-        self._send_items(items, mavutil.mavlink.MAV_MISSION_TYPE_RALLY)
+        return self._send_items(items, mavutil.mavlink.MAV_MISSION_TYPE_RALLY, **kwargs)
     
-    def _download_items(self, mission_type):
+    def _download_items(self, mission_type, window=8, item_timeout=1.0, retries=5):
         """
         Download all mission items of the given type and return as list of dicts.
+
+        Keeps up to `window` MISSION_REQUEST_INTs in flight and re-requests
+        only the seqs whose item hasn't arrived within `item_timeout` seconds,
+        giving up after `retries` re-requests of the same seq. window=1 is the
+        old one-at-a-time behaviour.
         """
         print(f"\n→ Requesting download of mission_type={mission_type}")
-        # ask for list
-        self.master.mav.mission_request_list_send(
-            self.master.target_system,
-            self.master.target_component,
+        corr = self._correlator
+        # ask for list (registering for the count first), retrying if it's lost
+        reply = corr.expect('MISSION_COUNT', mission_type=mission_type, srcSystem=self.target_system)
+        for attempt in range(retries + 1):
+            self.mav.mission_request_list_send(
+                self.target_system,
+                self.target_component,
+                mission_type
+            )
+            # wait for count
+            done, _ = wait_futures([reply], timeout=item_timeout)
+            if done:
+                break
+        else:
+            reply.cancel()
+            raise TimeoutError("Timed out waiting for MISSION_COUNT")
+        count = reply.result().count
+        print(f"  ← will receive {count} items")
+
+        started = time.monotonic()
+        items = [None] * count
+        in_flight = {}   # seq → [future, last request time, re-requests so far]
+        next_seq = 0
+        n_retries = 0
+        try:
+            while next_seq < count or in_flight:
+                # top the window up with fresh seqs
+                while next_seq < count and len(in_flight) < window:
+                    fut = corr.expect('MISSION_ITEM_INT', seq=next_seq, mission_type=mission_type,
+                                      srcSystem=self.target_system)
+                    self._request_item(next_seq, mission_type)
+                    in_flight[next_seq] = [fut, time.monotonic(), 0]
+                    next_seq += 1
+
+                # sleep until something arrives or the oldest request expires
+                oldest = min(sent for _, sent, _ in in_flight.values())
+                wait_futures([f for f, _, _ in in_flight.values()],
+                             timeout=max(0.0, oldest + item_timeout - time.monotonic()),
+                             return_when=FIRST_COMPLETED)
+
+                now = time.monotonic()
+                for seq, entry in list(in_flight.items()):
+                    fut, sent, tries = entry
+                    if fut.done():
+                        msg = fut.result()
+                        items[seq] = {
+                            'seq': msg.seq,
+                            'frame': msg.frame,
+                            'command': msg.command,
+                            'current': msg.current,
+                            'autocontinue': msg.autocontinue,
+                            'param1': msg.param1,
+                            'param2': msg.param2,
+                            'param3': msg.param3,
+                            'param4': msg.param4,
+                            'x': msg.x / 1e7,
+                            'y': msg.y / 1e7,
+                            'z': msg.z
+                        }
+                        del in_flight[seq]
+                        print(f"    ← got seq={seq}")
+                    elif now - sent >= item_timeout:
+                        # lost request or lost item: ask for this seq again
+                        if tries >= retries:
+                            raise TimeoutError(f"Timed out waiting for MISSION_ITEM_INT seq={seq}")
+                        print(f"    ↻ re-requesting seq={seq}")
+                        self._request_item(seq, mission_type)
+                        entry[1] = now
+                        entry[2] = tries + 1
+                        n_retries += 1
+        finally:
+            for fut, _, _ in in_flight.values():
+                fut.cancel()
+
+        # close the transaction on the vehicle side
+        self.mav.mission_ack_send(
+            self.target_system,
+            self.target_component,
+            mavutil.mavlink.MAV_MISSION_ACCEPTED,
             mission_type
         )
-        # wait for count
-        count_msg = self._wait_for(
-            'MISSION_COUNT',
-            condition=lambda m: m.mission_type == mission_type
+        elapsed = time.monotonic() - started
+        print(f"✓ Downloaded {count} items of mission_type={mission_type} "
+              f"in {elapsed:.2f}s ({n_retries} re-requests)")
+        return items
+
+    def _request_item(self, seq, mission_type):
+        self.mav.mission_request_int_send(
+            self.target_system,
+            self.target_component,
+            seq,
+            mission_type
         )
-        count = count_msg.count
-        print(f"  ← will receive {count} items")
 
-        items = []
-        for seq in range(count):
-            # request each seq
-            self.master.mav.mission_request_int_send(
-                self.master.target_system,
-                self.master.target_component,
-                seq,
-                mission_type
-            )
-            msg = self._wait_for(
-                'MISSION_ITEM_INT',
-                condition=lambda m: m.seq == seq and m.mission_type == mission_type
-            )
-            items.append({
-                'seq': msg.seq,
-                'frame': msg.frame,
-                'command': msg.command,
-                'current': msg.current,
-                'autocontinue': msg.autocontinue,
-                'param1': msg.param1,
-                'param2': msg.param2,
-                'param3': msg.param3,
-                'param4': msg.param4,
-                'x': msg.x / 1e7,
-                'y': msg.y / 1e7,
-                'z': msg.z
-            })
-            print(f"    ← got seq={seq}")
-        return items
+    def download_plan(self, **kwargs):
+        """
+        Download the mission, fence and rally lists concurrently. Replies are
+        told apart by mission_type, so the three transfers don't interfere.
+        Returns (mission, fence, rally) item lists.
+        """
+        types = (
+            mavutil.mavlink.MAV_MISSION_TYPE_MISSION,
+            mavutil.mavlink.MAV_MISSION_TYPE_FENCE,
+            mavutil.mavlink.MAV_MISSION_TYPE_RALLY,
+        )
+        with ThreadPoolExecutor(max_workers=len(types)) as pool:
+            jobs = [pool.submit(self._download_items, t, **kwargs) for t in types]
+            return tuple(job.result() for job in jobs)
+
+    def add_decoder(self, msg_type, decoder):
+        """
+        Decode `msg_type` into telemetry with `decoder(telemetry, msg)`,
+        replacing any built-in decoder for that type.
+        """
+        self.decoders[msg_type] = decoder
 
-    def update_telemetry(self, msg):
-        m = msg.get_type()
-        if m == 'HEARTBEAT':
-            self.telemetry['mode'] = mavutil.mode_string_v10(msg)
-            armed = bool(msg.base_mode & mavutil.mavlink.MAV_MODE_FLAG_SAFETY_ARMED)
-            self.telemetry['armed'] = armed
-            # print(f"[TELEM] HEARTBEAT mode={msg.base_mode}, autopilot={msg.autopilot}")
-        elif m == 'ATTITUDE':
-            self.telemetry['roll'] = msg.roll
-            self.telemetry['pitch'] = msg.pitch
-            self.telemetry['yaw'] = msg.yaw
-            # print(f"[TELEM] ATTITUDE roll={msg.roll:.2f}, pitch={msg.pitch:.2f}, yaw={msg.yaw:.2f}")
-        elif m == 'GLOBAL_POSITION_INT':
-            self.telemetry['lat'] = msg.lat / 1e7
-            self.telemetry['lon'] = msg.lon / 1e7
-            self.telemetry['alt'] = msg.relative_alt / 1000.0
-            self.telemetry['heading'] = msg.hdg / 100.0 if msg.hdg != 65535 else 0
-            
-            # print(f"[TELEM] POS   lat={self.telemetry['lat']:.6f}, lon={self.telemetry['lon']:.6f}, rel-alt={self.telemetry['alt']:.2f}m, headin={self.telemetry['heading']}")
-        elif m == 'VFR_HUD':
-            # ground speed (m/s), climb rate (m/s), throttle (%)
-            self.telemetry['groundspeed'] = msg.groundspeed
-            self.telemetry['climb_rate'] = msg.climb
-            self.telemetry['throttle'] = msg.throttle
-
-        elif m == 'BATTERY_STATUS':
-            volt = msg.voltages[0] / 1000.0 if msg.voltages and msg.voltages[0] > 0 else None
-            self.telemetry['battery_voltage'] = volt
-            self.telemetry['battery_remaining'] = msg.battery_remaining if msg.battery_remaining > -1 else None
-            # print(f"[TELEM] BATT  volt={self.telemetry['battery_voltage']}V, curr={self.telemetry['battery_current']}A, left={self.telemetry['battery_remaining']}%")
-        
-        elif m == 'GPS_RAW_INT':
-            self.telemetry['gps_fix_type'] = msg.fix_type
-            self.telemetry['gps_satellites_visible'] = msg.satellites_visible
-            # print(f"[TELEM] GPS   fix={msg.fix_type}, sats={msg.satellites_visible}")
-        elif m == 'MISSION_CURRENT':
-            self.telemetry['current_mission_point'] = msg.seq
-            # print(f'Current mission point {self.telemetry["current_mission_point"]}')
+    def update_telemetry(self, msg, vehicle=None):
+        """Decode `msg` into `vehicle`'s telemetry (the selected vehicle's by default)."""
+        decode = self.decoders.get(msg.get_type())
+        if decode is not None:
+            decode((vehicle or self.vehicle).telemetry, msg)
 
     def arm(self):
         """
         Arm the vehicle (param1=1) and wait for motors to confirm armed.
         """
         # send arm command
-        self.master.mav.command_long_send(
-            self.master.target_system,
-            self.master.target_component,
+        self.mav.command_long_send(
+            self.target_system,
+            self.target_component,
             mavutil.mavlink.MAV_CMD_COMPONENT_ARM_DISARM,
             0,
             1,  # param1=1 → arm
@@ -372,9 +834,9 @@ class Connection:
         """
         Disarm the vehicle (param1=0) and wait for motors to confirm disarmed.
         """
-        self.master.mav.command_long_send(
-            self.master.target_system,
-            self.master.target_component,
+        self.mav.command_long_send(
+            self.target_system,
+            self.target_component,
             mavutil.mavlink.MAV_CMD_COMPONENT_ARM_DISARM,
             0,
             0,  # param1=0 → disarm
@@ -383,14 +845,14 @@ class Connection:
         print("Disarming…")
 
     def takeoff(self, alt = 50):
-        lat = self.telemetry.get('lat')
-        lon = self.telemetry.get('lon')
+        tel = self.telemetry.snapshot()
+        lat, lon = tel.lat, tel.lon
         if lat is None or lon is None:
             raise RuntimeError("No GPS fix yet!")
 
-        self.master.mav.command_long_send(
-            self.master.target_system,
-            self.master.target_component,
+        self.mav.command_long_send(
+            self.target_system,
+            self.target_component,
             mavutil.mavlink.MAV_CMD_NAV_TAKEOFF,
             0,        # confirmation
             0, 0, 0, 0,  # param1–4 unused (min pitch, empty, empty, yaw)
@@ -416,8 +878,8 @@ class Connection:
 
         print(f"Setting mode → {mode} ({mode_id})…")
         # send the SET_MODE message
-        self.master.mav.set_mode_send(
-            self.master.target_system,
+        self.mav.set_mode_send(
+            self.target_system,
             mavutil.mavlink.MAV_MODE_FLAG_CUSTOM_MODE_ENABLED,
             mode_id
         )
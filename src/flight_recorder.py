@@ -0,0 +1,109 @@
+import os
+import queue
+import struct
+import threading
+import time
+
+# where .tlog files are written (next to map_sources.json)
+LOG_DIR = "logs"
+
+_STAMP = struct.Struct('>Q')  # tlog record header: receive time, µs since the epoch
+
+
+class FlightRecorder:
+    """
+    Records every received MAVLink message to a .tlog file, the format
+    Mission Planner / MAVProxy / pymavlink read: each record is the 8-byte
+    big-endian receive time in microseconds followed by the raw packet.
+
+    record() runs on the reader thread and only stamps the packet and
+    drops it into a bounded queue; it never blocks. If the disk falls
+    behind and the queue fills, packets are counted in `dropped` rather
+    than stalling the receive loop. A writer thread drains the queue in
+    batches into a large buffered file and flushes at most once per
+    `flush_interval`.
+    """
+
+    def __init__(self, directory=LOG_DIR, maxsize=20000, flush_interval=1.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.path = None
+        self.recorded = 0
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize)
+        self._thread = None
+
+    def is_recording(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, path=None):
+        """Open `path` (default: a timestamped file in `directory`) and start writing."""
+        if self.is_recording():
+            return
+        if path is None:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, time.strftime("%Y-%m-%d_%H-%M-%S") + ".tlog")
+        self.path = path
+        self.recorded = self.dropped = 0
+        f = open(path, "ab", buffering=1 << 20)
+        self._thread = threading.Thread(target=self._write_loop, args=(f,), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Write out whatever is queued, close the file and stop the writer."""
+        if not self.is_recording():
+            return
+        self._queue.put(None)  # may wait briefly for room; never called from the reader
+        self._thread.join()
+        self._thread = None
+
+    def record(self, msg):
+        """Queue `msg` for writing (reader thread; non-blocking)."""
+        if self._thread is None:
+            return
+        buf = msg.get_msgbuf()
+        if not buf:
+            return
+        try:
+            self._queue.put_nowait((int(time.time() * 1e6), buf))
+        except queue.Full:
+            self.dropped += 1
+
+    def _write_loop(self, f):
+        pack = _STAMP.pack
+        get = self._queue.get
+        get_nowait = self._queue.get_nowait
+        last_flush = time.monotonic()
+        try:
+            while True:
+                try:
+                    item = get(timeout=self.flush_interval)
+                except queue.Empty:
+                    item = ()
+                # gather everything already waiting into one write
+                chunk = bytearray()
+                count = 0
+                done = False
+                while item is not None:
+                    if item:
+                        stamp, buf = item
+                        chunk += pack(stamp)
+                        chunk += buf
+                        count += 1
+                    try:
+                        item = get_nowait()
+                    except queue.Empty:
+                        break
+                else:
+                    done = True
+                if chunk:
+                    f.write(chunk)
+                    self.recorded += count
+                now = time.monotonic()
+                if done or now - last_flush >= self.flush_interval:
+                    f.flush()
+                    last_flush = now
+                if done:
+                    return
+        finally:
+            f.close()
@@ -0,0 +1,290 @@
+import selectors
+import socket
+import time
+from collections import deque
+from pymavlink import mavutil
+
+# in a link spec, entries are separated by ';' (',' already means "device,baud"
+# for serial ports) and forwarding outputs are prefixed with OUTPUT_PREFIX, e.g.
+# "udpin:0.0.0.0:14550; /dev/ttyUSB0,57600; out:udpout:192.168.1.20:14550"
+LINK_SEPARATOR = ';'
+OUTPUT_PREFIX = 'out:'
+
+
+def parse_links(spec):
+    """Split a link spec into (input URIs, output URIs)."""
+    inputs, outputs = [], []
+    for part in spec.split(LINK_SEPARATOR):
+        part = part.strip()
+        if not part:
+            continue
+        if part.startswith(OUTPUT_PREFIX):
+            outputs.append(part[len(OUTPUT_PREFIX):].strip())
+        else:
+            inputs.append(part)
+    if not inputs:
+        raise ValueError(f"No input link in {spec!r}")
+    return inputs, outputs
+
+
+def _fileno(link):
+    """The link's current descriptor (a TCP link gets a new socket when it reconnects)."""
+    if isinstance(link, mavutil.mavtcp):
+        return link.port.fileno() if link.port is not None else -1
+    return link.fd
+
+
+class _Dedup:
+    """
+    Drops copies of a packet that arrive over more than one link. Each
+    sender's last `window` (seq, msgid) pairs are remembered; the window is
+    kept well under the 256-packet sequence wrap so a new packet is never
+    mistaken for an old one.
+    """
+
+    def __init__(self, window=64):
+        self.window = window
+        self._seen = {}   # (sysid, compid) → (set of keys, keys in arrival order)
+
+    def is_duplicate(self, msg):
+        source = (msg.get_srcSystem(), msg.get_srcComponent())
+        entry = self._seen.get(source)
+        if entry is None:
+            entry = self._seen[source] = (set(), deque())
+        keys, order = entry
+        key = (msg.get_seq(), msg.get_msgId())
+        if key in keys:
+            return True
+        keys.add(key)
+        order.append(key)
+        if len(order) > self.window:
+            keys.discard(order.popleft())
+        return False
+
+
+class LinkMux:
+    """
+    Several MAVLink links serviced by one selectors loop, behind the
+    interface Connection uses on a single mavutil link (recv_match,
+    wait_heartbeat, mav, target_system, close).
+
+    Inputs are the links vehicles are reached over (redundant radios, SITL
+    plus a companion computer…). Everything received on them is merged,
+    with copies of the same packet (same sender, seq and msgid) dropped, and
+    whatever we send goes out on all of them. Outputs are forwarding
+    links to another GCS: they get every packet received from the inputs,
+    and what they send is passed on to the inputs.
+
+    recv_match() sleeps in select() on all links at once, so no thread per
+    link is needed, and interrupt() wakes it straight away (through a
+    socket pair registered with the same selector) so a disconnect doesn't
+    wait out the read timeout.
+    """
+
+    def __init__(self, inputs, outputs=(), source_system=255, source_component=0, dedup_window=64):
+        self.source_system = source_system
+        self.source_component = source_component
+        self.inputs = []
+        self.outputs = []
+        self.target_system = 0
+        self.target_component = 0
+        self.last_link = None   # link the message last returned by recv_match arrived on
+        self.last_address = None  # UDP address it came from on a udpin link, else None
+        self.messages = {}      # type → latest message, for recv_match conditions
+        self.duplicates = 0     # packets dropped as copies from a redundant link
+        self._dedup = _Dedup(dedup_window) if len(inputs) > 1 else None
+        self._pending = deque()  # (msg, link, address) received but not yet returned
+        self._mav = None
+        self._interrupted = False
+        self._sel = selectors.DefaultSelector()
+        self._registered = {}    # link → descriptor it is registered under
+        self._polled = []        # links without a selectable descriptor
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self._sel.register(self._wake_r, selectors.EVENT_READ, None)
+        try:
+            for uri in inputs:
+                self._open(uri, self.inputs, False)
+            for uri in outputs:
+                self._open(uri, self.outputs, True)
+        except Exception:
+            self.close()
+            raise
+
+    @classmethod
+    def from_spec(cls, spec, **kwargs):
+        """A LinkMux for a spec string as taken by parse_links()."""
+        inputs, outputs = parse_links(spec)
+        return cls(inputs, outputs, **kwargs)
+
+    def _open(self, uri, links, is_output):
+        link = mavutil.mavlink_connection(
+            uri,
+            source_system=self.source_system,
+            source_component=self.source_component,
+            autoreconnect=True,
+        )
+        links.append(link)
+        self._watch(link, is_output)
+
+    def _watch(self, link, is_output):
+        """(Re-)register `link` with the selector under its current descriptor."""
+        old = self._registered.pop(link, None)
+        if old is not None:
+            self._sel.unregister(old)
+        fd = _fileno(link)
+        if fd is None:
+            if link not in self._polled:
+                self._polled.append(link)
+            return
+        if fd < 0:
+            return  # closed for good
+        self._sel.register(fd, selectors.EVENT_READ, (link, is_output))
+        self._registered[link] = fd
+
+    # ─── sending ──────────────────────────────────────────────────────────
+
+    @property
+    def mav(self):
+        # rebuilt if a link switched the dialect module to MAVLink 2
+        if not isinstance(self._mav, mavutil.mavlink.MAVLink):
+            self._mav = mavutil.mavlink.MAVLink(
+                self, srcSystem=self.source_system, srcComponent=self.source_component)
+        return self._mav
+
+    def write(self, buf):
+        """Send a packet on every input link."""
+        for link in self.inputs:
+            link.write(buf)
+
+    def mode_mapping(self):
+        link = self.last_link or self.inputs[0]
+        return link.mode_mapping()
+
+    # ─── receiving ────────────────────────────────────────────────────────
+
+    def _receive(self, link):
+        """
+        (msg, source address) for every complete packet `link` has buffered.
+        A udpin link serves many senders from one socket and mavudp doesn't
+        say who a packet came from, so its datagrams are read here and
+        parsed whole; other links give None for the address.
+        """
+        if not getattr(link, 'udp_server', False):
+            while True:
+                msg = link.recv_msg()
+                if msg is None:
+                    return
+                yield msg, None
+        while True:
+            try:
+                data, address = link.port.recvfrom(mavutil.UDP_MAX_PACKET_LEN)
+            except (BlockingIOError, InterruptedError):
+                return
+            # what mavudp.recv does, so link.write still reaches every sender
+            link.clients.add(address)
+            link.clients_last_alive[address] = time.time()
+            if link.first_byte:
+                link.auto_mavlink_version(data)
+            for msg in link.mav.parse_buffer(data) or ():
+                link.post_message(msg)
+                yield msg, address
+
+    def _read(self, link, is_output):
+        """Take every complete packet `link` has buffered."""
+        try:
+            for msg, address in self._receive(link):
+                if msg.get_type() == 'BAD_DATA':
+                    continue
+                buf = msg.get_msgbuf()
+                if is_output:
+                    # another GCS talking to the vehicles through us
+                    for out in self.inputs:
+                        out.write(buf)
+                    continue
+                if self._dedup is not None and self._dedup.is_duplicate(msg):
+                    self.duplicates += 1
+                    continue
+                for out in self.outputs:
+                    out.write(buf)
+                self._pending.append((msg, link, address))
+        except Exception as e:
+            print(f"Read from {link.address} failed:", e)
+        fd = _fileno(link)
+        if link in self._registered and self._registered[link] != fd:
+            self._watch(link, is_output)  # reconnected on a new socket, or gone
+
+    def _poll(self, timeout):
+        """Wait up to `timeout` seconds for traffic and read whatever arrived."""
+        if self._polled:
+            timeout = 0.05 if timeout is None else min(timeout, 0.05)
+        for key, _ in self._sel.select(timeout):
+            if key.data is None:
+                try:
+                    while self._wake_r.recv(64):
+                        pass
+                except BlockingIOError:
+                    pass
+                continue
+            self._read(*key.data)
+        for link in self._polled:
+            self._read(link, link in self.outputs)
+
+    def interrupt(self):
+        """Make a blocked recv_match() return None now (any thread)."""
+        self._interrupted = True
+        try:
+            self._wake_w.send(b'\0')
+        except OSError:
+            pass  # already pending, or closed
+
+    def recv_match(self, condition=None, type=None, blocking=False, timeout=None):
+        """
+        Like mavfile.recv_match: the next message of `type` (any if None)
+        for which `condition` holds, evaluated against `messages`, or None.
+        """
+        if isinstance(type, str):
+            type = (type,)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            while self._pending:
+                msg, link, address = self._pending.popleft()
+                if (msg.get_type() == 'HEARTBEAT' and self.target_system == 0
+                        and msg.type != mavutil.mavlink.MAV_TYPE_GCS):
+                    self.target_system = msg.get_srcSystem()
+                    self.target_component = msg.get_srcComponent()
+                self.messages[msg.get_type()] = msg
+                if type is not None and msg.get_type() not in type:
+                    continue
+                if mavutil.evaluate_condition(condition, self.messages):
+                    self.last_link = link
+                    self.last_address = address
+                    return msg
+            if self._interrupted:
+                self._interrupted = False
+                return None
+            if not blocking:
+                wait = 0
+            elif deadline is None:
+                wait = None
+            else:
+                wait = deadline - time.monotonic()
+                if wait <= 0:
+                    return None
+            self._poll(wait)
+            if not blocking and not self._pending:
+                return None
+
+    def wait_heartbeat(self, blocking=True, timeout=None):
+        return self.recv_match(type='HEARTBEAT', blocking=blocking, timeout=timeout)
+
+    def close(self):
+        for link in self.inputs + self.outputs:
+            try:
+                link.close()
+            except Exception:
+                pass
+        self._sel.close()
+        self._wake_r.close()
+        self._wake_w.close()
@@ -0,0 +1,94 @@
+import threading
+from PySide6.QtCore import QObject, Signal
+
+
+class LinkSupervisor(QObject):
+    """
+    Owns the Connection's link lifecycle on a background thread: connects
+    without blocking the GUI, watches the heartbeats on the link, and
+    reconnects with exponential backoff when no vehicle has been heard for
+    `heartbeat_timeout` (one vehicle of several going quiet is not a link
+    failure). Telemetry is kept across a reconnect so the HUD and map
+    don't blank out on a link flap.
+    """
+
+    # link states carried by state_changed
+    DISCONNECTED = 'disconnected'
+    CONNECTING   = 'connecting'
+    CONNECTED    = 'connected'
+    RECONNECTING = 'reconnecting'
+
+    # (state, human-readable detail) — emitted from the supervisor thread
+    state_changed = Signal(str, str)
+
+    def __init__(self, conn, parent=None,
+                 heartbeat_timeout=3.0, connect_timeout=5.0,
+                 backoff_initial=1.0, backoff_max=30.0):
+        super().__init__(parent)
+        self.conn = conn
+        self.heartbeat_timeout = heartbeat_timeout
+        self.connect_timeout = connect_timeout
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.state = self.DISCONNECTED
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self, uri):
+        """Begin (re)connecting to `uri` in the background. Returns immediately."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(uri, self._stop), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Ask the supervisor to disconnect; DISCONNECTED is emitted once it has."""
+        self._stop.set()
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _set_state(self, state, detail=""):
+        self.state = state
+        self.state_changed.emit(state, detail)
+
+    def _run(self, uri, stop):
+        backoff = self.backoff_initial
+        while not stop.is_set():
+            self._set_state(self.CONNECTING, uri)
+            try:
+                self.conn.connect_sitl(uri, heartbeat_timeout=self.connect_timeout)
+            except Exception as e:
+                self._set_state(self.RECONNECTING, f"{e}; retrying in {backoff:.0f}s")
+                if stop.wait(backoff):
+                    break
+                backoff = min(backoff * 2, self.backoff_max)
+                continue
+
+            backoff = self.backoff_initial
+            self._set_state(self.CONNECTED, uri)
+
+            # watch the heartbeat until it goes stale or we're told to stop;
+            # a paused or finished replay is quiet on purpose, so it isn't watched
+            while not stop.wait(0.5):
+                if self.conn.is_replay:
+                    continue
+                age = self.conn.heartbeat_age()
+                if age is None or age > self.heartbeat_timeout:
+                    break
+            if stop.is_set():
+                break
+
+            print(f"Link lost: no heartbeat for {self.heartbeat_timeout:.0f}s, reconnecting…")
+            self._set_state(self.RECONNECTING, f"no heartbeat for {self.heartbeat_timeout:.0f}s")
+            try:
+                self.conn.disconnect_sitl(keep_telemetry=True)
+            except Exception as e:
+                print("Error while dropping stale link:", e)
+
+        try:
+            self.conn.disconnect_sitl()
+        except Exception as e:
+            print("Error while disconnecting:", e)
+        self._set_state(self.DISCONNECTED)
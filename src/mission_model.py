@@ -0,0 +1,55 @@
+import threading
+
+# point lists kept in sync with map.js, by the kind name map.js uses
+KINDS = ('waypoint', 'fence', 'rally')
+
+
+class MissionModel:
+    """
+    Python-side copy of the plan being edited on the map. map.js reports
+    every add / move / delete through the bridge as it happens, so the model
+    is always current and an upload can start from it immediately.
+
+    Waypoints are {'lat', 'lon', 'alt'} dicts, fence and rally points
+    {'lat', 'lon'} — the shapes Connection.upload_* expect.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._points = {kind: [] for kind in KINDS}
+
+    @staticmethod
+    def _point(kind, lat, lon, alt=0):
+        if kind == 'waypoint':
+            return {'lat': lat, 'lon': lon, 'alt': alt}
+        return {'lat': lat, 'lon': lon}
+
+    def insert(self, kind, index, lat, lon, alt=0):
+        with self._lock:
+            self._points[kind].insert(index, self._point(kind, lat, lon, alt))
+
+    def move(self, kind, index, lat, lon, alt=0):
+        with self._lock:
+            self._points[kind][index] = self._point(kind, lat, lon, alt)
+
+    def remove(self, kind, index):
+        with self._lock:
+            del self._points[kind][index]
+
+    def clear(self, kind):
+        with self._lock:
+            self._points[kind] = []
+
+    def replace(self, kind, points):
+        """Replace a whole list from [lat, lon(, alt)] rows (e.g. a download)."""
+        with self._lock:
+            self._points[kind] = [self._point(kind, *p[:3]) for p in points]
+
+    def points(self, kind):
+        """A copy of one list, safe to hand to a worker thread."""
+        with self._lock:
+            return [dict(p) for p in self._points[kind]]
+
+    def snapshot(self):
+        """(waypoints, fence, rally) copies."""
+        return tuple(self.points(kind) for kind in KINDS)
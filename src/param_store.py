@@ -0,0 +1,182 @@
+import os
+import json
+import threading
+from pymavlink import mavutil
+
+# where per-vehicle parameter caches are kept (next to map_sources.json)
+CACHE_DIR = "param_cache"
+
+PARAM_TYPE_NAMES = {
+    mavutil.mavlink.MAV_PARAM_TYPE_UINT8:  'UINT8',
+    mavutil.mavlink.MAV_PARAM_TYPE_INT8:   'INT8',
+    mavutil.mavlink.MAV_PARAM_TYPE_UINT16: 'UINT16',
+    mavutil.mavlink.MAV_PARAM_TYPE_INT16:  'INT16',
+    mavutil.mavlink.MAV_PARAM_TYPE_UINT32: 'UINT32',
+    mavutil.mavlink.MAV_PARAM_TYPE_INT32:  'INT32',
+    mavutil.mavlink.MAV_PARAM_TYPE_UINT64: 'UINT64',
+    mavutil.mavlink.MAV_PARAM_TYPE_INT64:  'INT64',
+    mavutil.mavlink.MAV_PARAM_TYPE_REAL32: 'REAL32',
+    mavutil.mavlink.MAV_PARAM_TYPE_REAL64: 'REAL64',
+}
+
+
+def load_param_file(path):
+    """
+    Read a .param file into {name: value}. Accepts both the Mission Planner
+    ("NAME,VALUE") and MAVProxy ("NAME VALUE") layouts; '#' starts a comment.
+    """
+    values = {}
+    with open(path, "r") as f:
+        for lineno, line in enumerate(f, 1):
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            parts = line.replace(',', ' ').replace('\t', ' ').split()
+            if len(parts) < 2:
+                raise ValueError(f"{path}:{lineno}: expected NAME VALUE, got {line!r}")
+            try:
+                values[parts[0]] = float(parts[1])
+            except ValueError:
+                raise ValueError(f"{path}:{lineno}: value for {parts[0]} is not numeric")
+    return values
+
+
+class ParamStore:
+    """
+    In-memory copy of the vehicle's parameter table: name → (value, type,
+    index), plus the total count the vehicle reported so gaps can be found.
+    Fed from every PARAM_VALUE the reader sees; safe to read from any thread.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._params = {}    # name → [value, type, index]
+        self._by_index = {}  # index → name
+        self.count = None    # param_count as reported by the vehicle
+
+    def update(self, name, value, param_type, index=None, count=None):
+        with self._lock:
+            entry = self._params.get(name)
+            if entry is None:
+                entry = self._params[name] = [value, param_type, index]
+            else:
+                entry[0] = value
+                entry[1] = param_type
+            # PARAM_VALUE echoes of a PARAM_SET carry index 65535 / -1
+            if index is not None and 0 <= index < 65535:
+                entry[2] = index
+                self._by_index[index] = name
+            if count is not None and 0 < count < 65535:
+                self.count = count
+
+    def get(self, name, default=None):
+        """Current value of `name`, or `default` if we've never seen it."""
+        with self._lock:
+            entry = self._params.get(name)
+            return entry[0] if entry is not None else default
+
+    def param_type(self, name, default=None):
+        with self._lock:
+            entry = self._params.get(name)
+            return entry[1] if entry is not None else default
+
+    def is_complete(self):
+        """True once every index 0..count-1 has a value (a full sync or cache load)."""
+        with self._lock:
+            return self.count is not None and all(i in self._by_index for i in range(self.count))
+
+    def search(self, text=""):
+        """Sorted (name, value, type, index) rows whose name contains `text`."""
+        text = text.upper()
+        with self._lock:
+            return [(name, v, t, i) for name, (v, t, i) in sorted(self._params.items())
+                    if text in name]
+
+    def snapshot(self):
+        """Plain {name: value} copy, e.g. for diffing."""
+        with self._lock:
+            return {name: e[0] for name, e in self._params.items()}
+
+    def diff(self, before):
+        """Compare against an earlier snapshot(): changed / added / removed names."""
+        now = self.snapshot()
+        return {
+            'changed': {n: (before[n], v) for n, v in now.items() if n in before and before[n] != v},
+            'added':   sorted(n for n in now if n not in before),
+            'removed': sorted(n for n in before if n not in now),
+        }
+
+    def retain(self, names):
+        """Drop every parameter not in `names` (e.g. removed by a firmware update)."""
+        with self._lock:
+            for name in [n for n in self._params if n not in names]:
+                index = self._params.pop(name)[2]
+                if self._by_index.get(index) == name:
+                    del self._by_index[index]
+
+    def clear(self):
+        with self._lock:
+            self._params.clear()
+            self._by_index.clear()
+            self.count = None
+
+    def __len__(self):
+        with self._lock:
+            return len(self._params)
+
+    def __contains__(self, name):
+        with self._lock:
+            return name in self._params
+
+    # ─── On-disk cache ─────────────────────────────────────────────────────
+
+    @staticmethod
+    def cache_path(vehicle_key):
+        return os.path.join(CACHE_DIR, f"{vehicle_key}.json")
+
+    def save(self, vehicle_key):
+        """Persist the table to param_cache/<vehicle_key>.json."""
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with self._lock:
+            data = {'vehicle': vehicle_key, 'count': self.count, 'params': self._params}
+            text = json.dumps(data, indent=1, sort_keys=True)
+        tmp = self.cache_path(vehicle_key) + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(text)
+        os.replace(tmp, self.cache_path(vehicle_key))
+
+    def load(self, vehicle_key):
+        """
+        Fill the table from the cache; returns False if there is none. The
+        reader may be feeding PARAM_VALUEs in meanwhile: those are newer
+        than the cache and are kept, the cache only fills in the rest.
+        """
+        path = self.cache_path(vehicle_key)
+        if not os.path.exists(path):
+            return False
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"⚠️ Ignoring unreadable param cache {path}:", e)
+            return False
+        # built off to the side so the lock is only held for the merge
+        params, by_index = {}, {}
+        for name, (value, ptype, index) in data.get('params', {}).items():
+            params[name] = [value, ptype, index]
+            if index is not None and 0 <= index < 65535:
+                by_index[index] = name
+        with self._lock:
+            if not self._params:
+                self._params, self._by_index = params, by_index
+                self.count = data.get('count')
+                return True
+            for name, entry in params.items():
+                if name in self._params:
+                    continue
+                self._params[name] = entry
+                if entry[2] in by_index and entry[2] not in self._by_index:
+                    self._by_index[entry[2]] = name
+            if self.count is None:
+                self.count = data.get('count')
+        return True
@@ -0,0 +1,226 @@
+import struct
+import threading
+import time
+from pymavlink import mavutil
+from src.tlog_index import TlogIndex
+
+_STAMP = struct.Struct('>Q')  # tlog record header: receive time, µs since the epoch
+
+# bytes after the magic byte up to and including the message id
+_V1_HEADER = 5  # len, seq, sysid, compid, msgid
+_V2_HEADER = 9  # len, incompat, compat, seq, sysid, compid, msgid(3)
+
+
+def read_record(f):
+    """
+    The next (timestamp_us, packet) from an open .tlog file, or None at the
+    end (a record cut short by a crash counts as the end). Packets are
+    framed from their MAVLink header, so nothing is decoded here.
+    """
+    head = f.read(_STAMP.size + 1)
+    if len(head) < _STAMP.size + 1:
+        return None
+    stamp = _STAMP.unpack_from(head)[0]
+    magic = head[-1]
+    if magic == mavutil.mavlink.PROTOCOL_MARKER_V2:
+        header = f.read(_V2_HEADER)
+        if len(header) < _V2_HEADER:
+            return None
+        signed = header[1] & mavutil.mavlink.MAVLINK_IFLAG_SIGNED
+        rest = header[0] + 2 + (mavutil.mavlink.MAVLINK_SIGNATURE_BLOCK_LEN if signed else 0)
+    elif magic == mavutil.mavlink.PROTOCOL_MARKER_V1:
+        header = f.read(_V1_HEADER)
+        if len(header) < _V1_HEADER:
+            return None
+        rest = header[0] + 2
+    else:
+        raise ValueError(f"Not a MAVLink packet at offset {f.tell() - 1} (magic {magic:#04x})")
+    body = f.read(rest)
+    if len(body) < rest:
+        return None
+    return stamp, head[-1:] + header + body
+
+
+class _NullWriter:
+    """Swallows everything sent to a replayed vehicle."""
+
+    def write(self, buf):
+        pass
+
+
+class ReplayLink:
+    """
+    Plays a recorded .tlog back through the same interface Connection uses
+    on a live mavutil link (recv_match, wait_heartbeat, mav, target_system,
+    mode_mapping, close), so the reader loop, telemetry decoding, HUD and map run exactly
+    as they would against a vehicle. Anything sent to the vehicle is
+    discarded.
+
+    `speed` is a playback multiplier on the recorded timing (1.0 is real
+    time); None delivers messages as fast as they can be read, which makes
+    a replay a deterministic, repeatable load. pause(), resume(), seek()
+    and set_speed() may be called from any thread.
+    """
+
+    is_replay = True
+
+    def __init__(self, path, speed=1.0):
+        self.path = path
+        self.speed = speed
+        self.mav = mavutil.mavlink.MAVLink(_NullWriter(), srcSystem=255)
+        self.target_system = 0
+        self.target_component = 0
+        self.messages = {}     # type → latest replayed message, for recv_match conditions
+        self.position = None   # log time (s since the epoch) of the last message delivered
+        self.finished = False  # set once the end of the log is reached
+        self._f = open(path, "rb", buffering=1 << 16)
+        self._lock = threading.Lock()
+        self._paused = False
+        self._next = None      # (log time, msg) read ahead, not yet delivered
+        self._anchor = None    # (log time, monotonic time) that pacing is measured from
+        self._index = None     # TlogIndex, built on the first seek (False if that failed)
+        self._heartbeat = None # last replayed vehicle HEARTBEAT, for mode_mapping()
+
+    # ─── playback control ─────────────────────────────────────────────────
+
+    def pause(self):
+        with self._lock:
+            self._paused = True
+
+    def resume(self):
+        with self._lock:
+            self._paused = False
+            self._anchor = None  # restart the clock from the next message
+
+    def is_paused(self):
+        return self._paused
+
+    def set_speed(self, speed):
+        """Playback multiplier; None for as fast as possible."""
+        with self._lock:
+            self.speed = speed
+            self._anchor = None
+
+    def seek(self, log_time):
+        """
+        Continue playback from the first message at or after `log_time` (s
+        since the epoch). The first seek indexes the log (or loads the index
+        saved beside it); after that every seek is a direct jump.
+        """
+        with self._lock:
+            self._anchor = None
+            if self._next is not None and self.position is not None \
+                    and self.position <= log_time <= self._next[0]:
+                return  # the read-ahead message is already the right one
+            self._next = None
+            self.finished = False
+            if self._index is None:
+                try:
+                    self._index = TlogIndex(self.path)
+                except Exception as e:
+                    print("Can't index log, seeking by scanning:", e)
+                    self._index = False
+            if self._index is not False:
+                self._f.seek(self._index.offset_at(log_time))
+                self.position = log_time
+                return
+            if self.position is None or log_time < self.position:
+                self._f.seek(0)
+            while True:
+                pos = self._f.tell()
+                record = read_record(self._f)
+                if record is None:
+                    self.finished = True
+                    break
+                if record[0] / 1e6 >= log_time:
+                    self._f.seek(pos)
+                    break
+            self.position = log_time
+
+    # ─── mavutil-compatible reading ───────────────────────────────────────
+
+    def _read_next(self):
+        """Decode the next record into self._next (lock held)."""
+        while self._next is None:
+            record = read_record(self._f)
+            if record is None:
+                self.finished = True
+                return
+            stamp, packet = record
+            try:
+                msg = self.mav.decode(bytearray(packet))
+            except Exception:
+                continue  # unknown message id or bad CRC: skip it
+            msg._timestamp = stamp / 1e6
+            self._next = (msg._timestamp, msg)
+
+    def _take(self):
+        """
+        The next message if it is due, else how long to wait for it (lock
+        held). Returns (msg, None) or (None, delay).
+        """
+        if self._paused:
+            return None, 0.05
+        self._read_next()
+        if self._next is None:
+            return None, 0.05  # end of the log
+        log_time, msg = self._next
+        if self.speed:
+            now = time.monotonic()
+            if self._anchor is None:
+                self._anchor = (log_time, now)
+            due = self._anchor[1] + (log_time - self._anchor[0]) / self.speed
+            if due > now:
+                return None, due - now
+        self._next = None
+        self.position = log_time
+        self.messages[msg.get_type()] = msg
+        if msg.get_type() == 'HEARTBEAT' and msg.type != mavutil.mavlink.MAV_TYPE_GCS:
+            self._heartbeat = msg
+            if self.target_system == 0:
+                self.target_system = msg.get_srcSystem()
+                self.target_component = msg.get_srcComponent()
+        return msg, None
+
+    def recv_match(self, condition=None, type=None, blocking=False, timeout=None):
+        """
+        Like mavfile.recv_match: the next message of `type` (any if None)
+        for which `condition` holds, evaluated against `messages`, or None.
+        """
+        if isinstance(type, str):
+            type = (type,)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                msg, delay = self._take()
+            if msg is not None:
+                if (type is None or msg.get_type() in type) \
+                        and mavutil.evaluate_condition(condition, self.messages):
+                    return msg
+                continue
+            if not blocking:
+                return None
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                delay = min(delay, remaining)
+            time.sleep(min(delay, 0.1))  # short naps so pause/seek apply promptly
+
+    def mode_mapping(self):
+        """Mode name → number for the replayed vehicle, as mavfile.mode_mapping."""
+        heartbeat = self._heartbeat
+        if heartbeat is None:
+            return None
+        if heartbeat.autopilot == mavutil.mavlink.MAV_AUTOPILOT_PX4:
+            return mavutil.px4_map
+        return mavutil.mode_mapping_byname(heartbeat.type)
+
+    def wait_heartbeat(self, blocking=True, timeout=None):
+        return self.recv_match(type='HEARTBEAT', blocking=blocking, timeout=timeout)
+
+    def close(self):
+        with self._lock:
+            self._f.close()
+            if isinstance(self._index, TlogIndex):
+                self._index.close()
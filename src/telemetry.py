@@ -0,0 +1,164 @@
+import threading
+import time
+from src.utils.ring_buffer import RingBuffer
+
+# every field the telemetry store holds (units as shown in the HUD)
+FIELDS = (
+    'mode', 'armed',                                   # HEARTBEAT
+    'roll', 'pitch', 'yaw',                            # ATTITUDE, rad
+    'lat', 'lon', 'alt', 'heading',                    # GLOBAL_POSITION_INT, deg / m / deg
+    'groundspeed', 'climb_rate', 'throttle',           # VFR_HUD, m/s / m/s / %
+    'battery_voltage', 'battery_remaining',            # BATTERY_STATUS, V / %
+    'gps_fix_type', 'gps_satellites_visible',          # GPS_RAW_INT
+    'current_mission_point', 'total_mission_points',   # MISSION_CURRENT / upload
+    'sensors_present', 'sensors_health',               # SYS_STATUS, MAV_SYS_STATUS_SENSOR bits
+    'cpu_load', 'comm_drop_rate', 'battery_current',   # SYS_STATUS, % / % / A
+    'ekf_flags', 'ekf_velocity_variance',              # EKF_STATUS_REPORT
+    'ekf_pos_horiz_variance', 'ekf_pos_vert_variance', 'ekf_compass_variance',
+    'nav_bearing', 'target_bearing', 'wp_dist',        # NAV_CONTROLLER_OUTPUT, deg / deg / m
+    'alt_error', 'xtrack_error',                       # m / m
+    'home_lat', 'home_lon', 'home_alt',                # HOME_POSITION, deg / deg / m AMSL
+    'status_text', 'status_severity',                  # STATUSTEXT (latest)
+)
+_INDEX = {name: i for i, name in enumerate(FIELDS)}
+
+# numeric fields whose recent history is kept
+HISTORY_CHANNELS = (
+    'alt', 'groundspeed', 'climb_rate',
+    'battery_voltage', 'battery_remaining',
+    'roll', 'pitch', 'yaw',
+)
+
+
+class TelemetrySnapshot:
+    """
+    A consistent copy of the telemetry store at one instant: every field as
+    an attribute, plus when each was last received. Read-only by convention;
+    also answers get() / [] like the dict it replaces.
+    """
+    __slots__ = FIELDS + ('_stamps', 'taken_at')
+
+    def __init__(self, values, stamps, taken_at):
+        for name, value in zip(FIELDS, values):
+            setattr(self, name, value)
+        self._stamps = stamps
+        self.taken_at = taken_at
+
+    def get(self, name, default=None):
+        value = getattr(self, name, None) if name in _INDEX else None
+        return default if value is None else value
+
+    def __getitem__(self, name):
+        if name not in _INDEX:
+            raise KeyError(name)
+        return getattr(self, name)
+
+    def __contains__(self, name):
+        return name in _INDEX and self._stamps[_INDEX[name]] is not None
+
+    def age(self, name):
+        """Seconds between `name` being received and this snapshot, or None if never."""
+        stamp = self._stamps[_INDEX[name]]
+        return None if stamp is None else self.taken_at - stamp
+
+    def is_stale(self, name, max_age):
+        """True if `name` was never received or is older than `max_age` seconds."""
+        age = self.age(name)
+        return age is None or age > max_age
+
+
+class TelemetryStore:
+    """
+    Latest vehicle telemetry, written by the MAVLink reader thread and read
+    from the GUI. Each field carries the monotonic time it was last received,
+    so a value that stopped arriving can be told apart from one that never
+    did. update() writes a group of fields from one message atomically and
+    snapshot() returns them all as one consistent TelemetrySnapshot, so a
+    reader never sees lat from one GLOBAL_POSITION_INT and lon from the next.
+
+    Single-field access (get, [], []=) still works for existing callers.
+    With a TelemetryHistory attached, every update of one of its channels
+    is also appended there, with the same receive time.
+    """
+    __slots__ = ('_lock', '_values', '_stamps', 'history')
+
+    def __init__(self, history=None):
+        self._lock = threading.Lock()
+        self._values = [None] * len(FIELDS)
+        self._stamps = [None] * len(FIELDS)
+        self.history = history
+
+    def update(self, **fields):
+        """Set several fields at once, all stamped with the same receive time."""
+        now = time.monotonic()
+        indices = [(_INDEX[name], value) for name, value in fields.items()]
+        with self._lock:
+            for i, value in indices:
+                self._values[i] = value
+                self._stamps[i] = now
+        if self.history is not None:
+            self.history.record(fields, now)
+
+    def __setitem__(self, name, value):
+        self.update(**{name: value})
+
+    def get(self, name, default=None):
+        i = _INDEX.get(name)
+        if i is None:
+            return default
+        value = self._values[i]
+        return default if value is None else value
+
+    def __getitem__(self, name):
+        return self._values[_INDEX[name]]
+
+    def __contains__(self, name):
+        return name in _INDEX and self._stamps[_INDEX[name]] is not None
+
+    def snapshot(self):
+        with self._lock:
+            values = list(self._values)
+            stamps = list(self._stamps)
+        return TelemetrySnapshot(values, stamps, time.monotonic())
+
+    def age(self, name):
+        """Seconds since `name` was last received, or None if it never was."""
+        stamp = self._stamps[_INDEX[name]]
+        return None if stamp is None else time.monotonic() - stamp
+
+    def is_stale(self, name, max_age):
+        """True if `name` was never received or is older than `max_age` seconds."""
+        age = self.age(name)
+        return age is None or age > max_age
+
+    def clear(self):
+        with self._lock:
+            self._values = [None] * len(FIELDS)
+            self._stamps = [None] * len(FIELDS)
+        if self.history is not None:
+            self.history.clear()
+
+
+class TelemetryHistory:
+    """
+    One fixed-size RingBuffer per HISTORY_CHANNELS field, e.g.
+    `history['alt'].rate(5)` for the climb over the last five seconds or
+    `history['battery_voltage'].min(60)`. `capacity` samples are kept per
+    channel (10 minutes at the usual 10 Hz stream rate by default).
+    """
+
+    def __init__(self, capacity=6000, channels=HISTORY_CHANNELS):
+        self.channels = {name: RingBuffer(capacity) for name in channels}
+
+    def __getitem__(self, name):
+        return self.channels[name]
+
+    def record(self, fields, t):
+        for name, value in fields.items():
+            buf = self.channels.get(name)
+            if buf is not None and value is not None:
+                buf.append(value, t)
+
+    def clear(self):
+        for buf in self.channels.values():
+            buf.clear()
@@ -0,0 +1,116 @@
+from pymavlink import mavutil
+
+# message type → decoder(telemetry, msg); Connection.update_telemetry looks the
+# type up here with one dict access instead of walking an if/elif chain
+DECODERS = {}
+
+# unit conversions, shared with offline log analysis (src/tlog_index.py)
+DEGE7 = 1e7          # degE7 → deg
+MM_PER_M = 1000.0    # mm → m
+CDEG_PER_DEG = 100.0  # cdeg → deg
+HDG_UNKNOWN = 65535
+
+
+def decoder(*msg_types):
+    """Register the decorated function as the telemetry decoder for `msg_types`."""
+    def register(fn):
+        for msg_type in msg_types:
+            DECODERS[msg_type] = fn
+        return fn
+    return register
+
+
+@decoder('HEARTBEAT')
+def _heartbeat(tel, msg):
+    armed = bool(msg.base_mode & mavutil.mavlink.MAV_MODE_FLAG_SAFETY_ARMED)
+    tel.update(mode=mavutil.mode_string_v10(msg), armed=armed)
+
+
+@decoder('ATTITUDE')
+def _attitude(tel, msg):
+    tel.update(roll=msg.roll, pitch=msg.pitch, yaw=msg.yaw)
+
+
+@decoder('GLOBAL_POSITION_INT')
+def _global_position(tel, msg):
+    tel.update(
+        lat=msg.lat / DEGE7,
+        lon=msg.lon / DEGE7,
+        alt=msg.relative_alt / MM_PER_M,
+        heading=msg.hdg / CDEG_PER_DEG if msg.hdg != HDG_UNKNOWN else 0,
+    )
+
+
+@decoder('VFR_HUD')
+def _vfr_hud(tel, msg):
+    # ground speed (m/s), climb rate (m/s), throttle (%)
+    tel.update(groundspeed=msg.groundspeed, climb_rate=msg.climb, throttle=msg.throttle)
+
+
+@decoder('BATTERY_STATUS')
+def _battery_status(tel, msg):
+    volt = msg.voltages[0] / 1000.0 if msg.voltages and msg.voltages[0] > 0 else None
+    tel.update(
+        battery_voltage=volt,
+        battery_remaining=msg.battery_remaining if msg.battery_remaining > -1 else None,
+    )
+
+
+@decoder('GPS_RAW_INT')
+def _gps_raw(tel, msg):
+    tel.update(gps_fix_type=msg.fix_type, gps_satellites_visible=msg.satellites_visible)
+
+
+@decoder('MISSION_CURRENT')
+def _mission_current(tel, msg):
+    tel.update(current_mission_point=msg.seq)
+
+
+@decoder('SYS_STATUS')
+def _sys_status(tel, msg):
+    tel.update(
+        sensors_present=msg.onboard_control_sensors_present,
+        sensors_health=msg.onboard_control_sensors_health,
+        cpu_load=msg.load / 10.0,                  # ‰ → %
+        comm_drop_rate=msg.drop_rate_comm / 100.0,  # c% → %
+        battery_current=msg.current_battery / 100.0 if msg.current_battery >= 0 else None,
+    )
+
+
+@decoder('EKF_STATUS_REPORT')
+def _ekf_status(tel, msg):
+    tel.update(
+        ekf_flags=msg.flags,
+        ekf_velocity_variance=msg.velocity_variance,
+        ekf_pos_horiz_variance=msg.pos_horiz_variance,
+        ekf_pos_vert_variance=msg.pos_vert_variance,
+        ekf_compass_variance=msg.compass_variance,
+    )
+
+
+@decoder('NAV_CONTROLLER_OUTPUT')
+def _nav_controller(tel, msg):
+    tel.update(
+        nav_bearing=msg.nav_bearing,
+        target_bearing=msg.target_bearing,
+        wp_dist=msg.wp_dist,
+        alt_error=msg.alt_error,
+        xtrack_error=msg.xtrack_error,
+    )
+
+
+@decoder('HOME_POSITION')
+def _home_position(tel, msg):
+    tel.update(
+        home_lat=msg.latitude / DEGE7,
+        home_lon=msg.longitude / DEGE7,
+        home_alt=msg.altitude / MM_PER_M,  # AMSL
+    )
+
+
+@decoder('STATUSTEXT')
+def _statustext(tel, msg):
+    text = msg.text
+    if isinstance(text, (bytes, bytearray)):
+        text = text.decode('ascii', errors='ignore')
+    tel.update(status_text=text.rstrip('\x00'), status_severity=msg.severity)
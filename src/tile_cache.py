@@ -0,0 +1,249 @@
+import math
+import time
+import random
+import sqlite3
+import hashlib
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# on-disk tile cache, next to map_sources.json
+CACHE_FILE = "tile_cache.sqlite"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# tile servers (OSM in particular) reject requests without a real User-Agent
+USER_AGENT = "GCS-Application tile cache"
+
+
+def tile_range(south, west, north, east, zoom):
+    """(x_min, x_max, y_min, y_max) of the slippy-map tiles covering a box at `zoom`."""
+    def to_tile(lat, lon):
+        lat = max(min(lat, 85.0511), -85.0511)
+        n = 2 ** zoom
+        x = int((lon + 180.0) / 360.0 * n)
+        y = int((1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n)
+        return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+    x0, y0 = to_tile(north, west)
+    x1, y1 = to_tile(south, east)
+    return x0, x1, y0, y1
+
+
+class TileCache:
+    """
+    Tiles stored in an SQLite file. The columns follow MBTiles (zoom_level /
+    tile_column / tile_row / tile_data, TMS row order), but the file is not
+    an MBTiles file: a `source` column lets several tile providers share it,
+    and a `last_used` stamp drives least-recently-used eviction once it
+    holds more than `max_bytes` of tile data. Safe to use from any thread.
+    """
+
+    def __init__(self, path=CACHE_FILE, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS tiles (
+                source      TEXT    NOT NULL,
+                zoom_level  INTEGER NOT NULL,
+                tile_column INTEGER NOT NULL,
+                tile_row    INTEGER NOT NULL,
+                tile_data   BLOB    NOT NULL,
+                last_used   REAL    NOT NULL,
+                PRIMARY KEY (source, zoom_level, tile_column, tile_row)
+            );
+            CREATE INDEX IF NOT EXISTS tiles_lru ON tiles (last_used);
+        """)
+        self.size = self._db.execute(
+            "SELECT COALESCE(SUM(LENGTH(tile_data)), 0) FROM tiles").fetchone()[0]
+
+    @staticmethod
+    def _key(source, z, x, y):
+        return source, z, x, (2 ** z - 1) - y  # XYZ → TMS row
+
+    def get(self, source, z, x, y):
+        """Tile bytes, or None if not cached. A hit counts as a use for LRU."""
+        key = self._key(source, z, x, y)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT tile_data FROM tiles WHERE source=? AND zoom_level=? "
+                "AND tile_column=? AND tile_row=?", key).fetchone()
+            if row is None:
+                return None
+            self._db.execute(
+                "UPDATE tiles SET last_used=? WHERE source=? AND zoom_level=? "
+                "AND tile_column=? AND tile_row=?", (time.time(), *key))
+            self._db.commit()
+        return row[0]
+
+    def has(self, source, z, x, y):
+        with self._lock:
+            return self._db.execute(
+                "SELECT 1 FROM tiles WHERE source=? AND zoom_level=? "
+                "AND tile_column=? AND tile_row=?", self._key(source, z, x, y)).fetchone() is not None
+
+    def put(self, source, z, x, y, data):
+        key = self._key(source, z, x, y)
+        with self._lock:
+            old = self._db.execute(
+                "SELECT LENGTH(tile_data) FROM tiles WHERE source=? AND zoom_level=? "
+                "AND tile_column=? AND tile_row=?", key).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO tiles VALUES (?, ?, ?, ?, ?, ?)",
+                (*key, sqlite3.Binary(data), time.time()))
+            self.size += len(data) - (old[0] if old else 0)
+            if self.size > self.max_bytes:
+                self._evict()
+            self._db.commit()
+
+    def _evict(self, batch=256):
+        """Drop least-recently-used tiles until we're back under 90% of the cap."""
+        target = self.max_bytes * 0.9
+        while self.size > target:
+            # the oldest few through the last_used index, never the whole table
+            rows = self._db.execute(
+                "SELECT rowid, LENGTH(tile_data) FROM tiles ORDER BY last_used LIMIT ?",
+                (batch,)).fetchall()
+            if not rows:
+                break
+            doomed = []
+            for rowid, length in rows:
+                if self.size <= target:
+                    break
+                doomed.append((rowid,))
+                self.size -= length
+            self._db.executemany("DELETE FROM tiles WHERE rowid=?", doomed)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class TileProxy:
+    """
+    Local HTTP tile server in front of a TileCache. Leaflet is pointed at
+    http://127.0.0.1:<port>/<source>/{z}/{x}/{y} (see url_for()); each tile is
+    served from the cache when present and otherwise fetched from the real
+    tile server, cached and returned. With no connectivity, cached areas
+    keep working and missing tiles simply 404.
+    """
+
+    def __init__(self, cache, host="127.0.0.1", port=0, timeout=10.0):
+        self.cache = cache
+        self.timeout = timeout
+        self._sources = {}  # source key → upstream URL template
+        proxy = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                proxy._handle(self)
+
+            def log_message(self, *args):
+                pass  # one line per tile is far too chatty
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def port(self):
+        return self._server.server_address[1]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _register(self, template):
+        source = hashlib.sha1(template.encode()).hexdigest()[:12]
+        self._sources[source] = template
+        return source
+
+    def url_for(self, template):
+        """Register an upstream URL template and return the local one to give Leaflet."""
+        source = self._register(template)
+        return f"http://127.0.0.1:{self.port}/{source}/{{z}}/{{x}}/{{y}}"
+
+    def _tile(self, source, z, x, y):
+        data = self.cache.get(source, z, x, y)
+        if data is not None:
+            return data
+        url = (self._sources[source]
+               .replace("{s}", random.choice("abc"))
+               .replace("{z}", str(z)).replace("{x}", str(x)).replace("{y}", str(y)))
+        req = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+        with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+            data = resp.read()
+        self.cache.put(source, z, x, y, data)
+        return data
+
+    def _handle(self, request):
+        try:
+            source, z, x, y = request.path.strip("/").split("/")
+            z, x, y = int(z), int(x), int(y.split(".")[0])
+        except ValueError:
+            request.send_error(400)
+            return
+        if source not in self._sources:
+            request.send_error(404, "Unknown tile source")
+            return
+        try:
+            data = self._tile(source, z, x, y)
+        except Exception:
+            request.send_error(404, "Tile not cached and upstream unreachable")
+            return
+        request.send_response(200)
+        request.send_header("Content-Type", "image/png" if data[:4] == b"\x89PNG" else "image/jpeg")
+        request.send_header("Content-Length", str(len(data)))
+        request.send_header("Cache-Control", "max-age=86400")
+        request.end_headers()
+        request.wfile.write(data)
+
+    def seed(self, template, bounds, min_zoom, max_zoom,
+             workers=8, progress=None, cancel=None, max_tiles=20000):
+        """
+        Download every tile of `template` covering bounds=(south, west,
+        north, east) for zooms min_zoom..max_zoom into the cache, `workers`
+        at a time. Tiles already cached are skipped. `progress(done, total)`
+        is called as tiles finish; setting the `cancel` Event stops early.
+        Raises ValueError if the job would exceed `max_tiles`.
+        Returns {'total', 'fetched', 'cached', 'failed'}.
+        """
+        source = self._register(template)
+        tiles = []
+        for z in range(min_zoom, max_zoom + 1):
+            x0, x1, y0, y1 = tile_range(*bounds, z)
+            tiles.extend((z, x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1))
+            if len(tiles) > max_tiles:
+                raise ValueError(
+                    f"Area needs more than {max_tiles} tiles; zoom in or lower the max zoom")
+
+        stats = {'total': len(tiles), 'fetched': 0, 'cached': 0, 'failed': 0}
+        lock = threading.Lock()
+
+        def one(tile):
+            if cancel is not None and cancel.is_set():
+                return
+            if self.cache.has(source, *tile):
+                outcome = 'cached'
+            else:
+                try:
+                    self._tile(source, *tile)
+                    outcome = 'fetched'
+                except Exception:
+                    outcome = 'failed'
+            with lock:
+                stats[outcome] += 1
+                done = stats['fetched'] + stats['cached'] + stats['failed']
+            if progress:
+                progress(done, stats['total'])
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(one, tiles))
+        return stats
@@ -0,0 +1,240 @@
+import os
+import re
+import mmap
+from array import array
+import numpy as np
+from pymavlink import mavutil
+from src.telemetry_decoders import DEGE7, MM_PER_M, CDEG_PER_DEG, HDG_UNKNOWN
+
+# one row per record; `offset` is where the record (its 8-byte timestamp) starts
+INDEX_DTYPE = np.dtype([
+    ('offset', '<u8'),
+    ('time',   '<u8'),   # receive time, µs since the epoch
+    ('msgid',  '<u4'),
+    ('sysid',  'u1'),
+    ('compid', 'u1'),
+    ('header', 'u1'),    # bytes from the magic byte to the payload (6 or 10)
+    ('length', 'u1'),    # payload length as sent (v2 trims trailing zeros)
+])
+
+_STAMP_LEN = 8
+_STRUCT_TO_NUMPY = {
+    'b': 'i1', 'B': 'u1', 'h': '<i2', 'H': '<u2', 'i': '<i4', 'I': '<u4',
+    'q': '<i8', 'Q': '<u8', 'f': '<f4', 'd': '<f8', 'c': 'S1',
+}
+
+
+def _payload_dtype(msg_cls):
+    """Packed numpy dtype matching a pymavlink message class's wire layout."""
+    tokens = re.findall(r'(\d*)([a-zA-Z?])', msg_cls.unpacker.format.lstrip('<'))
+    names, formats = [], []
+    for name, (count, code) in zip(msg_cls.ordered_fieldnames, tokens):
+        count = int(count or 1)
+        if code == 's':
+            fmt = f'S{count}'
+        elif count > 1:
+            fmt = (_STRUCT_TO_NUMPY[code], (count,))
+        else:
+            fmt = _STRUCT_TO_NUMPY[code]
+        names.append(name)
+        formats.append(fmt)
+    dtype = np.dtype({'names': names, 'formats': formats})
+    assert dtype.itemsize == msg_cls.unpacker.size
+    return dtype
+
+
+class TlogIndex:
+    """
+    Random access into a .tlog without re-parsing it.
+
+    The log is memory-mapped and indexed once: a single pass hops from
+    record to record using only each packet's length byte, then the
+    timestamps, message ids and source ids of all records are gathered
+    from the map with numpy. The index is saved next to the log as
+    `<log>.idx.npz` and reused (and extended if the log has grown) on the
+    next open.
+
+    Queries select rows by type and time with array operations, and
+    extract() unpacks just the matching payloads straight into numpy
+    columns, so nothing unrelated is ever decoded.
+    """
+
+    def __init__(self, path, save=True):
+        self.path = path
+        self.index_path = path + ".idx.npz"
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        self._buf = np.frombuffer(self._mm, dtype=np.uint8) if size else np.zeros(0, np.uint8)
+
+        index, end = self._load(size)
+        if end < size:
+            index = np.concatenate((index, self._scan(end)))
+            if save:
+                np.savez(self.index_path, index=index, end=np.uint64(self._end))
+        else:
+            self._end = end
+        self.index = index
+
+    def __len__(self):
+        return len(self.index)
+
+    def close(self):
+        self._buf = None
+        if self._mm is not None:
+            self._mm.close()
+        self._file.close()
+
+    # ─── building ─────────────────────────────────────────────────────────
+
+    def _load(self, size):
+        """A saved index still valid for this log, as (rows, end offset)."""
+        try:
+            with np.load(self.index_path) as saved:
+                index, end = saved['index'], int(saved['end'])
+        except (OSError, KeyError, ValueError):
+            return np.zeros(0, INDEX_DTYPE), 0
+        if end > size or index.dtype != INDEX_DTYPE:
+            return np.zeros(0, INDEX_DTYPE), 0  # the log was replaced
+        return index, end
+
+    def _scan(self, start, chunk=1 << 18):
+        """Index the records from byte `start` to the last complete one."""
+        mm, n = self._mm, len(self._buf)
+        offsets = array('Q')
+        pos = start
+        v1, v2 = mavutil.mavlink.PROTOCOL_MARKER_V1, mavutil.mavlink.PROTOCOL_MARKER_V2
+        signed_flag = mavutil.mavlink.MAVLINK_IFLAG_SIGNED
+        sig_len = mavutil.mavlink.MAVLINK_SIGNATURE_BLOCK_LEN
+        while pos + _STAMP_LEN + 3 <= n:
+            magic = mm[pos + 8]
+            if magic == v2:
+                size = _STAMP_LEN + 10 + mm[pos + 9] + 2
+                if mm[pos + 10] & signed_flag:
+                    size += sig_len
+            elif magic == v1:
+                size = _STAMP_LEN + 6 + mm[pos + 9] + 2
+            else:
+                raise ValueError(f"{self.path}: not a MAVLink packet at offset {pos + 8}")
+            if pos + size > n:
+                break  # a record cut short at the end of a log still being written
+            offsets.append(pos)
+            pos += size
+        self._end = pos
+
+        off = np.frombuffer(offsets, dtype=np.uint64).astype(np.int64)
+        rows = np.zeros(len(off), INDEX_DTYPE)
+        # gathered in chunks, as in extract(), so the temporaries stay a few
+        # MB however large the log is
+        for i in range(0, len(off), chunk):
+            self._gather(off[i:i + chunk], rows[i:i + chunk])
+        return rows
+
+    def _gather(self, off, rows):
+        """Fill `rows` with the header fields of the records starting at `off`."""
+        buf = self._buf
+        last = len(buf) - 1
+        v2 = mavutil.mavlink.PROTOCOL_MARKER_V2
+
+        def at(k):
+            return buf[np.minimum(off + k, last)]
+
+        rows['offset'] = off
+        stamps = buf[off[:, None] + np.arange(_STAMP_LEN)]
+        rows['time'] = stamps.view('>u8').ravel()
+        is_v2 = at(8) == v2
+        rows['header'] = np.where(is_v2, 10, 6)
+        rows['length'] = at(9)
+        rows['sysid'] = np.where(is_v2, at(13), at(11))
+        rows['compid'] = np.where(is_v2, at(14), at(12))
+        msgid_v2 = (at(15).astype(np.uint32)
+                    | at(16).astype(np.uint32) << 8
+                    | at(17).astype(np.uint32) << 16)
+        rows['msgid'] = np.where(is_v2, msgid_v2, at(13))
+
+    # ─── queries ──────────────────────────────────────────────────────────
+
+    @staticmethod
+    def msgid(msg_type):
+        return getattr(mavutil.mavlink, 'MAVLINK_MSG_ID_' + msg_type)
+
+    @property
+    def start_time(self):
+        return self.index['time'][0] / 1e6 if len(self.index) else None
+
+    @property
+    def end_time(self):
+        return self.index['time'][-1] / 1e6 if len(self.index) else None
+
+    def select(self, msg_type=None, t0=None, t1=None, sysid=None):
+        """Row numbers of `msg_type` records with t0 <= time <= t1 (seconds since the epoch)."""
+        mask = np.ones(len(self.index), dtype=bool)
+        if msg_type is not None:
+            mask &= self.index['msgid'] == self.msgid(msg_type)
+        if t0 is not None:
+            mask &= self.index['time'] >= int(t0 * 1e6)
+        if t1 is not None:
+            mask &= self.index['time'] <= int(t1 * 1e6)
+        if sysid is not None:
+            mask &= self.index['sysid'] == sysid
+        return np.flatnonzero(mask)
+
+    def offset_at(self, t):
+        """Byte offset of the first record received at or after `t` (for seeking)."""
+        times = self.index['time']
+        i = int(np.searchsorted(times, int(t * 1e6)))
+        return int(self.index['offset'][i]) if i < len(times) else self._end
+
+    def messages(self, msg_type=None, t0=None, t1=None):
+        """Decode and yield only the selected records as pymavlink messages."""
+        mav = mavutil.mavlink.MAVLink(None)
+        for row in self.index[self.select(msg_type, t0, t1)]:
+            start = int(row['offset']) + _STAMP_LEN
+            end = start + int(row['header']) + int(row['length']) + 2
+            if self._mm[start] == mavutil.mavlink.PROTOCOL_MARKER_V2 \
+                    and self._mm[start + 2] & mavutil.mavlink.MAVLINK_IFLAG_SIGNED:
+                end += mavutil.mavlink.MAVLINK_SIGNATURE_BLOCK_LEN
+            try:
+                msg = mav.decode(bytearray(self._mm[start:end]))
+            except Exception:
+                continue
+            msg._timestamp = int(row['time']) / 1e6
+            yield msg
+
+    def extract(self, msg_type, t0=None, t1=None, sysid=None, chunk=65536):
+        """
+        Every field of the selected `msg_type` records as numpy columns (raw
+        wire units), plus 'time' in seconds, without decoding packets one
+        by one: payloads are gathered into a zero-padded byte matrix (v2
+        trims trailing zeros) and viewed through the message's struct layout.
+        """
+        rows = self.index[self.select(msg_type, t0, t1, sysid)]
+        dtype = _payload_dtype(mavutil.mavlink.mavlink_map[self.msgid(msg_type)])
+        cols = np.arange(dtype.itemsize)
+        last = len(self._buf) - 1
+        matrix = np.zeros((len(rows), dtype.itemsize), dtype=np.uint8)
+        # gathered in chunks so the index arithmetic stays small
+        for i in range(0, len(rows), chunk):
+            part = rows[i:i + chunk]
+            start = (part['offset'].astype(np.int64) + _STAMP_LEN + part['header'])[:, None]
+            keep = cols[None, :] < part['length'][:, None]
+            matrix[i:i + chunk] = np.where(keep, self._buf[np.minimum(start + cols, last)], 0)
+        records = matrix.view(dtype).ravel()
+        out = {name: records[name] for name in dtype.names}
+        out['time'] = rows['time'] / 1e6
+        return out
+
+    def track(self, t0=None, t1=None, sysid=None):
+        """
+        Vehicle position over time from GLOBAL_POSITION_INT, in the units
+        Connection.update_telemetry uses: lat/lon in degrees, alt (relative)
+        in metres, heading in degrees.
+        """
+        raw = self.extract('GLOBAL_POSITION_INT', t0, t1, sysid)
+        return {
+            'time': raw['time'],
+            'lat': raw['lat'] / DEGE7,
+            'lon': raw['lon'] / DEGE7,
+            'alt': raw['relative_alt'] / MM_PER_M,
+            'heading': np.where(raw['hdg'] != HDG_UNKNOWN, raw['hdg'] / CDEG_PER_DEG, 0.0),
+        }
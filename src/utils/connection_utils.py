@@ -6,4 +6,10 @@ def get_waypoint_command_type(i, l):
     elif i == l - 1:
         return mavutil.mavlink.MAV_CMD_NAV_RETURN_TO_LAUNCH
     else:
-        return mavutil.mavlink.MAV_CMD_NAV_WAYPOINT
\ No newline at end of file
+        return mavutil.mavlink.MAV_CMD_NAV_WAYPOINT
+
+def decode_param_id(raw):
+    """PARAM_VALUE.param_id arrives as bytes or str, NUL-padded to 16 chars."""
+    if isinstance(raw, (bytes, bytearray)):
+        raw = raw.decode('ascii', errors='ignore')
+    return raw.rstrip('\x00')
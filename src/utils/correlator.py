@@ -0,0 +1,102 @@
+import threading
+from concurrent.futures import Future, InvalidStateError
+from concurrent.futures import TimeoutError as FutureTimeout
+
+
+def _field(msg, name):
+    """
+    Read an identifying field, normalising NUL-padded char[] fields to str.
+    `srcSystem` is the sender's system id, so replies can be keyed per vehicle.
+    """
+    if name == 'srcSystem':
+        return msg.get_srcSystem()
+    value = getattr(msg, name, None)
+    if isinstance(value, (bytes, bytearray)):
+        value = value.decode('ascii', errors='ignore')
+    if isinstance(value, str):
+        value = value.rstrip('\x00')
+    return value
+
+
+class Correlator:
+    """
+    Request/response matching on top of a MessageBus.
+
+    A caller registers what it expects *before* sending a request, keyed on
+    the message type plus its identifying fields, e.g.
+
+        fut = correlator.expect('MISSION_ITEM_INT', seq=3, mission_type=0)
+
+    and the reader thread resolves the future with the first matching reply.
+    A reply only goes to futures waiting for exactly those field values, so
+    concurrent param reads and mission transfers never see each other's
+    traffic. Adding `srcSystem=...` keeps replies from different vehicles on a
+    shared link apart as well.
+    """
+
+    def __init__(self, bus):
+        self._bus = bus
+        self._lock = threading.Lock()
+        # msg type → {field names → {field values → [futures]}}
+        self._pending = {}
+
+    def expect(self, msg_type, **keys):
+        """Return a Future resolved with the next `msg_type` matching `keys`."""
+        names = tuple(sorted(keys))
+        values = tuple(keys[n] for n in names)
+        fut = Future()
+        with self._lock:
+            by_type = self._pending.get(msg_type)
+            if by_type is None:
+                by_type = self._pending[msg_type] = {}
+                self._bus.add_handler(msg_type, self._on_message)
+            by_type.setdefault(names, {}).setdefault(values, []).append(fut)
+        # a cancelled / timed-out waiter must not linger in the table
+        fut.add_done_callback(lambda f: f.cancelled() and self._discard(msg_type, names, values, f))
+        return fut
+
+    def wait(self, fut, timeout=None, what="reply"):
+        """Block on `fut`; on timeout cancel it and raise the builtin TimeoutError."""
+        try:
+            return fut.result(timeout=timeout)
+        except FutureTimeout:
+            fut.cancel()
+            raise TimeoutError(f"Timed out waiting for {what}")
+
+    def pending(self):
+        """Number of futures still waiting for a reply."""
+        with self._lock:
+            return sum(len(futs)
+                       for by_type in self._pending.values()
+                       for waiting in by_type.values()
+                       for futs in waiting.values())
+
+    def _discard(self, msg_type, names, values, fut):
+        with self._lock:
+            waiting = self._pending.get(msg_type, {}).get(names)
+            if not waiting or values not in waiting:
+                return
+            futs = [f for f in waiting[values] if f is not fut]
+            if futs:
+                waiting[values] = futs
+            else:
+                del waiting[values]
+
+    def _on_message(self, msg):
+        """Bus handler (reader thread): resolve every future keyed on this reply."""
+        matched = []
+        with self._lock:
+            by_type = self._pending.get(msg.get_type())
+            if not by_type:
+                return
+            for names, waiting in by_type.items():
+                if not waiting:
+                    continue
+                futs = waiting.pop(tuple(_field(msg, n) for n in names), None)
+                if futs:
+                    matched.extend(futs)
+        for fut in matched:
+            try:
+                fut.set_result(msg)
+            except InvalidStateError:
+                pass  # cancelled between the lookup and here
@@ -0,0 +1,160 @@
+import threading
+import time
+import cv2
+import numpy as np
+
+
+class FrameSlot:
+    """One preallocated RGB frame buffer in a FramePool."""
+    __slots__ = ('array', 'seq', 'stamp')
+
+    def __init__(self, array):
+        self.array = array
+        self.seq = 0
+        self.stamp = 0.0
+
+
+class FramePool:
+    """
+    Triple-buffered, latest-frame-wins handoff between the decoder thread and
+    the GUI. Frames are written into a small set of preallocated buffers that
+    are reused forever: one holds the newest frame, one is being presented,
+    and the writer always has a third to fill. Stale frames are overwritten
+    instead of queueing up, so display latency can't grow when the GUI falls
+    behind the decoder. Buffers are only reallocated when the frame size
+    changes.
+    """
+
+    def __init__(self, count=3):
+        self._lock = threading.Lock()
+        self._count = count
+        self._slots = []
+        self._shape = None
+        self._latest = None   # newest published slot
+        self._reading = None  # slot the GUI is currently presenting
+        self.seq = 0          # bumped on every publish()
+
+    def writable(self, shape, dtype=np.uint8):
+        """A buffer of `shape` that is neither the newest frame nor on screen."""
+        with self._lock:
+            if shape != self._shape:
+                # the reader keeps its old slot alive through its own reference
+                self._slots = [FrameSlot(np.empty(shape, dtype)) for _ in range(self._count)]
+                self._shape = shape
+                self._latest = self._reading = None
+            for slot in self._slots:
+                if slot is not self._latest and slot is not self._reading:
+                    return slot
+
+    def publish(self, slot):
+        with self._lock:
+            self.seq += 1
+            slot.seq = self.seq
+            slot.stamp = time.monotonic()
+            self._latest = slot
+
+    def take(self, after_seq=0):
+        """
+        The newest slot if it is newer than `after_seq`, else None. The slot
+        stays reserved for the caller until its next successful take().
+        """
+        with self._lock:
+            if self._latest is None or self._latest.seq <= after_seq:
+                return None
+            self._reading = self._latest
+            return self._reading
+
+
+class FrameGrabber(threading.Thread):
+    """
+    Reads and decodes a cv2.VideoCapture as fast as the stream delivers,
+    converting to RGB off the GUI thread and publishing into a FramePool.
+    Continuously draining the capture keeps the GStreamer appsink empty.
+    In steady state no frame buffers are allocated: retrieve() fills a
+    reused buffer and cvtColor converts straight into a pool slot (or, for
+    RGB pipelines, retrieve() fills the pool slot directly).
+
+    Pass convert=False when the pipeline already produces RGB. Smoothed
+    stats are updated as frames arrive:
+
+    fps         frames published per second
+    wait_ms     time blocked in grab() until the next frame is there,
+                roughly 1/fps on a healthy stream
+    convert_ms  retrieve() plus the colour conversion into the pool slot,
+                the work spent on each frame here; decoding itself
+                happens upstream in the GStreamer pipeline
+    lag_ms      how much later than the stream's best frame so far this
+                one reached us, from its buffer PTS against the clock;
+                it grows as frames queue in the jitterbuffer, decoder or
+                appsink. None while the backend reports no PTS.
+    """
+
+    def __init__(self, cap, convert=True):
+        super().__init__(daemon=True)
+        self.cap = cap
+        self.convert = convert
+        self.pool = FramePool()
+        self.lost = False  # set when the stream dies mid-flight
+        self.fps = 0.0
+        self.wait_ms = 0.0
+        self.convert_ms = 0.0
+        self.lag_ms = None
+        self._stop_event = threading.Event()
+
+    def run(self):
+        last = None
+        raw = None    # reused BGR decode buffer
+        shape = None  # known frame shape (RGB pipelines)
+        best = None   # smallest arrival time − PTS seen (ms): the least-delayed frame
+        try:
+            while not self._stop_event.is_set():
+                t0 = time.monotonic()
+                if not self.cap.grab():
+                    break
+                t1 = time.monotonic()
+                pts = self.cap.get(cv2.CAP_PROP_POS_MSEC)  # of the frame just grabbed
+                if self.convert:
+                    ret, frame = self.cap.retrieve(raw)
+                    if not ret:
+                        break
+                    raw = frame
+                    slot = self.pool.writable(frame.shape)
+                    cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=slot.array)
+                else:
+                    slot = self.pool.writable(shape) if shape else None
+                    ret, frame = self.cap.retrieve(None if slot is None else slot.array)
+                    if not ret:
+                        break
+                    if slot is None or frame is not slot.array:
+                        # first frame, or the resolution changed: adopt its shape
+                        shape = frame.shape
+                        slot = self.pool.writable(shape)
+                        np.copyto(slot.array, frame)
+                self.pool.publish(slot)
+
+                # exponentially smoothed stats
+                now = time.monotonic()
+                self.wait_ms += 0.1 * ((t1 - t0) * 1000.0 - self.wait_ms)
+                self.convert_ms += 0.1 * ((now - t1) * 1000.0 - self.convert_ms)
+                if pts > 0:
+                    offset = t1 * 1000.0 - pts
+                    if best is None or offset < best:
+                        best = offset
+                    lag = offset - best
+                    self.lag_ms = lag if self.lag_ms is None else self.lag_ms + 0.1 * (lag - self.lag_ms)
+                if last is not None and now > last:
+                    self.fps += 0.1 * (1.0 / (now - last) - self.fps)
+                last = now
+            # grab() / retrieve() failed while we were still supposed to be running
+            if not self._stop_event.is_set():
+                self.lost = True
+        finally:
+            # release here, never while grab() may still be running elsewhere
+            try:
+                self.cap.release()
+            except Exception:
+                pass
+
+    def stop(self):
+        """Ask the thread to finish; the capture is released once grab() returns."""
+        self._stop_event.set()
@@ -0,0 +1,133 @@
+import time
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QImage, QPainter, QFont, QColor
+
+# seconds after which a field that was being received is flagged as stale
+STALE_AFTER = {
+    'mode': 3.0,             # HEARTBEAT (1 Hz)
+    'lat': 2.0,              # GLOBAL_POSITION_INT
+    'groundspeed': 2.0,      # VFR_HUD
+    'battery_voltage': 5.0,  # BATTERY_STATUS
+    'gps_fix_type': 3.0,     # GPS_RAW_INT
+}
+
+
+class HudOverlay:
+    """
+    Renders the telemetry HUD into a cached transparent layer.
+
+    The layer is only repainted when the displayed text changes (at most
+    `max_rate` times a second) or the display size changes; every other video
+    frame just composites the cached image. It is drawn at display resolution,
+    so its cost doesn't depend on the source stream's resolution.
+
+    Values that were arriving but stopped for longer than STALE_AFTER are
+    marked STALE, so a frozen reading can't be mistaken for a live one.
+    """
+
+    def __init__(self, font=None, color="lime", margin=10, max_rate=5.0):
+        self.font = font or QFont("Consolas", 14)
+        self.color = QColor(color)
+        self.margin = margin
+        self.min_interval = 1.0 / max_rate
+        self._layer = None
+        self._groups = None
+        self._checked_at = 0.0
+
+    @staticmethod
+    def text_groups(tel):
+        """
+        HUD lines for the four corners: (top-left, top-right, bottom-left,
+        bottom-right), from a TelemetrySnapshot.
+        """
+        def stale(field):
+            age = tel.age(field)
+            return " STALE" if age is not None and age > STALE_AFTER[field] else ""
+
+        grpA = (  # top-left
+            f"Mode:  {tel.get('mode','—')}{stale('mode')}",
+            f"Armed: {tel.get('armed','—')}",
+            f"Alt:   {tel.get('alt') or 0:.1f} m{stale('lat')}",
+        )
+        grpB = (  # top-right
+            f"Lat: {tel.get('lat') or 0:.6f}{stale('lat')}",
+            f"Lon: {tel.get('lon') or 0:.6f}",
+            f"Hdg: {tel.get('heading') or 0:.1f}°",
+        )
+        grpC = (  # bottom-left
+            f"WP: {tel.get('current_mission_point','-')}/{tel.get('total_mission_points','-')}",
+        )
+        grpD = (  # bottom-right
+            f"Batt: {tel.get('battery_voltage') or 0:.2f}V ({tel.get('battery_remaining') or 0}%){stale('battery_voltage')}",
+            f"GPS: fix {tel.get('gps_fix_type',0)} / {tel.get('gps_satellites_visible',0)} sat{stale('gps_fix_type')}",
+            f"SPD: {tel.get('groundspeed') or 0:.1f} m/s{stale('groundspeed')}",
+            f"Clb: {tel.get('climb_rate') or 0:.1f} m/s",
+            f"Thr: {tel.get('throttle',0)}%",
+        )
+        return grpA, grpB, grpC, grpD
+
+    def layer(self, size, telemetry):
+        """
+        The HUD as a transparent QImage of `size`, repainted only when needed.
+        `telemetry` is the TelemetryStore; it is only snapshotted when due.
+        """
+        now = time.monotonic()
+        fresh = self._layer is not None and self._layer.size() == size
+        # between checks the cached layer is reused without even formatting text
+        if fresh and now - self._checked_at < self.min_interval:
+            return self._layer
+        self._checked_at = now
+
+        groups = self.text_groups(telemetry.snapshot())
+        if fresh and groups == self._groups:
+            return self._layer
+
+        layer = QImage(size, QImage.Format_ARGB32_Premultiplied)
+        layer.fill(Qt.transparent)
+        self._paint(layer, groups)
+        self._layer, self._groups = layer, groups
+        return layer
+
+    def _paint(self, img, groups):
+        grpA, grpB, grpC, grpD = groups
+        w, h = img.width(), img.height()
+
+        painter = QPainter(img)
+        painter.setFont(self.font)
+        painter.setPen(self.color)
+
+        fm = painter.fontMetrics()
+        lh = fm.height()
+        margin = self.margin
+
+        # Draw each group in its corner
+        # ── A: top-left
+        xA, yA = margin, margin + fm.ascent()
+        for line in grpA:
+            painter.drawText(xA, yA, line)
+            yA += lh
+
+        # ── B: top-right
+        maxBW = max(fm.horizontalAdvance(l) for l in grpB)
+        xB = w - maxBW - margin
+        yB = margin + fm.ascent()
+        for line in grpB:
+            painter.drawText(xB, yB, line)
+            yB += lh
+
+        # ── C: bottom-left
+        xC = margin
+        yC = h - margin - (len(grpC)-1)*lh
+        for line in grpC:
+            painter.drawText(xC, yC, line)
+            yC += lh
+
+        # ── D: bottom-right
+        maxDW = max(fm.horizontalAdvance(l) for l in grpD)
+        xD = w - maxDW - margin
+        yD = h - margin - (len(grpD)-1)*lh
+        for line in grpD:
+            painter.drawText(xD, yD, line)
+            yD += lh
+
+        painter.end()
@@ -0,0 +1,139 @@
+import threading
+from collections import deque
+
+# what a full subscription does with the next message
+DROP_OLDEST = 'oldest'   # ring buffer: evict the oldest queued message
+DROP_NEWEST = 'newest'   # keep what is queued, discard the incoming one
+
+
+class Subscription:
+    """
+    One consumer's view of the bus: a bounded ring buffer holding only the
+    message types (and optional predicate) it asked for.
+    """
+
+    def __init__(self, bus, msg_types, condition=None, maxlen=64, drop=DROP_OLDEST):
+        if drop not in (DROP_OLDEST, DROP_NEWEST):
+            raise ValueError(f"Unknown drop policy '{drop}'")
+        self._bus = bus
+        self.types = tuple(msg_types)
+        self.condition = condition
+        self.drop = drop
+        self.dropped = 0  # how many messages the drop policy threw away
+        self.closed = False
+        self._buf = deque(maxlen=maxlen)
+        self._cv = threading.Condition()
+
+    def _offer(self, msg):
+        """Called on the reader thread for every message of a subscribed type."""
+        if self.condition is not None and not self.condition(msg):
+            return
+        with self._cv:
+            if len(self._buf) == self._buf.maxlen:
+                self.dropped += 1
+                if self.drop == DROP_NEWEST:
+                    return
+            # deque(maxlen=…) evicts the oldest entry on its own
+            self._buf.append(msg)
+            self._cv.notify()
+
+    def get(self, timeout=None):
+        """
+        Pop the oldest buffered message, blocking up to `timeout` seconds.
+        Raises TimeoutError if nothing arrives (or the subscription is closed).
+        """
+        with self._cv:
+            self._cv.wait_for(lambda: self._buf or self.closed, timeout)
+            if not self._buf:
+                raise TimeoutError(f"Timed out waiting for {'/'.join(self.types)}")
+            return self._buf.popleft()
+
+    def close(self):
+        """Detach from the bus and wake up anyone blocked in get()."""
+        self._bus.unsubscribe(self)
+        with self._cv:
+            self.closed = True
+            self._cv.notify_all()
+
+    def __len__(self):
+        return len(self._buf)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class MessageBus:
+    """
+    Per-type dispatch of received MAVLink messages.
+
+    Only message types somebody subscribed to are buffered, each subscriber in
+    its own bounded ring; everything else is dropped as soon as publish()
+    returns, so memory stays flat no matter how long the link runs.
+    Handlers registered for ANY see every message, whatever its type.
+    """
+
+    ANY = '*'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # msg type → tuple of subscriptions / handlers; tuples are replaced
+        # (never mutated) so publish() can read them without taking the lock
+        self._subs = {}
+        self._handlers = {}
+
+    def subscribe(self, msg_types, condition=None, maxlen=64, drop=DROP_OLDEST):
+        """
+        Start buffering `msg_types` (a type name or a list of them) that pass
+        `condition`. Subscribe *before* sending the request you expect a reply
+        to, otherwise a fast reply can arrive while nobody is listening.
+        """
+        if isinstance(msg_types, str):
+            msg_types = (msg_types,)
+        sub = Subscription(self, msg_types, condition, maxlen, drop)
+        with self._lock:
+            for t in sub.types:
+                self._subs[t] = self._subs.get(t, ()) + (sub,)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            for t in sub.types:
+                remaining = tuple(s for s in self._subs.get(t, ()) if s is not sub)
+                if remaining:
+                    self._subs[t] = remaining
+                else:
+                    self._subs.pop(t, None)
+
+    def add_handler(self, msg_type, handler):
+        """
+        Call `handler(msg)` synchronously on the reader thread for every
+        message of `msg_type` (every message at all for MessageBus.ANY).
+        Handlers must be quick and must not block.
+        """
+        with self._lock:
+            self._handlers[msg_type] = self._handlers.get(msg_type, ()) + (handler,)
+
+    def remove_handler(self, msg_type, handler):
+        with self._lock:
+            remaining = tuple(h for h in self._handlers.get(msg_type, ()) if h != handler)
+            if remaining:
+                self._handlers[msg_type] = remaining
+            else:
+                self._handlers.pop(msg_type, None)
+
+    def publish(self, msg):
+        """Hand `msg` to every matching handler and subscription (reader thread only)."""
+        m = msg.get_type()
+        for handler in self._handlers.get(self.ANY, ()) + self._handlers.get(m, ()):
+            try:
+                handler(msg)
+            except Exception as e:
+                print(f"Handler {handler} failed on {m}:", e)
+        for sub in self._subs.get(m, ()):
+            try:
+                sub._offer(msg)
+            except Exception as e:
+                print(f"Subscription {sub.types} failed on {m}:", e)
@@ -0,0 +1,97 @@
+import threading
+import time
+import numpy as np
+
+
+class RingBuffer:
+    """
+    Fixed-capacity time series of (monotonic time, value) samples held in two
+    preallocated numpy arrays. append() is O(1) and overwrites the oldest
+    sample once full, so memory stays constant however long the session runs.
+    Window queries select the last N seconds with a binary search and reduce
+    them with numpy. Safe to append from one thread while others query.
+    """
+
+    def __init__(self, capacity=6000):
+        self.capacity = capacity
+        self._t = np.zeros(capacity, dtype=np.float64)
+        self._v = np.zeros(capacity, dtype=np.float64)
+        self._head = 0   # next slot to write
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def append(self, value, t=None):
+        """Record `value` at monotonic time `t` (now if omitted); times must not go backwards."""
+        if t is None:
+            t = time.monotonic()
+        with self._lock:
+            self._t[self._head] = t
+            self._v[self._head] = value
+            self._head = (self._head + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+
+    def __len__(self):
+        return self._count
+
+    def clear(self):
+        with self._lock:
+            self._head = 0
+            self._count = 0
+
+    def latest(self):
+        """(t, value) of the newest sample, or None if empty."""
+        with self._lock:
+            if self._count == 0:
+                return None
+            i = self._head - 1
+            return float(self._t[i]), float(self._v[i])
+
+    def window(self, seconds=None, now=None):
+        """
+        (times, values) copies of the samples from the last `seconds` (all of
+        them if None), oldest first.
+        """
+        with self._lock:
+            if self._count < self.capacity:
+                # not wrapped yet: one chronological segment
+                segments = ((self._t[:self._count], self._v[:self._count]),)
+            else:
+                # wrapped: [head:] is older than [:head]
+                h = self._head
+                segments = ((self._t[h:], self._v[h:]), (self._t[:h], self._v[:h]))
+            if seconds is not None:
+                cutoff = (time.monotonic() if now is None else now) - seconds
+                trimmed = []
+                for t, v in segments:
+                    i = np.searchsorted(t, cutoff)
+                    trimmed.append((t[i:], v[i:]))
+                segments = trimmed
+            return (np.concatenate([t for t, _ in segments]),
+                    np.concatenate([v for _, v in segments]))
+
+    def mean(self, seconds=None, now=None):
+        _, v = self.window(seconds, now)
+        return float(v.mean()) if v.size else None
+
+    def min(self, seconds=None, now=None):
+        _, v = self.window(seconds, now)
+        return float(v.min()) if v.size else None
+
+    def max(self, seconds=None, now=None):
+        _, v = self.window(seconds, now)
+        return float(v.max()) if v.size else None
+
+    def rate(self, seconds=None, now=None):
+        """
+        Rate of change (units per second) over the window: the least-squares
+        slope, so a single noisy sample doesn't dominate. None with fewer
+        than two samples.
+        """
+        t, v = self.window(seconds, now)
+        if t.size < 2:
+            return None
+        dt = t - t.mean()
+        denom = float(np.dot(dt, dt))
+        if denom == 0.0:
+            return None
+        return float(np.dot(dt, v - v.mean()) / denom)
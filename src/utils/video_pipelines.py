@@ -0,0 +1,65 @@
+# GStreamer pipeline profiles for the video tab.
+#
+# Every profile receives RTP over UDP and ends in an OpenCV appsink; they
+# differ in how much buffering they allow and where the colour conversion
+# happens.
+
+CODECS = {
+    'H.264': {'encoding': 'H264', 'depay': 'rtph264depay', 'decoder': 'avdec_h264'},
+    'H.265': {'encoding': 'H265', 'depay': 'rtph265depay', 'decoder': 'avdec_h265'},
+}
+
+PROFILES = {
+    # the original pipeline: default jitterbuffer latency, unbounded appsink
+    'Default': {
+        'jitter_latency': None,
+        'low_latency_sink': False,
+        'rgb': False,
+    },
+    # no jitterbuffer delay, appsink keeps only the newest buffer
+    'Low latency': {
+        'jitter_latency': 0,
+        'low_latency_sink': True,
+        'rgb': False,
+    },
+    # as above, but GStreamer hands OpenCV RGB so there is no cvtColor pass
+    # (needs an OpenCV build whose GStreamer backend accepts RGB appsink caps)
+    'Low latency (RGB)': {
+        'jitter_latency': 0,
+        'low_latency_sink': True,
+        'rgb': True,
+    },
+}
+
+DEFAULT_PROFILE = 'Default'
+DEFAULT_CODEC = 'H.264'
+DEFAULT_PORT = 5600
+
+
+def build_pipeline(profile=DEFAULT_PROFILE, port=DEFAULT_PORT, codec=DEFAULT_CODEC):
+    """Return the cv2.CAP_GSTREAMER pipeline string for a profile/port/codec."""
+    p = PROFILES[profile]
+    c = CODECS[codec]
+
+    jitter = "rtpjitterbuffer"
+    if p['jitter_latency'] is not None:
+        jitter += f" latency={p['jitter_latency']}"
+
+    convert = "videoconvert"
+    if p['rgb']:
+        convert += " ! video/x-raw, format=RGB"
+
+    sink = "appsink"
+    if p['low_latency_sink']:
+        sink += " drop=true max-buffers=1 sync=false"
+
+    return (
+        f"udpsrc port={port} "
+        f"! application/x-rtp, encoding-name={c['encoding']}, payload=96 "
+        f"! {jitter} ! {c['depay']} ! {c['decoder']} ! {convert} ! {sink}"
+    )
+
+
+def outputs_rgb(profile):
+    """True if frames from this profile's appsink are already RGB."""
+    return PROFILES[profile]['rgb']
@@ -0,0 +1,78 @@
+import time
+from pymavlink import mavutil
+from src.param_store import ParamStore
+from src.telemetry import TelemetryStore, TelemetryHistory
+
+# a vehicle silent for this long (s) is shown as lost; the shared link is
+# only dropped when no vehicle at all is heard (LinkSupervisor)
+LOST_AFTER = 3.0
+
+
+def is_vehicle_heartbeat(msg):
+    """True for a HEARTBEAT from an autopilot (not a GCS, camera, gimbal…)."""
+    return (msg.type != mavutil.mavlink.MAV_TYPE_GCS
+            and msg.autopilot != mavutil.mavlink.MAV_AUTOPILOT_INVALID)
+
+
+class _SendTo:
+    """File-like writer that sends each packet to one vehicle's UDP address."""
+
+    def __init__(self, sock, vehicle):
+        self.sock = sock
+        self.vehicle = vehicle
+
+    def write(self, buf):
+        try:
+            self.sock.sendto(buf, self.vehicle.address)
+        except OSError:
+            pass  # like mavudp.write: a lost datagram is retried by the caller
+
+
+class Vehicle:
+    """
+    Everything Connection keeps per vehicle on a shared link: its own
+    telemetry store and history, parameter table, when it last sent a
+    HEARTBEAT and the UDP address its packets come from (so commands can be
+    sent back to it rather than to whoever spoke last).
+    """
+
+    __slots__ = ('sysid', 'compid', 'telemetry', 'history', 'params',
+                 'last_heartbeat', 'address', 'mav')
+
+    def __init__(self, sysid, compid, history_capacity=6000):
+        self.sysid = sysid
+        self.compid = compid
+        self.history = TelemetryHistory(history_capacity)
+        self.telemetry = TelemetryStore(self.history)
+        self.params = ParamStore()
+        self.last_heartbeat = None   # time.monotonic()
+        self.address = None
+        self.mav = None   # own MAVLink sender once bound to a udpin link
+
+    def bind(self, master):
+        """
+        Give this vehicle its own MAVLink sender on `master`'s UDP socket,
+        sending to `address` (a udpin link on its own sends everything to
+        every address it has heard from).
+        """
+        self.mav = mavutil.mavlink.MAVLink(
+            _SendTo(master.port, self),
+            srcSystem=master.source_system,
+            srcComponent=master.source_component,
+        )
+
+    @property
+    def key(self):
+        return self.sysid, self.compid
+
+    def heartbeat_age(self):
+        if self.last_heartbeat is None:
+            return None
+        return time.monotonic() - self.last_heartbeat
+
+    def is_lost(self, after=LOST_AFTER):
+        age = self.heartbeat_age()
+        return age is not None and age > after
+
+    def __repr__(self):
+        return f"Vehicle({self.sysid}, {self.compid})"
@@ -1,15 +1,34 @@
 # src/widget_classes/config.py
 import os
 import json
+import threading
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QLabel, QComboBox,
-    QLineEdit, QPushButton, QHBoxLayout, QMessageBox
+    QLineEdit, QPushButton, QHBoxLayout, QMessageBox, QSpinBox,
+    QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView,
+    QFileDialog
 )
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, Signal, Slot
+
+from src.param_store import PARAM_TYPE_NAMES, load_param_file
+from src.tile_cache import TileCache, TileProxy
 
 class ConfigTab(QWidget):
     CONFIG_FILE = "map_sources.json"
 
+    # param sync worker → GUI
+    params_progress = Signal(int, int)   # received, total
+    params_synced   = Signal(dict)       # diff against the cached table
+    params_failed   = Signal(str, str)   # what failed, error
+    params_written  = Signal(dict)       # per-parameter results of a batch write
+    param_read      = Signal(str, float) # name, value read back from the vehicle
+    param_read_failed = Signal(str, str) # name, error
+
+    # offline tile download worker → GUI
+    tiles_progress  = Signal(int, int)   # done, total
+    tiles_seeded    = Signal(dict)       # TileProxy.seed() stats
+    tiles_failed    = Signal(str)
+
     def __init__(self, conn, mission_tab):
         super().__init__()
         self.conn = conn
@@ -18,6 +37,12 @@ class ConfigTab(QWidget):
         # ─── Load (or create) JSON of map sources ────────────────────────────
         self._load_map_sources()
 
+        # ─── Local tile proxy: every tile the map loads goes through the
+        # on-disk cache, so visited / downloaded areas work offline ─────────
+        self.tile_proxy = TileProxy(TileCache())
+        self.tile_proxy.start()
+        self._seed_cancel = None
+
         layout = QVBoxLayout(self)
 
         # ─── Map Source Selector ────────────────────────────────────────────
@@ -51,6 +76,30 @@ class ConfigTab(QWidget):
         self.apply_map_btn = QPushButton("Apply Map Source")
         self.apply_map_btn.setCursor(Qt.PointingHandCursor)
         layout.addWidget(self.apply_map_btn)
+
+        # ─── Map update rate ────────────────────────────────────────────────
+        rate_layout = QHBoxLayout()
+        rate_layout.addWidget(QLabel("Map update rate (Hz):"))
+        self.map_rate_spin = QSpinBox()
+        self.map_rate_spin.setRange(1, 60)
+        self.map_rate_spin.setValue(self.mission_tab.bridge.rate_hz)
+        rate_layout.addWidget(self.map_rate_spin)
+        rate_layout.addStretch(1)
+        layout.addLayout(rate_layout)
+
+        # ─── Offline tiles ──────────────────────────────────────────────────
+        seed_layout = QHBoxLayout()
+        self.seed_btn = QPushButton("Download Visible Area")
+        self.seed_btn.setCursor(Qt.PointingHandCursor)
+        seed_layout.addWidget(self.seed_btn)
+        seed_layout.addWidget(QLabel("up to zoom"))
+        self.seed_zoom_spin = QSpinBox()
+        self.seed_zoom_spin.setRange(1, 19)
+        self.seed_zoom_spin.setValue(17)
+        seed_layout.addWidget(self.seed_zoom_spin)
+        self.seed_status = QLabel("")
+        seed_layout.addWidget(self.seed_status, 1)
+        layout.addLayout(seed_layout)
         layout.addSpacing(20)
 
         # ─── Parameter Controls ─────────────────────────────────────────────
@@ -70,15 +119,58 @@ class ConfigTab(QWidget):
         btn_layout.addWidget(self.get_btn)
         btn_layout.addWidget(self.set_btn)
         layout.addLayout(btn_layout)
+        layout.addSpacing(20)
+
+        # ─── Full Parameter Table ───────────────────────────────────────────
+        table_bar = QHBoxLayout()
+        self.sync_params_btn = QPushButton("Download All Params")
+        self.sync_params_btn.setCursor(Qt.PointingHandCursor)
+        self.param_search_edit = QLineEdit()
+        self.param_search_edit.setPlaceholderText("Search parameters…")
+        self.params_status = QLabel("")
+        self.apply_file_btn = QPushButton("Apply .param File")
+        self.apply_file_btn.setCursor(Qt.PointingHandCursor)
+        table_bar.addWidget(self.sync_params_btn)
+        table_bar.addWidget(self.apply_file_btn)
+        table_bar.addWidget(self.param_search_edit, 1)
+        table_bar.addWidget(self.params_status)
+        layout.addLayout(table_bar)
+
+        self.param_table = QTableWidget(0, 4)
+        self.param_table.setHorizontalHeaderLabels(["Name", "Value", "Type", "Index"])
+        self.param_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.param_table.verticalHeader().setVisible(False)
+        self.param_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.param_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        layout.addWidget(self.param_table, 1)
 
-        layout.addStretch(1)
         layout.setContentsMargins(20, 20, 20, 20)
 
         # ─── Signal connections ──────────────────────────────────────────────
         self.add_btn.clicked.connect(self.on_add_custom)
         self.apply_map_btn.clicked.connect(self.on_apply_map)
+        self.map_rate_spin.valueChanged.connect(self.mission_tab.bridge.set_rate)
+        self.seed_btn.clicked.connect(self.on_seed_tiles)
         self.get_btn.clicked.connect(self.on_get_param)
         self.set_btn.clicked.connect(self.on_set_param)
+        self.sync_params_btn.clicked.connect(self.on_sync_params)
+        self.apply_file_btn.clicked.connect(self.on_apply_param_file)
+        self.param_search_edit.textChanged.connect(self.refresh_param_table)
+        self.param_table.cellClicked.connect(self._on_param_row_clicked)
+        self.params_progress.connect(self._on_params_progress)
+        self.params_synced.connect(self._on_params_synced)
+        self.params_failed.connect(self._on_params_failed)
+        self.params_written.connect(self._on_params_written)
+        self.param_read.connect(self._on_param_read)
+        self.param_read_failed.connect(self._on_param_read_failed)
+        self.tiles_progress.connect(self._on_tiles_progress)
+        self.tiles_seeded.connect(self._on_tiles_seeded)
+        self.tiles_failed.connect(self._on_tiles_failed)
+
+        # the map starts on the first source, through the cache
+        if self.tile_combo.count():
+            self.mission_tab.bridge.set_tile_source(
+                self.tile_proxy.url_for(self.tile_combo.currentData()))
 
     def _load_map_sources(self):
         """Load map_sources.json or initialize with defaults."""
@@ -138,28 +230,93 @@ class ConfigTab(QWidget):
             QMessageBox.warning(self, "Apply Map", "No tile URL selected.")
             return
 
-        js = f"""
-            map.eachLayer(function(layer) {{
-                if (layer instanceof L.TileLayer) {{
-                    map.removeLayer(layer);
-                }}
-            }});
-            L.tileLayer("{url}", {{ maxZoom: 19 }}).addTo(map);
-        """
-        view = self.mission_tab.map_view
-        view.page().runJavaScript(js)
+        self.mission_tab.bridge.set_tile_source(self.tile_proxy.url_for(url))
         QMessageBox.information(self, "Map Source", "Map source updated.")
 
+    def on_seed_tiles(self):
+        """Download the map's visible area for offline use (press again to cancel)."""
+        if self._seed_cancel is not None:
+            self._seed_cancel.set()
+            self.seed_status.setText("Cancelling…")
+            return
+        view = self.mission_tab.bridge.view
+        url = self.tile_combo.currentData()
+        if view is None or not url:
+            QMessageBox.warning(self, "Offline Tiles", "The map hasn't loaded yet.")
+            return
+        *bounds, zoom = view
+        max_zoom = max(zoom, self.seed_zoom_spin.value())
+        cancel = threading.Event()
+        self._seed_cancel = cancel
+        self.seed_btn.setText("Cancel Download")
+        self.seed_status.setText("Starting…")
+
+        def worker():
+            try:
+                stats = self.tile_proxy.seed(url, bounds, zoom, max_zoom,
+                                             progress=self.tiles_progress.emit, cancel=cancel)
+            except Exception as e:
+                self.tiles_failed.emit(str(e))
+            else:
+                self.tiles_seeded.emit(stats)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _seed_finished(self):
+        self._seed_cancel = None
+        self.seed_btn.setText("Download Visible Area")
+
+    @Slot(int, int)
+    def _on_tiles_progress(self, done, total):
+        self.seed_status.setText(f"{done}/{total} tiles")
+
+    @Slot(dict)
+    def _on_tiles_seeded(self, stats):
+        self._seed_finished()
+        self.seed_status.setText(
+            f"{stats['fetched']} downloaded · {stats['cached']} already cached"
+            + (f" · {stats['failed']} failed" if stats['failed'] else ""))
+
+    @Slot(str)
+    def _on_tiles_failed(self, error_msg):
+        self._seed_finished()
+        self.seed_status.setText("Failed")
+        QMessageBox.critical(self, "Offline Tiles", f"Tile download failed:\n{error_msg}")
+
     def on_get_param(self):
+        """Read a parameter from the vehicle in the background."""
         pid = self.param_id_edit.text().strip()
         if not pid:
             QMessageBox.warning(self, "Get Param", "Enter a parameter ID.")
             return
-        try:
-            msg = self.conn.get_param(pid)
-            QMessageBox.information(self, "Get Param", f"{pid} = {msg.param_value}")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to get param:\n{e}")
+        # the local table's value (maybe from the cache) until the vehicle answers
+        value = self.conn.params.get(pid)
+        if value is not None:
+            self.param_value_edit.setText(f"{value:g}")
+        self.get_btn.setEnabled(False)
+
+        def worker():
+            try:
+                msg = self.conn.get_param(pid)
+            except Exception as e:
+                self.param_read_failed.emit(pid, str(e))
+            else:
+                self.param_read.emit(pid, msg.param_value)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    @Slot(str, float)
+    def _on_param_read(self, pid, value):
+        self.get_btn.setEnabled(True)
+        if self.param_id_edit.text().strip() == pid:
+            self.param_value_edit.setText(f"{value:g}")
+        self.refresh_param_table()  # the store already has the fresh value
+        QMessageBox.information(self, "Get Param", f"{pid} = {value}")
+
+    @Slot(str, str)
+    def _on_param_read_failed(self, pid, error_msg):
+        self.get_btn.setEnabled(True)
+        QMessageBox.critical(self, "Error", f"Failed to get {pid}:\n{error_msg}")
 
     def on_set_param(self):
         pid = self.param_id_edit.text().strip()
@@ -177,3 +334,113 @@ class ConfigTab(QWidget):
             QMessageBox.information(self, "Set Param", f"{pid} set to {new_val}")
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to set param:\n{e}")
+
+
+    def on_sync_params(self):
+        """Download the whole parameter table in the background."""
+        if self.conn.master is None:
+            QMessageBox.warning(self, "Parameters", "Connect to a vehicle first.")
+            return
+        self.sync_params_btn.setEnabled(False)
+        self.params_status.setText("Loading…")
+
+        def worker():
+            try:
+                diff = self.conn.sync_params(progress=self.params_progress.emit)
+            except Exception as e:
+                self.params_failed.emit("Failed to download parameters", str(e))
+            else:
+                self.params_synced.emit(diff)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    @Slot(int, int)
+    def _on_params_progress(self, received, total):
+        self.params_status.setText(f"{received}/{total}")
+
+    @Slot(dict)
+    def _on_params_synced(self, diff):
+        self.sync_params_btn.setEnabled(True)
+        self.params_status.setText(
+            f"{len(self.conn.params)} params · {len(diff['changed'])} changed since last sync")
+        self.refresh_param_table()
+        if diff['changed']:
+            print("Parameters changed since last sync:")
+            for name, (old, new) in sorted(diff['changed'].items()):
+                print(f"  {name}: {old} → {new}")
+
+    def on_apply_param_file(self):
+        """Load a .param file and write it to the vehicle in the background."""
+        if self.conn.master is None:
+            QMessageBox.warning(self, "Parameters", "Connect to a vehicle first.")
+            return
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Apply Parameter File", "", "Parameter files (*.param *.parm);;All files (*)")
+        if not path:
+            return
+        try:
+            values = load_param_file(path)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to read parameter file:\n{e}")
+            return
+        self.apply_file_btn.setEnabled(False)
+        self.params_status.setText(f"0/{len(values)}")
+
+        def worker():
+            try:
+                results = self.conn.set_params(values, progress=self.params_progress.emit)
+            except Exception as e:
+                self.params_failed.emit(f"Failed to write {len(values)} parameters", str(e))
+            else:
+                self.params_written.emit(results)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    @Slot(dict)
+    def _on_params_written(self, results):
+        self.apply_file_btn.setEnabled(True)
+        failed = {n: r for n, r in results.items() if not r['ok']}
+        self.params_status.setText(f"{len(results) - len(failed)}/{len(results)} written")
+        self.refresh_param_table()
+
+        box = QMessageBox(self)
+        box.setWindowTitle("Apply Parameter File")
+        if failed:
+            box.setIcon(QMessageBox.Warning)
+            box.setText(f"{len(failed)} of {len(results)} parameters could not be written.")
+        else:
+            box.setIcon(QMessageBox.Information)
+            box.setText(f"All {len(results)} parameters were written and verified.")
+        box.setDetailedText("\n".join(
+            f"{'✓' if r['ok'] else '✗'} {name}: "
+            + (f"{r['value']:g}" if r['ok'] else r['error'])
+            for name, r in sorted(results.items())
+        ))
+        box.exec()
+
+    @Slot(str, str)
+    def _on_params_failed(self, what, error_msg):
+        self.sync_params_btn.setEnabled(True)
+        self.apply_file_btn.setEnabled(True)
+        self.params_status.setText("Failed")
+        QMessageBox.critical(self, "Error", f"{what}:\n{error_msg}")
+
+    def refresh_param_table(self):
+        """Rebuild the table from the local parameter store, filtered by the search box."""
+        rows = self.conn.params.search(self.param_search_edit.text().strip())
+        self.param_table.setUpdatesEnabled(False)
+        self.param_table.setRowCount(len(rows))
+        for r, (name, value, ptype, index) in enumerate(rows):
+            for c, text in enumerate((
+                name,
+                f"{value:g}",
+                PARAM_TYPE_NAMES.get(ptype, str(ptype)),
+                "" if index is None else str(index),
+            )):
+                self.param_table.setItem(r, c, QTableWidgetItem(text))
+        self.param_table.setUpdatesEnabled(True)
+
+    def _on_param_row_clicked(self, row, _col):
+        """Copy the clicked parameter into the ID / value editors."""
+        self.param_id_edit.setText(self.param_table.item(row, 0).text())
+        self.param_value_edit.setText(self.param_table.item(row, 1).text())
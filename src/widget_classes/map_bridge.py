@@ -0,0 +1,124 @@
+from PySide6.QtCore import QObject, QTimer, Signal, Slot
+
+
+class MapBridge(QObject):
+    """
+    Python side of the QWebChannel link to map.js (registered as `bridge`).
+
+    Instead of formatting and evaluating a new script string on every update,
+    structured data is pushed through signals that map.js subscribes to.
+    Telemetry is sampled at a fixed rate and only the fields that changed
+    since the last push are sent, as one batch per tick. The positions of
+    the other vehicles on the link are sent alongside whenever one moves.
+
+    In the other direction map.js reports each edit of the plan (add, move,
+    delete, clear) to the slots below, which apply it to the MissionModel.
+    """
+
+    # Python → JS
+    telemetryChanged  = Signal(dict)              # {field: value} deltas
+    missionLoaded     = Signal(list, list, list)  # waypoints, fence, rally
+    tileSourceChanged = Signal(str)               # Leaflet tile URL template
+    vehiclesChanged   = Signal(dict)              # {"sysid:compid": [lat, lon]}, unselected
+
+    # telemetry fields the map uses
+    FIELDS = ('lat', 'lon', 'heading', 'current_mission_point')
+
+    def __init__(self, conn, mission, parent=None, rate_hz=15):
+        super().__init__(parent)
+        self.conn = conn
+        self.mission = mission
+        self.ready = False  # set once map.js has connected to the channel
+        self.tile_url = None  # current tile URL template, re-sent on page reload
+        self.view = None      # (south, west, north, east, zoom) as last reported
+        self._sent = {}
+        self._sent_vehicles = None
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self._push_telemetry)
+        self.set_rate(rate_hz)
+
+    def set_rate(self, rate_hz):
+        """Change how often telemetry is pushed to the map (Hz)."""
+        self.rate_hz = rate_hz
+        self._timer.start(max(1, int(1000 / rate_hz)))
+
+    def set_tile_source(self, url):
+        """Switch the map's tile layer (remembered for a reloaded page)."""
+        self.tile_url = url
+        if self.ready:
+            self.tileSourceChanged.emit(url)
+
+    def _push_telemetry(self):
+        if not self.ready:
+            return
+        tel = self.conn.telemetry.snapshot()
+        delta = {}
+        for key in self.FIELDS:
+            value = tel.get(key)
+            if value is not None and self._sent.get(key) != value:
+                delta[key] = value
+        if delta:
+            self._sent.update(delta)
+            self.telemetryChanged.emit(delta)
+        self._push_vehicles()
+
+    def _push_vehicles(self):
+        positions = {}
+        for vehicle in self.conn.vehicle_list():
+            if vehicle is self.conn.vehicle:
+                continue
+            tel = vehicle.telemetry.snapshot()
+            if tel.lat is not None and tel.lon is not None:
+                positions[f"{vehicle.sysid}:{vehicle.compid}"] = [tel.lat, tel.lon]
+        if positions != self._sent_vehicles:
+            self._sent_vehicles = positions
+            self.vehiclesChanged.emit(positions)
+
+    # ─── JS → Python ───────────────────────────────────────────────────────
+
+    @Slot()
+    def mapReady(self):
+        """Called by map.js once its signal handlers are connected."""
+        self.ready = True
+        self._sent = {}  # a reloaded page needs the full state again
+        self._sent_vehicles = None
+        if self.tile_url:
+            self.tileSourceChanged.emit(self.tile_url)
+        wps, fence, rally = self.mission.snapshot()
+        if wps or fence or rally:
+            self.missionLoaded.emit(
+                [[p['lat'], p['lon'], p['alt']] for p in wps],
+                [[p['lat'], p['lon']] for p in fence],
+                [[p['lat'], p['lon']] for p in rally],
+            )
+
+    @Slot(float, float, float, float, int)
+    def viewChanged(self, south, west, north, east, zoom):
+        """The visible map area, reported by map.js after every pan / zoom."""
+        self.view = (south, west, north, east, zoom)
+
+    @Slot(str)
+    def vehicleClicked(self, key):
+        """A marker of an unselected vehicle was clicked: select it."""
+        sysid, compid = (int(n) for n in key.split(':'))
+        try:
+            self.conn.select_vehicle((sysid, compid))
+        except KeyError:
+            pass  # dropped since the markers were last sent
+        self._sent = {}
+
+    @Slot(str, int, float, float, float)
+    def pointAdded(self, kind, index, lat, lng, alt):
+        self.mission.insert(kind, index, lat, lng, alt)
+
+    @Slot(str, int, float, float, float)
+    def pointMoved(self, kind, index, lat, lng, alt):
+        self.mission.move(kind, index, lat, lng, alt)
+
+    @Slot(str, int)
+    def pointRemoved(self, kind, index):
+        self.mission.remove(kind, index)
+
+    @Slot(str)
+    def pointsCleared(self, kind):
+        self.mission.clear(kind)
@@ -1,16 +1,23 @@
 import os
+import time
 import threading
-import json
 from pymavlink import mavutil
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, 
-    QLineEdit, QApplication, QSizePolicy, QMessageBox, QGroupBox
+    QLineEdit, QApplication, QSizePolicy, QMessageBox, QGroupBox,
+    QProgressBar, QFileDialog, QComboBox
 )
 from PySide6.QtWebEngineWidgets import QWebEngineView
-from PySide6.QtCore import Qt, QUrl, Signal, QTimer, Slot
+from PySide6.QtCore import Qt, QUrl, QTimer, Signal, Slot
 
 from PySide6.QtWebEngineWidgets import QWebEngineView
 from PySide6.QtWebEngineCore    import QWebEnginePage
+from PySide6.QtWebChannel       import QWebChannel
+
+from src.connection import TransferCancelled
+from src.link_supervisor import LinkSupervisor
+from src.mission_model import MissionModel
+from src.widget_classes.map_bridge import MapBridge
 
 
 class DebugWebEnginePage(QWebEnginePage):
@@ -24,6 +31,11 @@ class MissionPlanningTab(QWidget):
     mission_downloaded = Signal(list, list, list)
     # signal when mission download fails (error message)
     mission_download_failed = Signal(str)
+    # upload worker → GUI: (items sent, items total, items per second)
+    upload_progress = Signal(int, int, float)
+    mission_uploaded = Signal()
+    mission_upload_failed = Signal(str)
+    mission_upload_cancelled = Signal()
 
 
     def __init__(self, conn):
@@ -31,6 +43,15 @@ class MissionPlanningTab(QWidget):
         self.conn = conn
         self.mission_downloaded.connect(self._update_map_from_download)
         self.mission_download_failed.connect(self.on_download_failed)
+        self.upload_progress.connect(self._on_upload_progress)
+        self.mission_uploaded.connect(self._on_upload_finished)
+        self.mission_upload_failed.connect(self._on_upload_failed)
+        self.mission_upload_cancelled.connect(self._on_upload_cancelled)
+        self._upload_cancel = None  # threading.Event while an upload runs
+
+        # connects / reconnects in the background and reports link state
+        self.link = LinkSupervisor(conn, self)
+        self.link.state_changed.connect(self._on_link_state)
         # Main layout of mission planning tab
 
         # ─── Build the “Connect / Disconnect” panel ────────────────────────────
@@ -53,11 +74,37 @@ class MissionPlanningTab(QWidget):
         self.disconnect_btn.setCursor(Qt.PointingHandCursor)
         self.disconnect_btn.clicked.connect(self.on_disconnect_clicked)
 
+        # (5) Replay a recorded .tlog instead of a live link
+        self.open_log_btn = QPushButton("Open Log…")
+        self.open_log_btn.setCursor(Qt.PointingHandCursor)
+        self.open_log_btn.clicked.connect(self.on_open_log_clicked)
+        self.replay_speed_combo = QComboBox()
+        for label, speed in (("1×", 1.0), ("2×", 2.0), ("5×", 5.0), ("10×", 10.0), ("Max", None)):
+            self.replay_speed_combo.addItem(label, speed)
+        self.replay_speed_combo.currentIndexChanged.connect(self._on_replay_speed_changed)
+        self.replay_pause_btn = QPushButton("Pause")
+        self.replay_pause_btn.setCursor(Qt.PointingHandCursor)
+        self.replay_pause_btn.clicked.connect(self._on_replay_pause_clicked)
+        self._set_replay_controls(False)
+
+        # (6) Which vehicle commands, the HUD and the map follow when several
+        # share the link (refreshed as vehicles appear)
+        self.vehicle_combo = QComboBox()
+        self.vehicle_combo.setEnabled(False)
+        self.vehicle_combo.activated.connect(self._on_vehicle_selected)
+        self._vehicle_timer = QTimer(self)
+        self._vehicle_timer.timeout.connect(self._refresh_vehicles)
+        self._vehicle_timer.start(1000)
+
         connect_layout = QHBoxLayout()
         connect_layout.addWidget(QLabel("SITL URI:"))
         connect_layout.addWidget(self.uri_edit, 1)
+        connect_layout.addWidget(self.open_log_btn)
         connect_layout.addWidget(self.connect_btn)
         connect_layout.addWidget(self.disconnect_btn)
+        connect_layout.addWidget(self.replay_speed_combo)
+        connect_layout.addWidget(self.replay_pause_btn)
+        connect_layout.addWidget(self.vehicle_combo)
         connect_layout.addWidget(self.status_label)
         connect_widget = QWidget()
         connect_widget.setLayout(connect_layout)
@@ -74,6 +121,15 @@ class MissionPlanningTab(QWidget):
         # Interactive Leaflet Map
         self.map_view = QWebEngineView()
         self.map_view.setPage(DebugWebEnginePage(self.map_view))
+
+        # the plan as edited on the map, kept current by map.js edit events
+        self.mission = MissionModel()
+
+        # structured Python ↔ JS updates go over a QWebChannel
+        self.bridge = MapBridge(conn, self.mission, self)
+        self.channel = QWebChannel(self.map_view.page())
+        self.channel.registerObject("bridge", self.bridge)
+        self.map_view.page().setWebChannel(self.channel)
         self.load_map()
 
         # Mission waypoint controls
@@ -104,6 +160,16 @@ class MissionPlanningTab(QWidget):
         self.download_btn = QPushButton("Download from UAV")
         self.download_btn.clicked.connect(self._on_download_clicked)
 
+        self.cancel_upload_btn = QPushButton("Cancel Upload")
+        self.cancel_upload_btn.setEnabled(False)
+        self.cancel_upload_btn.clicked.connect(self._on_cancel_upload_clicked)
+
+        # upload progress: items sent / total and throughput
+        self.upload_bar = QProgressBar()
+        self.upload_bar.setRange(0, 1)
+        self.upload_bar.setValue(0)
+        self.upload_bar.setFormat("No upload running")
+
         # Layout and widget for side buttons tab
         self.buttons_widget = QGroupBox("Planning Controls")
         buttons_layout = QVBoxLayout()
@@ -116,10 +182,12 @@ class MissionPlanningTab(QWidget):
             self.clear_rally_btn,
             self.print_rally_btn,
             self.upload_btn,
-            self.download_btn
+            self.download_btn,
+            self.cancel_upload_btn
         ):
             btn.setCursor(Qt.PointingHandCursor)
             buttons_layout.addWidget(btn)
+        buttons_layout.addWidget(self.upload_bar)
 
         self.buttons_widget.setLayout(buttons_layout)
         
@@ -134,11 +202,7 @@ class MissionPlanningTab(QWidget):
         root_layout.addLayout(main_layout)      # below: map + side buttons
 
         self.setLayout(root_layout)
-
-        # ─── Live drone marker updater ─────────────────────────────────────────
-        self._pos_timer = QTimer(self)
-        self._pos_timer.timeout.connect(self.update_drone_marker)
-        self._pos_timer.start(500)
+        # the live drone marker is driven by self.bridge at its update rate
     
     # ─── “Connect” / “Disconnect” handlers ───────────────────────────────────
 
@@ -148,137 +212,210 @@ class MissionPlanningTab(QWidget):
             self.status_label.setText("Status: Enter a URI first")
             return
 
-        self.status_label.setText("Status: Connecting…")
-        QApplication.processEvents()
-
-        try:
-            self.conn.connect_sitl(uri)
-        except Exception as e:
-            self.status_label.setText(f"Status: Error connecting: {e}")
-            return
-
-        # If we got here, the connection succeeded:
-        self.status_label.setText("Status: Connected")
+        # the supervisor connects in the background and keeps the link alive
         self.connect_btn.setEnabled(False)
         self.uri_edit.setEnabled(False)
+        self.open_log_btn.setEnabled(False)
         self.disconnect_btn.setEnabled(True)
+        self.link.start(uri)
+
+    def on_open_log_clicked(self):
+        """Pick a .tlog and replay it through the normal connection path."""
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Replay Telemetry Log", "logs", "Telemetry logs (*.tlog);;All files (*)")
+        if path:
+            self.uri_edit.setText(path)
+            self.on_connect_clicked()
+
+    def _set_replay_controls(self, enabled):
+        self.replay_speed_combo.setEnabled(enabled)
+        self.replay_pause_btn.setEnabled(enabled)
+        self.replay_pause_btn.setText("Pause")
+
+    def _on_replay_speed_changed(self, _index):
+        if self.conn.is_replay:
+            self.conn.master.set_speed(self.replay_speed_combo.currentData())
+
+    def _on_replay_pause_clicked(self):
+        if not self.conn.is_replay:
+            return
+        replay = self.conn.master
+        if replay.is_paused():
+            replay.resume()
+            self.replay_pause_btn.setText("Pause")
+        else:
+            replay.pause()
+            self.replay_pause_btn.setText("Resume")
+
+    def _refresh_vehicles(self):
+        vehicles = self.conn.vehicle_list()
+        keys = [v.key for v in vehicles]
+        combo = self.vehicle_combo
+        if keys != [combo.itemData(i) for i in range(combo.count())]:
+            combo.blockSignals(True)
+            combo.clear()
+            for v in vehicles:
+                combo.addItem("", v.key)
+            combo.blockSignals(False)
+        # a vehicle that went quiet is only marked; the link stays up for the rest
+        for i, v in enumerate(vehicles):
+            label = f"Vehicle {v.sysid}" if v.compid == 1 else f"Vehicle {v.sysid}:{v.compid}"
+            if v.is_lost():
+                label += " (lost)"
+            combo.setItemText(i, label)
+        # follow selections made elsewhere (e.g. clicking a marker on the map)
+        index = combo.findData(self.conn.vehicle.key)
+        if index >= 0 and index != combo.currentIndex():
+            combo.setCurrentIndex(index)
+        combo.setEnabled(len(keys) > 1)
+
+    def _on_vehicle_selected(self, index):
+        key = self.vehicle_combo.itemData(index)
+        if key is not None:
+            self.conn.select_vehicle(key)
 
     def on_disconnect_clicked(self):
-        try:
-            self.conn.disconnect_sitl()
-        except Exception as e:
-            print("Error while disconnecting:", e)
-
-        self.status_label.setText("Status: Disconnected")
-        self.connect_btn.setEnabled(True)
-        self.uri_edit.setEnabled(True)
+        # Connect is re-enabled once the supervisor reports DISCONNECTED
         self.disconnect_btn.setEnabled(False)
+        self.status_label.setText("Status: Disconnecting…")
+        self.link.stop()
+
+    @Slot(str, str)
+    def _on_link_state(self, state, detail):
+        if state == LinkSupervisor.CONNECTING:
+            self.status_label.setText("Status: Connecting…")
+        elif state == LinkSupervisor.CONNECTED:
+            if self.conn.is_replay:
+                self.status_label.setText("Status: Replaying log")
+                self.conn.master.set_speed(self.replay_speed_combo.currentData())
+                self._set_replay_controls(True)
+            else:
+                self.status_label.setText("Status: Connected")
+        elif state == LinkSupervisor.RECONNECTING:
+            self.status_label.setText(f"Status: Link down ({detail})")
+        else:
+            self.status_label.setText("Status: Disconnected")
+            self.connect_btn.setEnabled(True)
+            self.uri_edit.setEnabled(True)
+            self.open_log_btn.setEnabled(True)
+            self.disconnect_btn.setEnabled(False)
+            self._set_replay_controls(False)
 
     def load_map(self):
         map_file = os.path.abspath("map.html")
         self.map_view.setUrl(QUrl.fromLocalFile(map_file))
 
-    def update_drone_marker(self):
-        lat = self.conn.telemetry.get('lat')
-        lon = self.conn.telemetry.get('lon')
-        if lat is not None and lon is not None:
-            js = f"updateDroneMarker({lat}, {lon});"
-            # print("Calling JS:", js)
-            self.map_view.page().runJavaScript(js)
-
     def clear_waypoints(self):
         self.map_view.page().runJavaScript("clearWaypoints();")
 
     def print_waypoints(self):
-        print("✅ Python: Requesting waypoints from JS")
-        self.map_view.page().runJavaScript("JSON.stringify(getWaypoints());", 0, self.handle_waypoints)
-
-    def handle_waypoints(self, json_str):
-        try:
-            wps = json.loads(json_str) if json_str else []
-        except json.JSONDecodeError:
-            print("⚠️ Failed to parse waypoints JSON:", json_str)
-            wps = []
-        print("✅ Python: Received waypoints from JS")
-        print("Waypoints:", wps)
-        return wps
+        print("Waypoints:", self.mission.points('waypoint'))
 
     def clear_geofence(self):
         self.map_view.page().runJavaScript("clearGeofence();")
 
     def print_geofence(self):
-        self.map_view.page().runJavaScript("JSON.stringify(getGeofence());", 0, self.handle_geofence)
-
-    def handle_geofence(self, geofence):
-        try:
-            geofence = json.loads(geofence) if geofence else []
-        except json.JSONDecodeError:
-            print("⚠️ Failed to parse geofence JSON:", geofence)
-            geofence = []
-        print("✅ Python: Received geofence from JS")
-        print("Geofence Points:", geofence)
-        return geofence
+        print("Geofence Points:", self.mission.points('fence'))
 
     def clear_rally_points(self):
         self.map_view.page().runJavaScript("clearRallyPoints();")
 
     def print_rally_points(self):
-        self.map_view.page().runJavaScript("JSON.stringify(getRallyPoints());", 0, self.handle_rally_points)
-
-    def handle_rally_points(self, rally_points):
-        try:
-            rally_points = json.loads(rally_points) if rally_points else []
-        except json.JSONDecodeError:
-            print("⚠️ Failed to parse rally points JSON:", rally_points)
-            rally_points = []
-        print("✅ Python: Received rally points from JS")
-        print("Rally Points:", rally_points)
-        return rally_points
-    
+        print("Rally Points:", self.mission.points('rally'))
+
     def _on_upload_clicked(self):
-        # fetch waypoints → geofence → rally, then uplink
-        self.map_view.page().runJavaScript("JSON.stringify(getWaypoints());", 0, self._got_waypoints)
-
-    def _got_waypoints(self, wps):
-        self._waypoints = [{'lat':p[0], 'lon':p[1], 'alt':p[2]} for p in self.handle_waypoints(wps)]
-        self.map_view.page().runJavaScript("JSON.stringify(getGeofence());", 0, self._got_fence)
-
-    def _got_fence(self, fence):
-        self._fence = [{'lat':p[0], 'lon':p[1]} for p in self.handle_geofence(fence)]
-        self.map_view.page().runJavaScript("JSON.stringify(getRallyPoints());", 0, self._got_rally)
-
-    def _got_rally(self, rallies_json):
-        self._rallies = [{'lat':p[0], 'lon':p[1]} for p in self.handle_rally_points(rallies_json)]
-
-        # ── Now actually upload everything, with popups on success/failure ────
-        try:
-            self.conn.upload_mission(self._waypoints)
-            self.conn.upload_fence(self._fence)
-            self.conn.upload_rally(self._rallies)
-        except Exception as e:
-            QMessageBox.critical(
-                self,
-                "Upload Failed",
-                f"Mission upload failed:\n{e}"
-            )
-        else:
-            QMessageBox.information(
-                self,
-                "Upload Successful",
-                "Mission, geofence, and rally points were uploaded successfully!"
-            )
-            print("✅ Python: Uploaded mission, geofence, and rally points to UAV")
-            print("Waypoints:", self._waypoints)
-            print("Geofence:", self._fence)
-            print("Rally Points:", self._rallies)
+        # the model already mirrors the map, so no round trip to JS is needed
+        self._waypoints, self._fence, self._rallies = self.mission.snapshot()
+        self._start_upload(self._waypoints, self._fence, self._rallies)
+
+    def _start_upload(self, waypoints, fence, rallies):
+        """Run the MAVLink upload handshake in a worker so the GUI keeps rendering."""
+        if self._upload_cancel is not None:
+            return  # an upload is already running
+        cancel = threading.Event()
+        self._upload_cancel = cancel
+        total = len(waypoints) + len(fence) + len(rallies)
+        self.upload_btn.setEnabled(False)
+        self.cancel_upload_btn.setEnabled(True)
+        self.upload_bar.setRange(0, max(total, 1))
+        self.upload_bar.setValue(0)
+        self.upload_bar.setFormat(f"0/{total} items")
+
+        def worker():
+            started = time.monotonic()
+            done = 0  # items finished in earlier lists
+
+            def progress(sent, _count):
+                elapsed = time.monotonic() - started
+                rate = (done + sent) / elapsed if elapsed > 0 else 0.0
+                self.upload_progress.emit(done + sent, total, rate)
+
+            try:
+                for upload, points in (
+                    (self.conn.upload_mission, waypoints),
+                    (self.conn.upload_fence,   fence),
+                    (self.conn.upload_rally,   rallies),
+                ):
+                    upload(points, progress=progress, cancel=cancel)
+                    done += len(points)
+            except TransferCancelled:
+                self.mission_upload_cancelled.emit()
+            except Exception as e:
+                self.mission_upload_failed.emit(str(e))
+            else:
+                self.mission_uploaded.emit()
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _on_cancel_upload_clicked(self):
+        if self._upload_cancel is not None:
+            self._upload_cancel.set()
+            self.cancel_upload_btn.setEnabled(False)
+
+    @Slot(int, int, float)
+    def _on_upload_progress(self, sent, total, rate):
+        self.upload_bar.setValue(sent)
+        self.upload_bar.setFormat(f"{sent}/{total} items · {rate:.1f} items/s")
+
+    def _upload_done(self):
+        self._upload_cancel = None
+        self.upload_btn.setEnabled(True)
+        self.cancel_upload_btn.setEnabled(False)
+
+    @Slot()
+    def _on_upload_finished(self):
+        self._upload_done()
+        self.upload_bar.setValue(self.upload_bar.maximum())
+        QMessageBox.information(
+            self,
+            "Upload Successful",
+            "Mission, geofence, and rally points were uploaded successfully!"
+        )
+        print("✅ Python: Uploaded mission, geofence, and rally points to UAV")
+        print("Waypoints:", self._waypoints)
+        print("Geofence:", self._fence)
+        print("Rally Points:", self._rallies)
+
+    @Slot(str)
+    def _on_upload_failed(self, error_msg):
+        self._upload_done()
+        self.upload_bar.setFormat("Upload failed")
+        QMessageBox.critical(
+            self,
+            "Upload Failed",
+            f"Mission upload failed:\n{error_msg}"
+        )
+
+    @Slot()
+    def _on_upload_cancelled(self):
+        self._upload_done()
+        self.upload_bar.setFormat("Upload cancelled")
 
     def _on_download_clicked(self):
         def worker():
             try:
-                mts   = self.conn._download_items
-                wps   = mts(mavutil.mavlink.MAV_MISSION_TYPE_MISSION)
-                fence = mts(mavutil.mavlink.MAV_MISSION_TYPE_FENCE)
-                rally = mts(mavutil.mavlink.MAV_MISSION_TYPE_RALLY)
+                # mission, fence and rally lists are fetched concurrently
+                wps, fence, rally = self.conn.download_plan()
 
                 wps   = [[i['x'], i['y'], i['z']] for i in wps]
                 fence = [[i['x'], i['y'], i['z']] for i in fence]
@@ -304,10 +441,12 @@ class MissionPlanningTab(QWidget):
         QMessageBox.critical(self, "Download Failed", f"Mission download failed:\n{error_msg}")
 
     def _update_map_from_download(self, wps, fence, rally):
+        # the model first: map.js doesn't echo bulk loads back
+        self.mission.replace('waypoint', wps)
+        self.mission.replace('fence', fence)
+        self.mission.replace('rally', rally)
         # update the map
-        self.map_view.page().runJavaScript(f"setWaypoints({json.dumps(wps)})")
-        self.map_view.page().runJavaScript(f"setGeofence({json.dumps(fence)})")
-        self.map_view.page().runJavaScript(f"setRally({json.dumps(rally)})")
+        self.bridge.missionLoaded.emit(wps, fence, rally)
 
         # then notify the user
         QMessageBox.information(self, "Download Successful",
@@ -1,12 +1,22 @@
 import cv2
+import time
 import threading
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout,
-    QPushButton, QLabel, QSizePolicy,
-    QSlider, QGroupBox, QFormLayout
+    QPushButton, QLabel,
+    QSlider, QGroupBox, QFormLayout,
+    QComboBox, QSpinBox
 )
 from PySide6.QtCore import QTimer, Qt, Signal
-from PySide6.QtGui import QImage, QPixmap, QPainter, QFont, QColor
+from PySide6.QtGui import QImage
+
+from src.utils.frame_grabber import FrameGrabber
+from src.utils.hud_overlay import HudOverlay
+from src.widget_classes.video_surface import make_video_surface
+from src.utils.video_pipelines import (
+    PROFILES, CODECS, DEFAULT_PROFILE, DEFAULT_CODEC, DEFAULT_PORT,
+    build_pipeline, outputs_rgb
+)
 
 
 class VideoFeedTab(QWidget):
@@ -31,17 +41,15 @@ class VideoFeedTab(QWidget):
         self._make_gimbal_sliders()
 
         # ——— LIVE VIDEO DISPLAY —————————————————————————————————————
-        self.video_label = QLabel("Waiting for video stream…")
-        self.video_label.setAlignment(Qt.AlignCenter)
-        self.video_label.setStyleSheet("background-color: black; color: white;")
-        self.video_label.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
-        self.video_label.setMinimumSize(320, 240)
+        # OpenGL surface: frames are scaled on the GPU, HUD composited on top
+        self.video_view = make_video_surface()
+        self.video_view.setText("Waiting for video stream…")
 
         # ——— ASSEMBLE LAYOUT —————————————————————————————————————
         main_layout = QHBoxLayout(self)
 
         # Left side: the video
-        main_layout.addWidget(self.video_label, 1)
+        main_layout.addWidget(self.video_view, 1)
 
         # Right side: stack three group-boxes vertically
         right_panel = QVBoxLayout()
@@ -55,8 +63,14 @@ class VideoFeedTab(QWidget):
         self.setLayout(main_layout)
 
         # ——— CAPTURE + TIMER SETUP —————————————————————————————————
-        self.cap = None
+        # frames are decoded on the grabber thread; the timer only presents
+        self.grabber = None
+        self._last_seq = 0
+        self._profile = DEFAULT_PROFILE
         self._opening = False
+        # telemetry overlay, cached between frames
+        self.hud = HudOverlay()
+        self.video_view.set_overlay(lambda size: self.hud.layer(size, self.conn.telemetry))
         self.timer = QTimer(self)
         self.timer.timeout.connect(self.update_frame)
 
@@ -106,13 +120,39 @@ class VideoFeedTab(QWidget):
 
 
     def _make_video_controls(self):
-        """Create a small QGroupBox containing the Start Video button."""
+        """Create a QGroupBox with Start Video and the pipeline profile selectors."""
         self.start_button = QPushButton("Start Video")
         self.start_button.clicked.connect(self._on_start_button_clicked)
         self.start_button.setCursor(Qt.PointingHandCursor)
 
+        self.profile_combo = QComboBox()
+        self.profile_combo.addItems(PROFILES.keys())
+        self.profile_combo.setCurrentText(DEFAULT_PROFILE)
+
+        self.codec_combo = QComboBox()
+        self.codec_combo.addItems(CODECS.keys())
+        self.codec_combo.setCurrentText(DEFAULT_CODEC)
+
+        self.port_spin = QSpinBox()
+        self.port_spin.setRange(1, 65535)
+        self.port_spin.setValue(DEFAULT_PORT)
+
+        # measured fps / wait / convert time / pipeline lag / frame age for the running profile
+        self.video_stats_label = QLabel("—")
+
+        for w in (self.profile_combo, self.codec_combo):
+            w.currentTextChanged.connect(self._on_pipeline_changed)
+        self.port_spin.editingFinished.connect(self._on_pipeline_changed)
+
+        form = QFormLayout()
+        form.addRow("Profile:", self.profile_combo)
+        form.addRow("Codec:",   self.codec_combo)
+        form.addRow("Port:",    self.port_spin)
+        form.addRow("Stats:",   self.video_stats_label)
+
         layout = QVBoxLayout()
         layout.addWidget(self.start_button)
+        layout.addLayout(form)
         layout.addStretch(1)
 
         self.video_group = QGroupBox("Video Controls")
@@ -166,14 +206,14 @@ class VideoFeedTab(QWidget):
     def _on_start_button_clicked(self):
         """User pressed Start Video for the first time."""
         self.start_button.setEnabled(False)
-        self.video_label.setText("⚠️ Connecting to video…")
+        self.video_view.setText("⚠️ Connecting to video…")
         self.video_started = True
         self.start_video()
 
 
     def start_video(self):
         """Called by the main window on tab switches (and by Start Video)."""
-        if self.cap is not None:
+        if self.grabber is not None:
             # already opened → just resume
             if not self.timer.isActive():
                 self.timer.start(30)
@@ -182,30 +222,34 @@ class VideoFeedTab(QWidget):
             return
 
         self._opening = True
-        threading.Thread(target=self._open_stream_thread, daemon=True).start()
+        # read the selectors here, on the GUI thread
+        self._profile = self.profile_combo.currentText()
+        pipeline = build_pipeline(self._profile, self.port_spin.value(), self.codec_combo.currentText())
+        threading.Thread(target=self._open_stream_thread, args=(pipeline,), daemon=True).start()
+
+
+    def _on_pipeline_changed(self, *_):
+        """Reopen the stream with the newly selected profile/codec/port."""
+        if self.grabber is not None:
+            self.stop_video()
+            self.start_video()
 
 
     def stop_video(self):
         """Stop frame timer & release capture when leaving the tab."""
         if self.timer.isActive():
             self.timer.stop()
-        if self.cap is not None:
-            try:
-                self.cap.release()
-            except:
-                pass
-            self.cap = None
+        if self.grabber is not None:
+            # the grabber thread releases the capture once its grab() returns
+            self.grabber.stop()
+            self.grabber = None
         self._opening = False
-        self.video_label.setText("Video paused")
+        self.video_view.setText("Video paused")
 
 
-    def _open_stream_thread(self):
+    def _open_stream_thread(self, pipeline):
         """Background thread: open the GStreamer pipeline without blocking UI."""
-        pipeline = (
-            "udpsrc port=5600 "
-            "! application/x-rtp, encoding-name=H264, payload=96 "
-            "! rtpjitterbuffer ! rtph264depay ! avdec_h264 ! videoconvert ! appsink"
-        )
+        print("Opening video pipeline:", pipeline)
         cap = cv2.VideoCapture(pipeline, cv2.CAP_GSTREAMER)
         if not cap.isOpened():
             self.video_failed.emit()
@@ -214,108 +258,55 @@ class VideoFeedTab(QWidget):
 
 
     def _on_video_opened(self, cap_obj):
-        """Slot once the pipeline opens: start the frame timer."""
-        self.cap = cap_obj
+        """Slot once the pipeline opens: start decoding and the frame timer."""
+        if self.grabber is not None:
+            # a second open (Start pressed again, or a tab switch while one
+            # was pending) replaces the running grabber instead of leaking it
+            self.grabber.stop()
+        self.grabber = FrameGrabber(cap_obj, convert=not outputs_rgb(self._profile))
+        self.grabber.start()
+        self._last_seq = 0
         self._opening = False
-        self.video_label.setText("")  # clear “Connecting…” text
+        self.video_view.setText("")  # clear “Connecting…” text
         if not self.timer.isActive():
             self.timer.start(30)        # ~33 FPS
 
 
     def _on_video_failed(self):
         """Slot if opening the pipeline fails."""
-        self.cap = None
+        self.grabber = None
         self._opening = False
-        self.video_label.setText("❌ Unable to open video stream.")
+        self.video_stats_label.setText("—")
+        self.video_view.setText("❌ Unable to open video stream.")
 
 
     def update_frame(self):
-        """Grab a frame, overlay HUD, and repaint the label."""
-        if not self.cap:
+        """Present the newest decoded frame with the HUD overlaid."""
+        if not self.grabber:
             return
 
-        ret, frame = self.cap.read()
-        if not ret:
-            # stream died mid-flight
-            self.timer.stop()
-            try: self.cap.release()
-            except: pass
-            self.cap = None
-            self.video_label.setText("⚠️ Video lost. Press Start to retry.")
-            return
-
-        # Convert BGR→RGB to QImage
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        h, w, ch = frame_rgb.shape
-        qimg = QImage(frame_rgb.data, w, h, ch * w, QImage.Format_RGB888)
-
-        # Build HUD text groups
-        tel = self.conn.telemetry
-        grpA = [  # top-left
-            f"Mode:  {tel.get('mode','—')}",
-            f"Armed: {tel.get('armed','—')}",
-            f"Alt:   {tel.get('alt',0):.1f} m",
-        ]
-        grpB = [  # top-right
-            f"Lat: {tel.get('lat',0):.6f}",
-            f"Lon: {tel.get('lon',0):.6f}",
-            f"Hdg: {tel.get('heading',0):.1f}°",
-        ]
-        grpC = [  # bottom-left
-            f"WP: {tel.get('current_mission_point','-')}/{tel.get('total_mission_points','-')}",
-        ]
-        grpD = [  # bottom-right
-            f"Batt: {tel.get('battery_voltage',0):.2f}V ({tel.get('battery_remaining',0)}%)",
-            f"GPS: fix {tel.get('gps_fix_type',0)} / {tel.get('gps_satellites_visible',0)} sat",
-            f"SPD: {tel.get('groundspeed',0):.1f} m/s",
-            f"Clb: {tel.get('climb_rate',0):.1f} m/s",
-            f"Thr: {tel.get('throttle',0)}%",
-        ]
-
-        painter = QPainter(qimg)
-        painter.setFont(QFont("Consolas", 14))
-        painter.setPen(QColor("lime"))
-
-        fm = painter.fontMetrics()
-        lh = fm.height()
-        margin = 10
-
-        # Draw each group in its corner
-        # ── A: top-left
-        xA, yA = margin, margin + fm.ascent()
-        for line in grpA:
-            painter.drawText(xA, yA, line)
-            yA += lh
-
-        # ── B: top-right
-        maxBW = max(fm.horizontalAdvance(l) for l in grpB)
-        xB = w - maxBW - margin
-        yB = margin + fm.ascent()
-        for line in grpB:
-            painter.drawText(xB, yB, line)
-            yB += lh
-
-        # ── C: bottom-left
-        xC = margin
-        yC = h - margin - (len(grpC)-1)*lh
-        for line in grpC:
-            painter.drawText(xC, yC, line)
-            yC += lh
-
-        # ── D: bottom-right
-        maxDW = max(fm.horizontalAdvance(l) for l in grpD)
-        xD = w - maxDW - margin
-        yD = h - margin - (len(grpD)-1)*lh
-        for line in grpD:
-            painter.drawText(xD, yD, line)
-            yD += lh
-
-        painter.end()
-
-        # Paint into the label
-        pix = QPixmap.fromImage(qimg).scaled(
-            self.video_label.size(),
-            Qt.KeepAspectRatio,
-            Qt.SmoothTransformation
+        slot = self.grabber.pool.take(self._last_seq)
+        if slot is None:
+            if self.grabber.lost:
+                # stream died mid-flight
+                self.timer.stop()
+                self.grabber = None
+                self.video_view.setText("⚠️ Video lost. Press Start to retry.")
+            return  # nothing new since the last tick
+        self._last_seq = slot.seq
+        lag = self.grabber.lag_ms
+        self.video_stats_label.setText(
+            f"{self.grabber.fps:.1f} fps · wait {self.grabber.wait_ms:.1f} ms · "
+            f"convert {self.grabber.convert_ms:.1f} ms · "
+            + ("" if lag is None else f"lag {lag:.0f} ms · ")
+            + f"age {(time.monotonic() - slot.stamp) * 1000:.0f} ms"
         )
-        self.video_label.setPixmap(pix)
+
+        # wrap the pool buffer (already RGB) without copying. The QImage header
+        # is new each frame so the GL texture cache sees a new cacheKey; the
+        # surface holds the slot so the pixels outlive the image. The surface
+        # scales it and composites the cached HUD layer when it repaints.
+        arr = slot.array
+        h, w, _ = arr.shape
+        qimg = QImage(arr.data, w, h, arr.strides[0], QImage.Format_RGB888)
+        self.video_view.set_frame(qimg, owner=slot)
@@ -0,0 +1,103 @@
+import os
+from PySide6.QtWidgets import QWidget, QSizePolicy
+from PySide6.QtCore import Qt, QRect
+from PySide6.QtGui import QPainter, QColor, QOpenGLContext, QSurfaceFormat
+from PySide6.QtOpenGLWidgets import QOpenGLWidget
+
+
+class _SurfacePainting:
+    """
+    Shared frame/HUD/text painting for both surfaces. Frames are drawn
+    straight into the widget's target rectangle, so scaling happens in the
+    paint engine (on the GPU for the OpenGL surface) rather than in a
+    QPixmap.scaled() copy per frame.
+    """
+
+    def _init_surface(self):
+        self._image = None
+        self._owner = None    # keeps the buffer behind self._image alive
+        self._text = ""
+        self._overlay = None  # callable(QSize) → QImage, drawn over the frame
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.setMinimumSize(320, 240)
+
+    def set_overlay(self, overlay):
+        """`overlay(size)` returns a transparent QImage drawn over each frame."""
+        self._overlay = overlay
+
+    def set_frame(self, image, owner=None):
+        """Show `image`; `owner` is whatever object owns its pixel buffer."""
+        self._image, self._owner = image, owner
+        self._text = ""
+        self.update()
+
+    def setText(self, text):
+        """Replace the video with a centred status message (QLabel-compatible)."""
+        self._image = self._owner = None
+        self._text = text
+        self.update()
+
+    def _target_rect(self):
+        """The frame's rectangle, scaled to fit the widget keeping aspect ratio."""
+        size = self._image.size().scaled(self.size(), Qt.KeepAspectRatio)
+        return QRect(
+            (self.width() - size.width()) // 2,
+            (self.height() - size.height()) // 2,
+            size.width(),
+            size.height()
+        )
+
+    def _paint(self):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), Qt.black)
+        if self._image is not None and not self._image.isNull():
+            target = self._target_rect()
+            painter.setRenderHint(QPainter.SmoothPixmapTransform)
+            painter.drawImage(target, self._image)
+            if self._overlay is not None:
+                painter.drawImage(target.topLeft(), self._overlay(target.size()))
+        elif self._text:
+            painter.setPen(QColor("white"))
+            painter.drawText(self.rect(), Qt.AlignCenter, self._text)
+        painter.end()
+
+
+class GLVideoSurface(_SurfacePainting, QOpenGLWidget):
+    """Video surface on QOpenGLWidget: each frame is uploaded once as a texture and scaled on the GPU."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._init_surface()
+
+    def paintGL(self):
+        self._paint()
+
+
+class RasterVideoSurface(_SurfacePainting, QWidget):
+    """Same surface on the CPU raster engine, for when no OpenGL context is available."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._init_surface()
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+
+    def paintEvent(self, event):
+        self._paint()
+
+
+def opengl_available():
+    """True if an OpenGL context (hardware or Mesa llvmpipe) can be created."""
+    ctx = QOpenGLContext()
+    ctx.setFormat(QSurfaceFormat.defaultFormat())
+    return ctx.create()
+
+
+def make_video_surface(parent=None):
+    """
+    The OpenGL surface when GL works, the raster one otherwise. Setting
+    GCS_VIDEO_BACKEND=raster forces the CPU path.
+    """
+    if os.environ.get("GCS_VIDEO_BACKEND", "").lower() != "raster" and opengl_available():
+        return GLVideoSurface(parent)
+    print("OpenGL unavailable, presenting video with the raster engine")
+    return RasterVideoSurface(parent)
@@ -0,0 +1,187 @@
+import time
+import tracemalloc
+
+import pytest
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")  # imported by frame_grabber for the grabber thread
+
+from src.utils.frame_grabber import FrameGrabber, FramePool
+
+SHAPE = (720, 1280, 3)
+
+
+def cycle(pool, last_seq):
+    """One decoder publish plus one GUI take, as in steady-state playback."""
+    slot = pool.writable(SHAPE)
+    slot.array[0, 0, 0] = last_seq & 0xFF
+    pool.publish(slot)
+    return pool.take(last_seq)
+
+
+def test_slots_are_reused():
+    pool = FramePool()
+    seen = set()
+    seq = 0
+    for _ in range(100):
+        slot = cycle(pool, seq)
+        seq = slot.seq
+        seen.add(id(slot.array))
+    # the same few preallocated buffers go round forever
+    assert len(seen) <= 3
+
+
+def test_writable_never_hands_out_latest_or_presented():
+    pool = FramePool()
+    first = pool.writable(SHAPE)
+    pool.publish(first)
+    shown = pool.take()
+    second = pool.writable(SHAPE)
+    pool.publish(second)
+    third = pool.writable(SHAPE)
+    assert third is not shown and third is not second
+
+
+def test_steady_state_allocates_no_frames():
+    pool = FramePool()
+    seq = 0
+    for _ in range(10):  # allocate the slots
+        seq = cycle(pool, seq).seq
+
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for _ in range(1000):
+            seq = cycle(pool, seq).seq
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    frame_bytes = np.prod(SHAPE)
+    # not a single frame buffer (2.7 MB) was allocated, even transiently
+    assert peak - before < frame_bytes // 100
+    assert after - before < 4096
+
+
+def test_resolution_change_reallocates_once():
+    pool = FramePool()
+    seq = cycle(pool, 0).seq
+    old = pool.writable(SHAPE)
+    slot = pool.writable((480, 640, 3))
+    assert slot.array.shape == (480, 640, 3)
+    assert slot is not old
+    pool.publish(slot)
+    assert pool.take(seq) is slot
+
+
+class FakeCapture:
+    """
+    Stands in for cv2.VideoCapture: serves `frames` fixed frames, switching
+    to `switch_to` shape halfway through if given. retrieve() fills the
+    array it is handed when the shape fits, the way cv2 does, and counts
+    the times it had to allocate one. grab() also plays the GUI, taking the
+    newest frame and noting which buffer it was in.
+    """
+
+    def __init__(self, grabber_shape, frames, switch_to=None, warmup=10):
+        self.shape = grabber_shape
+        self.frames = frames
+        self.switch_to = switch_to
+        self.warmup = warmup
+        self.grabber = None
+        self.n = 0
+        self.allocations = 0
+        self.taken = []     # (buffer address, shape) of each distinct frame buffer the "GUI" took
+        self.seq = 0
+        self.traced = None  # (before, after, peak) over the frames after warm-up
+
+    def grab(self):
+        slot = self.grabber.pool.take(self.seq)
+        if slot is not None:
+            self.seq = slot.seq
+            taken = (slot.array.ctypes.data, slot.array.shape)
+            if taken not in self.taken:
+                self.taken.append(taken)
+        if self.n == self.warmup:
+            tracemalloc.reset_peak()
+            self.before = tracemalloc.get_traced_memory()[0]
+        if self.n == self.frames:
+            self.traced = (self.before,) + tracemalloc.get_traced_memory()
+            return False
+        if self.switch_to is not None and self.n == self.frames // 2:
+            self.shape = self.switch_to
+        self.n += 1
+        return True
+
+    def retrieve(self, dst=None):
+        if dst is None or dst.shape != self.shape:
+            dst = np.empty(self.shape, np.uint8)
+            self.allocations += 1
+        dst[...] = self.n & 0xFF
+        return True, dst
+
+    def get(self, prop):
+        return 0.0  # no PTS, as from a backend that doesn't report one
+
+    def release(self):
+        pass
+
+
+def run_grabber(cap, convert):
+    grabber = FrameGrabber(cap, convert=convert)
+    cap.grabber = grabber
+    tracemalloc.start()
+    try:
+        grabber.run()  # on this thread, so the fake capture sees it frame by frame
+    finally:
+        tracemalloc.stop()
+    return grabber
+
+
+@pytest.mark.parametrize('convert', [True, False])
+def test_grabber_fills_pool_buffers_without_allocating(convert):
+    cap = FakeCapture(SHAPE, frames=300)
+    grabber = run_grabber(cap, convert)
+
+    pool_buffers = {slot.array.ctypes.data for slot in grabber.pool._slots}
+    assert len(pool_buffers) == 3
+    # every frame shown came straight out of a pool slot
+    assert cap.taken and {addr for addr, _ in cap.taken} <= pool_buffers
+    # the capture only allocates for the very first frame
+    assert cap.allocations == 1
+    before, after, peak = cap.traced
+    assert peak - before < np.prod(SHAPE) // 100
+    assert after - before < 4096
+
+
+@pytest.mark.parametrize('convert', [True, False])
+def test_grabber_follows_a_resolution_change(convert):
+    small = (480, 640, 3)
+    cap = FakeCapture(SHAPE, frames=100, switch_to=small, warmup=0)
+    grabber = run_grabber(cap, convert)
+
+    shapes = [shape for _, shape in cap.taken]
+    assert shapes[0] == SHAPE and shapes[-1] == small
+    # one new decode buffer and one new set of pool slots for the new size
+    assert cap.allocations == 2
+    assert all(slot.array.shape == small for slot in grabber.pool._slots)
+    pool_buffers = {slot.array.ctypes.data for slot in grabber.pool._slots}
+    assert {addr for addr, shape in cap.taken if shape == small} <= pool_buffers
+
+
+class DelayedCapture(FakeCapture):
+    """Frames whose PTS says they reached us `delay_ms` late from frame 10 on."""
+
+    delay_ms = 50.0
+
+    def get(self, prop):
+        assert prop == cv2.CAP_PROP_POS_MSEC
+        late = self.delay_ms if self.n > 10 else 0.0
+        return time.monotonic() * 1000.0 - late
+
+
+def test_grabber_reports_pipeline_lag_from_pts():
+    assert run_grabber(FakeCapture(SHAPE, frames=20), convert=True).lag_ms is None
+    grabber = run_grabber(DelayedCapture(SHAPE, frames=100), convert=True)
+    assert grabber.lag_ms == pytest.approx(DelayedCapture.delay_ms, abs=10)
@@ -0,0 +1,130 @@
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.tile_cache import TileCache, TileProxy
+
+TILE_BYTES = 1000
+
+
+def tile(z, x, y):
+    """What the fake server returns for a tile: PNG magic plus its coordinates."""
+    return (b"\x89PNG" + f"{z}/{x}/{y}".encode()).ljust(TILE_BYTES, b"\0")
+
+
+class FakeTileServer:
+    """An upstream tile server on localhost that counts the requests it gets."""
+
+    def __init__(self):
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests.append(self.path)
+                z, x, y = (int(p) for p in self.path.strip("/").split("/"))
+                data = tile(z, x, y)
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        self.template = f"http://127.0.0.1:{self._server.server_address[1]}/{{z}}/{{x}}/{{y}}"
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def upstream():
+    server = FakeTileServer()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = TileCache(str(tmp_path / "tiles.sqlite"), max_bytes=10 * TILE_BYTES)
+    yield cache
+    cache.close()
+
+
+@pytest.fixture
+def proxy(cache):
+    proxy = TileProxy(cache, timeout=2.0)
+    proxy.start()
+    yield proxy
+    proxy.stop()
+
+
+def fetch(url, z, x, y):
+    url = url.replace("{z}", str(z)).replace("{x}", str(x)).replace("{y}", str(y))
+    with urllib.request.urlopen(url, timeout=5) as resp:
+        return resp.read()
+
+
+def test_miss_goes_upstream_once_then_hits(proxy, upstream):
+    url = proxy.url_for(upstream.template)
+    assert fetch(url, 3, 4, 5) == tile(3, 4, 5)
+    assert fetch(url, 3, 4, 5) == tile(3, 4, 5)
+    assert upstream.requests == ["/3/4/5"]
+
+
+def test_cached_tiles_survive_losing_upstream(proxy, upstream):
+    url = proxy.url_for(upstream.template)
+    fetch(url, 3, 4, 5)
+    upstream.stop()
+    assert fetch(url, 3, 4, 5) == tile(3, 4, 5)
+    with pytest.raises(urllib.error.HTTPError) as err:
+        fetch(url, 3, 4, 6)
+    assert err.value.code == 404
+
+
+def test_eviction_drops_least_recently_used(cache):
+    for y in range(10):
+        cache.put("src", 10, 0, y, tile(10, 0, y))
+        time.sleep(0.002)  # distinct last_used stamps
+    assert cache.get("src", 10, 0, 0) is not None  # touch the oldest
+    time.sleep(0.002)
+    cache.put("src", 10, 0, 10, tile(10, 0, 10))  # over the cap: evict to 90%
+
+    assert cache.size <= 0.9 * cache.max_bytes
+    assert cache.has("src", 10, 0, 0)        # touched, so kept
+    assert not cache.has("src", 10, 0, 1)    # now the least recently used
+    assert not cache.has("src", 10, 0, 2)
+    assert cache.has("src", 10, 0, 10)
+    on_disk = cache._db.execute("SELECT SUM(LENGTH(tile_data)) FROM tiles").fetchone()[0]
+    assert cache.size == on_disk
+
+
+def test_eviction_works_through_batches(cache):
+    cache.max_bytes = 1000 * TILE_BYTES
+    for y in range(1000):
+        cache.put("src", 12, 0, y, tile(12, 0, y))
+    cache.max_bytes = 10 * TILE_BYTES
+    cache.put("src", 12, 1, 0, tile(12, 1, 0))
+    assert cache.size <= 0.9 * cache.max_bytes
+    count = cache._db.execute("SELECT COUNT(*) FROM tiles").fetchone()[0]
+    assert count == cache.size // TILE_BYTES
+
+
+def test_seed_fetches_the_area_once(proxy, upstream):
+    proxy.cache.max_bytes = 1000 * TILE_BYTES  # room for the whole area
+    bounds = (47.37, 8.53, 47.38, 8.55)  # south, west, north, east
+    first = proxy.seed(upstream.template, bounds, 12, 14, workers=4)
+    assert first['total'] > 1
+    assert first['fetched'] == first['total'] and first['failed'] == 0
+    again = proxy.seed(upstream.template, bounds, 12, 14, workers=4)
+    assert again['cached'] == again['total']
+    assert len(upstream.requests) == first['total']
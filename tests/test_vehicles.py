@@ -0,0 +1,102 @@
+import socket
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("pymavlink")
+from pymavlink import mavutil
+
+from src.connection import Connection
+
+
+class FakeVehicle:
+    """A SITL stand-in: its own UDP socket, sending HEARTBEATs as `sysid`."""
+
+    def __init__(self, sysid, gcs_port):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.settimeout(0.2)
+        self.gcs = ('127.0.0.1', gcs_port)
+        self.mav = mavutil.mavlink.MAVLink(self, srcSystem=sysid, srcComponent=1)
+        self.parser = mavutil.mavlink.MAVLink(None)
+
+    def write(self, buf):
+        self.sock.sendto(buf, self.gcs)
+
+    def heartbeat(self):
+        self.mav.heartbeat_send(
+            mavutil.mavlink.MAV_TYPE_QUADROTOR,
+            mavutil.mavlink.MAV_AUTOPILOT_ARDUPILOTMEGA,
+            0, 0, mavutil.mavlink.MAV_STATE_STANDBY)
+
+    def received(self, duration=0.5):
+        """Every message sent to this vehicle within `duration` seconds."""
+        msgs = []
+        deadline = time.monotonic() + duration
+        while time.monotonic() < deadline:
+            try:
+                data = self.sock.recv(65535)
+            except socket.timeout:
+                continue
+            msgs.extend(self.parser.parse_buffer(data) or ())
+        return msgs
+
+    def close(self):
+        self.sock.close()
+
+
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def swarm():
+    port = free_port()
+    vehicles = [FakeVehicle(sysid, port) for sysid in (1, 2)]
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(0.05):
+            for v in vehicles:
+                v.heartbeat()
+
+    beater = threading.Thread(target=beat, daemon=True)
+    beater.start()
+    conn = Connection(record=False)
+    try:
+        conn.connect_sitl(f'udpin:127.0.0.1:{port}', heartbeat_timeout=2)
+        deadline = time.monotonic() + 2
+        while len(conn.vehicles) < 2 or any(v.mav is None for v in conn.vehicles.values()):
+            assert time.monotonic() < deadline, "vehicles never registered"
+            time.sleep(0.05)
+        yield conn, vehicles
+    finally:
+        conn.disconnect_sitl()
+        stop.set()
+        beater.join()
+        for v in vehicles:
+            v.close()
+
+
+def test_each_vehicle_is_bound_to_its_own_address(swarm):
+    conn, (one, two) = swarm
+    assert conn.vehicles[(1, 1)].address == one.sock.getsockname()
+    assert conn.vehicles[(2, 1)].address == two.sock.getsockname()
+
+
+@pytest.mark.parametrize('selected', [0, 1])
+def test_commands_reach_only_the_selected_vehicle(swarm, selected):
+    conn, fakes = swarm
+    one, two = fakes
+    one.received(0.1), two.received(0.1)  # drop anything sent while registering
+    conn.select_vehicle((selected + 1, 1))
+    conn.mav.param_request_read_send(conn.target_system, conn.target_component, b'SYSID_THISMAV', -1)
+
+    target = fakes[selected]
+    other = fakes[1 - selected]
+    got = [m for m in target.received() if m.get_type() == 'PARAM_REQUEST_READ']
+    assert [m.target_system for m in got] == [selected + 1]
+    assert other.received() == []